@@ -0,0 +1,151 @@
+"""
+Sync (get_db, threadpool) vs async (get_async_db, aiosqlite) session path
+under concurrent load.
+
+    python -m benchmarks.bench_async_db --vehicles 20000 --concurrency 1,50,200 --duration 5
+
+Builds a temporary SQLite catalog with data.generate, then serves one
+vehicle's maintenance items (a random vehicle per request, so SQLite does
+real lookups) from two routes that differ only in their session path:
+
+  sync   def route + get_db: every request holds one of the threadpool's
+         --threads slots while it waits on SQLite
+  async  async def route + get_async_db: waits on aiosqlite's connection
+         thread instead, bounded by the async pool size
+
+With --io-ms each request first runs a SQL function that sleeps that long
+inside SQLite, standing in for storage/network latency; that is where the
+async path stops being capped by the threadpool (use --pool-size above
+--threads). Requests go through httpx's ASGI transport from --concurrency
+tasks on one event loop; prints rps and p50/p99 latency per path and
+concurrency.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import anyio
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from dcars_package import models
+from dcars_package.data.generate import generate, write_sql
+from dcars_package.db import get_async_db, get_db, make_async_engine, make_engine
+
+
+def parts_query(car_id: str):
+    return select(models.MaintenanceItem.code, models.MaintenanceItem.price).where(
+        models.MaintenanceItem.vehicle_id == car_id
+    )
+
+
+def _io_wait(dbapi_conn, _record):
+    dbapi_conn.create_function("io_wait", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+def build_app(path: str, pool_size: int, io_ms: float) -> FastAPI:
+    app = FastAPI()
+    sync_engine = make_engine(f"sqlite:///{path}", pool_size=pool_size, max_overflow=0)
+    async_engine = make_async_engine(f"sqlite:///{path}", pool_size=pool_size, max_overflow=0)
+    event.listen(sync_engine, "connect", _io_wait)
+    event.listen(async_engine.sync_engine, "connect", _io_wait)
+    sync_sessions = sessionmaker(bind=sync_engine)
+    async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    wait = select(func.io_wait(io_ms))
+
+    def sync_db():
+        with sync_sessions() as db:
+            yield db
+
+    async def async_db():
+        async with async_sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = sync_db
+    app.dependency_overrides[get_async_db] = async_db
+
+    @app.get("/sync/{car_id}")
+    def sync_parts(car_id: str, db: Session = Depends(get_db)):
+        if io_ms:
+            db.execute(wait)
+        return [{"code": c, "price": p} for c, p in db.execute(parts_query(car_id))]
+
+    @app.get("/async/{car_id}")
+    async def async_parts(car_id: str, db: AsyncSession = Depends(get_async_db)):
+        if io_ms:
+            await db.execute(wait)
+        return [{"code": c, "price": p} for c, p in await db.execute(parts_query(car_id))]
+
+    return app
+
+
+async def drive(app: FastAPI, path: str, vehicle_ids: List[str], concurrency: int, duration: float) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            r = await client.get(f"/{path}/{random.choice(vehicle_ids)}")
+            latencies.append(time.perf_counter() - start)
+            errors += r.status_code != 200
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, default=20_000)
+    ap.add_argument("--concurrency", default="1,50,200")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per path and concurrency")
+    ap.add_argument("--pool-size", type=int, default=20, help="connections per engine, both paths")
+    ap.add_argument("--io-ms", type=float, default=0.0, help="simulated storage latency per request")
+    ap.add_argument("--threads", type=int, default=40, help="threadpool size for sync routes (anyio default 40)")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/catalog.db"
+        fleet = generate(args.vehicles, 0, seed=1)
+        write_sql(make_engine(f"sqlite:///{path}"), fleet)
+        app = build_app(path, args.pool_size, args.io_ms)
+
+        async def run() -> List[tuple]:
+            anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+            rows = []
+            for c in (int(x) for x in args.concurrency.split(",")):
+                for name in ("sync", "async"):
+                    rows.append((name, c, await drive(app, name, fleet.vehicle_ids, c, args.duration)))
+                    print(f"{name} c={c}: {rows[-1][2]['rps']:.0f} rps", file=sys.stderr)
+            return rows
+
+        rows = asyncio.run(run())
+
+    print(f"{args.vehicles} vehicles, pool {args.pool_size}, threadpool {args.threads}, io {args.io_ms} ms")
+    print(f"{'path':<6} {'conc':>5} {'rps':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, c, r in rows:
+        print(f"{name:<6} {c:>5} {r['rps']:>9.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
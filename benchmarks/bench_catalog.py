@@ -0,0 +1,119 @@
+"""
+/cars and /cars/{id}/parts against a catalog of --vehicles vehicles.
+
+    python -m benchmarks.bench_catalog --vehicles 50000 --parts 3
+
+Builds a temporary SQLite catalog (Core executemany), then times:
+  lazy      vehicles, then .maintenance_items per vehicle (N+1 queries)
+  selectin  routes.cars.load_cars(include_parts=True): vehicles + batched IN queries
+  cold      GET /cars?include_parts=true with an empty cache (query + serialize)
+  cached    the same request served from CATALOG_CACHE
+and the same for one vehicle's parts.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from dcars_package import models
+from dcars_package.app import app
+from dcars_package.db import make_async_engine, make_engine
+from dcars_package.routes import cars
+
+PARTS = (("ENGINE_OIL", 15_000, 200.0), ("OIL_FILTER", 15_000, 80.0), ("AIR_FILTER", 30_000, 100.0),
+         ("COOLANT", 60_000, 300.0), ("BRAKE_FLUID", 40_000, 150.0))
+
+
+def build(path: str, n_vehicles: int, n_parts: int) -> sessionmaker:
+    engine = make_engine(f"sqlite:///{path}", pool_size=2)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Vehicle), [
+            {"id": f"V{i:07d}", "make": f"make{i % 20}", "model": f"model{i % 200}", "year": 2000 + i % 25}
+            for i in range(n_vehicles)
+        ])
+        conn.execute(insert(models.MaintenanceItem), [
+            {"vehicle_id": f"V{i:07d}", "code": code, "name": code.lower(), "interval_km": km, "price": price}
+            for i in range(n_vehicles)
+            for code, km, price in PARTS[:n_parts]
+        ])
+    return sessionmaker(bind=engine)
+
+
+def best(fn: Callable[[], object], repeat: int) -> float:
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, default=50_000)
+    ap.add_argument("--parts", type=int, default=3, help="maintenance items per vehicle (max 5)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Session = build(f"{tmp}/catalog.db", args.vehicles, args.parts)
+        AsyncSession = async_sessionmaker(make_async_engine(f"sqlite:///{tmp}/catalog.db", pool_size=2))
+
+        async def override():
+            async with AsyncSession() as db:
+                yield db
+
+        app.dependency_overrides[cars.async_catalogue_db] = override
+        client = TestClient(app)
+        car_id = f"V{args.vehicles // 2:07d}"
+
+        def lazy():
+            with Session() as db:
+                return [len(c.maintenance_items) for c in db.scalars(select(models.Vehicle))]
+
+        def selectin():
+            with Session() as db:
+                return [len(c.maintenance_items) for c in cars.load_cars(db, include_parts=True)]
+
+        def cold(path: str) -> Callable[[], object]:
+            def run():
+                cars.CATALOG_CACHE.clear()
+                return client.get(path)
+            return run
+
+        def two_queries():
+            # what get_car_parts used to do: vehicle, then its rows, then per-row access
+            with Session() as db:
+                db.scalars(select(models.Vehicle).where(models.Vehicle.id == car_id)).first()
+                rows = db.scalars(select(models.MaintenanceItem).where(models.MaintenanceItem.vehicle_id == car_id)).all()
+                return [(r.code, r.price) for r in rows]
+
+        list_path = "/cars?include_parts=true"
+        parts_path = f"/cars/{car_id}/parts"
+        size = len(client.get(list_path).content)
+        rows = [
+            ("list  lazy (N+1)", best(lazy, args.repeat)),
+            ("list  selectinload", best(selectin, args.repeat)),
+            ("list  GET cold", best(cold(list_path), args.repeat)),
+            ("list  GET cached", best(lambda: client.get(list_path), args.repeat * 10)),
+            ("parts two queries", best(two_queries, args.repeat * 10)),
+            ("parts GET cold", best(cold(parts_path), args.repeat * 10)),
+            ("parts GET cached", best(lambda: client.get(parts_path), args.repeat * 10)),
+        ]
+        app.dependency_overrides.pop(cars.async_catalogue_db)
+
+    print(f"{args.vehicles} vehicles x {args.parts} parts, /cars?include_parts=true body {size / 1e6:.1f} MB")
+    for name, seconds in rows:
+        print(f"{name:<20} {seconds * 1000:>10.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
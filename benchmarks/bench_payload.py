@@ -0,0 +1,82 @@
+"""
+Payload size and build+serialize time of /maintenance/full per response mode.
+
+    python -m benchmarks.bench_payload --vehicles 1000
+
+"default" is what the endpoint did before: the full compute_due result
+returned as a dict, so FastAPI runs jsonable_encoder over it and renders it
+with JSONResponse. The other modes build through compute_due(fields=...)
+and render with FastJSONResponse, as the endpoint does now.
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.harness import measure
+from dcars_package.responses import FastJSONResponse
+from dcars_package.services.maintenance_logic import COMPACT_FIELDS, compute_due
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+_json = JSONResponse(None)
+_fast = FastJSONResponse(None)
+
+
+def build(n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "vehicle_id": f"V{i:07d}",
+            "mileage": 20_000 + (i * 37) % 90_000,
+            "avg_monthly_km": 1200.0,
+            "last_services": {
+                "engine_oil": {"last_km": 10_000, "last_date": datetime(2024, 1 + i % 12, 1, tzinfo=timezone.utc)},
+                "coolant": {"last_km": 5_000, "last_date": datetime(2022, 3, 1, tzinfo=timezone.utc)},
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def _compute(v: Dict[str, Any], fields: Optional[tuple]) -> Dict[str, Any]:
+    return compute_due(
+        vehicle_id=v["vehicle_id"],
+        current_km=v["mileage"],
+        last_services=v["last_services"],
+        avg_monthly_km=v["avg_monthly_km"],
+        now=NOW,
+        fields=fields,
+    )
+
+
+MODES: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    "default": lambda v: _json.render(jsonable_encoder(_compute(v, None))),
+    "full+fast": lambda v: _fast.render(_compute(v, None)),
+    "compact+fast": lambda v: _fast.render(_compute(v, COMPACT_FIELDS)),
+    "fields=item,due+fast": lambda v: _fast.render(_compute(v, ("item", "due"))),
+}
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    fleet = build(args.vehicles)
+    base: Dict[str, float] = {}
+    print(f"{'mode':<22} {'bytes/vehicle':>13} {'us/vehicle':>10} {'vs default':>10}")
+    for name, render in MODES.items():
+        size = sum(len(render(v)) for v in fleet) / len(fleet)
+        res = measure(lambda: [render(v) for v in fleet], ops=len(fleet), repeat=args.repeat)
+        us = res["best_ns_per_op"] / 1000
+        base.setdefault("us", us)
+        base.setdefault("size", size)
+        print(f"{name:<22} {size:>13.0f} {us:>10.1f} {base['us'] / us:>9.2f}x  ({size / base['size']:.0%} of bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
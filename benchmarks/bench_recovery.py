@@ -0,0 +1,115 @@
+"""
+Recovery time of the snapshot + WAL persistence layer.
+
+    python -m benchmarks.bench_recovery --vehicles 1000000 --records 10000000
+
+Writes a snapshot of a synthetic fleet plus a log tail in one process, then
+times recover() into empty stores in a fresh process, the way a restart
+sees it, and reports that process's peak RSS. Each --repeat is another fresh
+process over the same data directory (the page cache stays warm after the
+first). Both processes hold the whole state, so size the run to the RAM:
+about 0.45 GB per million records plus 0.5 GB per million vehicles.
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from dcars_package.services.persistence import StatePersistence
+from dcars_package.services.record_store import ServiceRecordStore
+
+ITEMS = ("engine_oil", "oil_filter", "air_filter", "coolant", "brake_fluid")
+
+
+def vehicle_id(i: int) -> str:
+    return f"V{i:07d}"
+
+
+def build(n_vehicles: int, n_records: int) -> Tuple[Dict[str, Dict[str, Any]], ServiceRecordStore]:
+    rnd = random.Random(1)
+    db = {
+        vehicle_id(i): {
+            "last_services": {"engine_oil": {"km": 10_000, "date": "2024-01-01T00:00:00+00:00"}},
+            "avg_monthly_km": 1200.0,
+            "mileage": 20_000 + i % 5000,
+        }
+        for i in range(n_vehicles)
+    }
+    ids = [vehicle_id(i) for i in range(n_vehicles)]
+    store = ServiceRecordStore()
+    store.add_many([
+        {
+            "id": rid,
+            "vehicle_id": rnd.choice(ids),
+            "item": ITEMS[rid % len(ITEMS)],
+            "at_mileage": rid % 200_000,
+            "notes": None,
+            "created_at": "2024-01-01T00:00:00+00:00",
+        }
+        for rid in range(1, n_records + 1)
+    ])
+    return db, store
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def write_state(directory: str, n_vehicles: int, n_records: int, tail: int) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    db, store = build(n_vehicles, n_records)
+    t1 = time.perf_counter()
+    p = StatePersistence(directory, sync="async")
+    p.recover({}, ServiceRecordStore())
+    p.snapshot(db, store)
+    t2 = time.perf_counter()
+    for i in range(tail):
+        vid = vehicle_id(i % n_vehicles)
+        p.log_vehicle(vid, db[vid])
+    p.close()
+    return {"build_s": t1 - t0, "snapshot_s": t2 - t1, "peak_rss_mb": peak_rss_mb()}
+
+
+def recover_state(directory: str) -> Dict[str, Any]:
+    p = StatePersistence(directory, sync="async")
+    stats = p.recover({}, ServiceRecordStore())
+    p.close()
+    return {**stats, "peak_rss_mb": peak_rss_mb()}
+
+
+def in_fresh_process(fn, *args):
+    """Run fn in a new interpreter, so its memory and timings are its own."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, default=100_000)
+    ap.add_argument("--records", type=int, default=1_000_000)
+    ap.add_argument("--tail", type=int, default=10_000, help="log entries written after the snapshot")
+    ap.add_argument("--repeat", type=int, default=3, help="recoveries to time, each in a fresh process")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as d:
+        written = in_fresh_process(write_state, d, args.vehicles, args.records, args.tail)
+        print(
+            f"{args.vehicles} vehicles, {args.records} records, {args.tail} log entries: "
+            f"built in {written['build_s']:.1f}s, snapshot written in {written['snapshot_s']:.1f}s "
+            f"(peak RSS {written['peak_rss_mb']:.0f} MB)"
+        )
+        print(f"{'run':>3} {'load s':>8} {'replay s':>9} {'total s':>8} {'peak MB':>8}")
+        for run in range(1, args.repeat + 1):
+            r = in_fresh_process(recover_state, d)
+            assert (r["vehicles"], r["records"]) == (args.vehicles, args.records), r
+            print(f"{run:>3} {r['snapshot_load_s']:>8.2f} {r['replay_s']:>9.3f} {r['total_s']:>8.2f} {r['peak_rss_mb']:>8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
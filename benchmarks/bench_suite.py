@@ -0,0 +1,262 @@
+"""
+Micro-benchmarks for the maintenance engine, the HTTP handlers (called as
+plain functions, no ASGI stack) and the service-record store.
+
+    python -m benchmarks.bench_suite --sizes 1k,100k --save benchmarks/baselines/local.json
+    python -m benchmarks.bench_suite --sizes 1k,100k --compare benchmarks/baselines/local.json
+
+With --compare the exit status is 1 when any case is slower than the
+baseline by more than --threshold (default 0.20, i.e. 20 %).
+
+Per-op cases run over a sample of at most SAMPLE vehicles; the fleet size
+still matters because the indexes and stores hold the whole fleet.
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from starlette.requests import Request
+
+from benchmarks import harness
+from dcars_package import app as app_module
+from dcars_package.app import UpsertBody, parse_last_services
+from dcars_package.services.maintenance_logic import DEFAULT_RULES, compute_due, compute_item_due
+from dcars_package.services.pagination import encode_cursor
+from dcars_package.services.record_store import ServiceRecordStore
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+GROUPS = ("engine", "handlers", "store")
+SAMPLE = 5_000
+PAGE = 100
+RECORDS_PER_VEHICLE = 2
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+ITEMS = list(DEFAULT_RULES)
+
+Case = Tuple[str, Callable[[], Any], int]
+
+# plain GET without conditional headers, for handlers that read the request (ETag checks)
+REQUEST = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+
+def raw_vehicle(rnd: random.Random) -> Dict[str, Any]:
+    """One /vehicles/upsert payload with 2-4 serviced items."""
+    mileage = rnd.randrange(5_000, 250_000)
+    services = {
+        item: {
+            "last_km": max(0, mileage - rnd.randrange(0, 90_000)),
+            "last_date": (NOW - timedelta(days=rnd.randrange(0, 1_500))).isoformat(),
+        }
+        for item in rnd.sample(ITEMS, rnd.randint(2, 4))
+    }
+    return {"mileage": mileage, "avg_monthly_km": round(rnd.uniform(300, 3_000), 1), "last_services": services}
+
+
+def make_fleet(n: int, seed: int = 0) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """(MAINTENANCE_DB-shaped fleet, raw payloads for the first SAMPLE vehicles)."""
+    rnd = random.Random(seed)
+    db, raw = {}, {}
+    for i in range(n):
+        vid = f"VH{i:07d}"
+        payload = raw_vehicle(rnd)
+        if i < SAMPLE:
+            raw[vid] = payload
+        db[vid] = {
+            "last_services": parse_last_services(payload["last_services"]),
+            "avg_monthly_km": payload["avg_monthly_km"],
+            "mileage": payload["mileage"],
+        }
+    return db, raw
+
+
+def make_records(vehicle_ids: List[str], seed: int = 0) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    created_at = NOW.isoformat()
+    recs = []
+    for rid in range(1, len(vehicle_ids) * RECORDS_PER_VEHICLE + 1):
+        recs.append({
+            "id": rid,
+            "vehicle_id": vehicle_ids[rnd.randrange(len(vehicle_ids))],
+            "item": ITEMS[rid % len(ITEMS)],
+            "at_mileage": rnd.randrange(0, 250_000),
+            "notes": None,
+            "created_at": created_at,
+        })
+    return recs
+
+
+def _loop(fn: Callable[[Any], Any], args: List[Any]) -> Callable[[], None]:
+    def run() -> None:
+        for a in args:
+            fn(a)
+    return run
+
+
+def engine_cases(db: Dict[str, Dict[str, Any]], raw: Dict[str, Dict[str, Any]]) -> List[Case]:
+    sample = list(raw)
+    pairs = [(db[vid], item) for vid in sample for item in ITEMS][:SAMPLE]
+
+    def item_due(pair):
+        rec, item = pair
+        meta = rec["last_services"].get(item, {})
+        compute_item_due(
+            item=item,
+            current_km=rec["mileage"],
+            last_service_km=meta.get("last_km"),
+            last_service_date=meta.get("last_date"),
+            avg_monthly_km=rec["avg_monthly_km"],
+            now=NOW,
+        )
+
+    def vehicle_due(vid):
+        rec = db[vid]
+        compute_due(
+            vehicle_id=vid,
+            current_km=rec["mileage"],
+            last_services=rec["last_services"],
+            avg_monthly_km=rec["avg_monthly_km"],
+            now=NOW,
+        )
+
+    payloads = [raw[vid]["last_services"] for vid in sample]
+    return [
+        ("engine.compute_item_due", _loop(item_due, pairs), len(pairs)),
+        ("engine.compute_due", _loop(vehicle_due, sample), len(sample)),
+        ("engine.parse_last_services", _loop(parse_last_services, payloads), len(payloads)),
+    ]
+
+
+def load_app(db: Dict[str, Dict[str, Any]], recs: List[Dict[str, Any]]) -> None:
+    """Point the app's module-level stores at the synthetic fleet."""
+    app_module.MAINTENANCE_DB.clear()
+    app_module.MAINTENANCE_DB.update(db)
+    store = ServiceRecordStore()
+    store.add_many(recs)
+    store.reserve_ids(len(recs))
+    app_module.SERVICE_RECORDS = store
+    app_module.rebuild_indexes()
+
+
+def handler_cases(db: Dict[str, Dict[str, Any]], raw: Dict[str, Dict[str, Any]], recs: List[Dict[str, Any]]) -> List[Case]:
+    load_app(db, recs)
+    sample = list(raw)
+    bodies = [UpsertBody(vehicle_id=vid, **raw[vid]) for vid in sample]
+
+    def due_cold():
+        app_module.DUE_CACHE.clear()
+        for vid in sample:
+            app_module.maintenance_due(REQUEST, vehicle_id=vid, mileage=None)
+
+    def full_cold():
+        app_module.DUE_CACHE.clear()
+        for vid in sample:
+            app_module.maintenance_full(REQUEST, vehicle_id=vid, mileage=None, fields=None, compact=False)
+
+    def due_warm():
+        for vid in sample:
+            app_module.maintenance_due(REQUEST, vehicle_id=vid, mileage=None)
+
+    vids = sorted(db)
+    vehicle_cursors = [encode_cursor(vids[i]) for i in range(0, len(vids), max(1, len(vids) // 100))][:100]
+    record_cursors = [encode_cursor(r) for r in range(0, len(recs), max(1, len(recs) // 100))][:100]
+
+    def vehicle_page(cursor):
+        app_module.list_vehicles(REQUEST, vehicle_id=None, format="json", include_due=False, limit=PAGE, cursor=cursor)
+
+    def record_page(cursor):
+        app_module.list_service_records(REQUEST, vehicle_id=None, format="json", include_due=False, limit=PAGE, cursor=cursor)
+
+    def record_list(vid):
+        app_module.list_service_records(REQUEST, vehicle_id=vid, format="json", include_due=False, limit=None, cursor=None)
+
+    return [
+        ("handlers.upsert_vehicle", _loop(app_module.upsert_vehicle, bodies), len(bodies)),
+        ("handlers.maintenance_due.cold", due_cold, len(sample)),
+        ("handlers.maintenance_due.warm", due_warm, len(sample)),
+        ("handlers.maintenance_full.cold", full_cold, len(sample)),
+        ("handlers.list_vehicles.page", _loop(vehicle_page, vehicle_cursors), len(vehicle_cursors)),
+        ("handlers.list_service_records.page", _loop(record_page, record_cursors), len(record_cursors)),
+        ("handlers.list_service_records.vehicle", _loop(record_list, sample), len(sample)),
+    ]
+
+
+def store_cases(db: Dict[str, Dict[str, Any]], recs: List[Dict[str, Any]]) -> List[Case]:
+    rnd = random.Random(1)
+    store = ServiceRecordStore()
+    store.add_many(recs)
+    batch = recs[:SAMPLE]
+    ids = [rnd.randrange(1, len(recs) + 1) for _ in range(SAMPLE)]
+    vids = rnd.sample(sorted(db), min(SAMPLE, len(db)))
+    afters = [rnd.randrange(0, len(recs)) for _ in range(100)]
+
+    def add_one_by_one():
+        s = ServiceRecordStore()
+        for rec in batch:
+            s.add(rec)
+
+    def add_many():
+        ServiceRecordStore().add_many(batch)
+
+    def churn():
+        # delete + re-insert the same records; exercises the order list and per-vehicle index
+        for rid in ids[:1_000]:
+            rec = store.delete(rid)
+            if rec is not None:
+                store.add(rec)
+
+    return [
+        ("store.add", add_one_by_one, len(batch)),
+        ("store.add_many", add_many, len(batch)),
+        ("store.get", _loop(store.get, ids), len(ids)),
+        ("store.list_vehicle", _loop(store.list, vids), len(vids)),
+        ("store.page", _loop(lambda after: store.page(after, PAGE), afters), len(afters)),
+        ("store.delete_add", churn, 2 * len(ids[:1_000])),
+    ]
+
+
+def run(sizes: List[str], groups: List[str], repeat: int) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for size in sizes:
+        db, raw = make_fleet(SIZES[size])
+        recs = make_records(sorted(db))
+        cases: List[Case] = []
+        if "engine" in groups:
+            cases += engine_cases(db, raw)
+        if "store" in groups:
+            cases += store_cases(db, recs)
+        if "handlers" in groups:
+            cases += handler_cases(db, raw, recs)
+        for name, fn, ops in cases:
+            results[f"{size}/{name}"] = harness.measure(fn, ops, repeat=repeat)
+            print(f"{size}/{name}: {results[f'{size}/{name}']['ns_per_op']:.1f} ns/op", file=sys.stderr)
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1k,100k", help=f"comma separated, from {', '.join(SIZES)}")
+    ap.add_argument("--groups", default=",".join(GROUPS))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    ap.add_argument("--compare", metavar="PATH", help="baseline JSON to gate against")
+    ap.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD)
+    args = ap.parse_args(argv)
+
+    results = run(args.sizes.split(","), args.groups.split(","), args.repeat)
+    comparison = None
+    if args.compare:
+        comparison = harness.compare(results, harness.load_results(args.compare), args.threshold)
+    print(harness.report(results, comparison))
+    if args.save:
+        harness.save_results(args.save, results)
+    regressed = [row["case"] for row in comparison or [] if row["regressed"]]
+    if regressed:
+        print(f"{len(regressed)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
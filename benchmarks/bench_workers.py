@@ -0,0 +1,113 @@
+"""
+Throughput vs. uvicorn worker count in shared-state mode (DCARS_STATE_DB).
+
+    python -m benchmarks.bench_workers --workers 1,2,4 --clients 4 --duration 20
+
+For each worker count: start uvicorn on a fresh state file, drive it with
+--clients load-generator processes (benchmarks.loadtest, so the client side
+is not the bottleneck), then stop it. Prints total rps and the worst p99 per
+endpoint for every worker count. Scaling needs as many free cores as
+workers + clients.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SCENARIO = ROOT / "benchmarks" / "scenarios" / "read_heavy.json"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+def run_workers(workers: int, clients: int, scenario: Path, duration: float, state_dir: str) -> Dict[str, Any]:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, DCARS_STATE_DB=os.path.join(state_dir, f"state-{workers}.db"), PYTHONPATH=str(ROOT))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "dcars_package.app:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        wait_ready(url)
+        outs = [os.path.join(state_dir, f"load-{workers}-{i}.json") for i in range(clients)]
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.loadtest", str(scenario), "--url", url,
+                 "--duration", str(duration), "--json", out],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+            )
+            for out in outs
+        ]
+        for p in procs:
+            if p.wait() != 0:
+                raise RuntimeError("load generator failed")
+        results = [json.loads(Path(out).read_text()) for out in outs]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    endpoints: Dict[str, Dict[str, float]] = {}
+    for res in results:
+        for name, s in res["endpoints"].items():
+            e = endpoints.setdefault(name, {"rps": 0.0, "p99_ms": 0.0})
+            e["rps"] += s["rps"]
+            e["p99_ms"] = max(e["p99_ms"], s["p99_ms"])
+    return {
+        "workers": workers,
+        "rps": round(sum(r["rps"] for r in results), 1),
+        "error_rate": max(r["error_rate"] for r in results),
+        "endpoints": endpoints,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", default="1,2,4")
+    ap.add_argument("--clients", type=int, default=2, help="load-generator processes")
+    ap.add_argument("--scenario", type=Path, default=DEFAULT_SCENARIO)
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds per phase")
+    ap.add_argument("--json", metavar="PATH")
+    args = ap.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as state_dir:
+        for n in (int(w) for w in args.workers.split(",")):
+            rows.append(run_workers(n, args.clients, args.scenario, args.duration, state_dir))
+            print(f"workers={n}: {rows[-1]['rps']} rps, errors={rows[-1]['error_rate']:.2%}", file=sys.stderr)
+
+    base = rows[0]["rps"] or 1.0
+    print(f"{'workers':>7} {'rps':>10} {'speedup':>8} {'errors':>7}  worst p99 ms per endpoint")
+    for row in rows:
+        p99 = ", ".join(f"{name} {e['p99_ms']:.1f}" for name, e in sorted(row["endpoints"].items()))
+        print(f"{row['workers']:>7} {row['rps']:>10.1f} {row['rps'] / base:>8.2f} {row['error_rate']:>7.2%}  {p99}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Timing and baseline comparison shared by the benchmark scripts.
+
+A result is {"ns_per_op": median over repeats, "best_ns_per_op", "ops",
+"repeats", "calibration_ns"}. Baselines are the same JSON written by --save.
+
+Shared and throttled machines drift by tens of percent between runs, so each
+case also times a fixed reference workload next to it and comparisons use
+best_ns_per_op / calibration_ns: "how many reference units does this cost".
+That cancels machine-wide speed changes, not changes of machine or Python build.
+"""
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.20  # fail when ns_per_op grows by more than 20 %
+
+
+def _reference_workload() -> int:
+    d = {}
+    for i in range(20_000):
+        d[i] = str(i)
+    return sum(len(v) for v in d.values())
+
+
+def calibrate(repeat: int = 10) -> float:
+    """Best-of-repeat ns for the reference workload on this machine right now."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _reference_workload()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e9
+
+
+def measure(fn: Callable[[], Any], ops: int, repeat: int = 5, min_time: float = 0.1) -> Dict[str, Any]:
+    """
+    Time fn(), which performs `ops` operations per call. Each repeat calls it
+    until min_time has passed, so tiny cases still get a stable reading.
+    """
+    fn()  # warm-up: caches, lazy imports, first-call allocations
+    reference = calibrate()
+    samples: List[float] = []
+    # like timeit: a collection landing in one repeat but not another is pure noise
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            calls = 0
+            start = time.perf_counter()
+            while True:
+                fn()
+                calls += 1
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            samples.append(elapsed * 1e9 / (calls * ops))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    reference = min(reference, calibrate())
+    return {
+        "ns_per_op": round(statistics.median(samples), 1),
+        "best_ns_per_op": round(min(samples), 1),
+        "ops": ops,
+        "repeats": repeat,
+        "calibration_ns": round(reference, 1),
+    }
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "node": platform.node(),
+    }
+
+
+def save_results(path: str, results: Dict[str, Dict[str, Any]]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    doc = {"environment": environment(), "results": results}
+    Path(path).write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    return json.loads(Path(path).read_text())["results"]
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Cases present in both runs, with their ratio; regressed=True past the threshold."""
+    rows = []
+    for name in sorted(results.keys() & baseline.keys()):
+        # best-of-repeats: scheduler noise only ever adds time, so the minimum is the stable figure
+        now, before = results[name]["best_ns_per_op"], baseline[name]["best_ns_per_op"]
+        ratio = (now / results[name]["calibration_ns"]) / (before / baseline[name]["calibration_ns"])
+        rows.append({
+            "case": name,
+            "baseline_ns": before,
+            "ns": now,
+            "ratio": round(ratio, 3),
+            "regressed": ratio > 1.0 + threshold,
+        })
+    return rows
+
+
+def report(results: Dict[str, Dict[str, Any]], comparison: Optional[List[Dict[str, Any]]] = None) -> str:
+    by_case = {row["case"]: row for row in comparison or []}
+    width = max((len(name) for name in results), default=10)
+    lines = [f"{'case':<{width}}  {'ns/op':>12}  {'baseline':>12}  {'ratio':>6}"]
+    for name, res in results.items():
+        row = by_case.get(name)
+        base = f"{row['baseline_ns']:>12.1f}" if row else f"{'-':>12}"
+        ratio = f"{row['ratio']:>6.2f}" if row else f"{'-':>6}"
+        flag = "  REGRESSED" if row and row["regressed"] else ""
+        lines.append(f"{name:<{width}}  {res['ns_per_op']:>12.1f}  {base}  {ratio}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,316 @@
+"""
+Concurrent HTTP load against the app, in-process (ASGI transport, no server)
+or against a running server:
+
+    python -m benchmarks.loadtest benchmarks/scenarios/mixed.json
+    python -m benchmarks.loadtest benchmarks/scenarios/daily_shape.json --url http://127.0.0.1:8000
+    python -m benchmarks.loadtest benchmarks/scenarios/mixed.json --concurrency 64 --json out.json
+
+A scenario file is JSON:
+
+    {
+      "name": "mixed",
+      "fleet_size": 1000,          # vehicles upserted before the clock starts
+      "records_per_vehicle": 2,    # service records created before the clock starts
+      "seed": 1,
+      "mix": {"upsert": 10, "due": 50, ...},   # relative weights, keys from OPERATIONS
+      "phases": [                  # run one after another
+        {"duration_s": 10, "concurrency": 8},
+        {"duration_s": 30, "concurrency": 32, "rps": 500}   # rps: paced, otherwise closed loop
+      ]
+    }
+
+Each worker picks an operation by weight, sends it and waits for the reply.
+Latency is measured per request; the report gives throughput, p50/p90/p99
+and error rate per endpoint (route template, not raw path).
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from dcars_package.services.maintenance_logic import DEFAULT_RULES
+
+ITEMS = list(DEFAULT_RULES)
+
+
+@dataclass
+class State:
+    """What the workers know about the data: vehicle ids and record ids they may touch."""
+    rnd: random.Random
+    vehicles: List[str] = field(default_factory=list)
+    records: List[int] = field(default_factory=list)
+
+    def take_record(self) -> Optional[int]:
+        # removed while in flight so two workers never update/delete the same id
+        if not self.records:
+            return None
+        i = self.rnd.randrange(len(self.records))
+        self.records[i], self.records[-1] = self.records[-1], self.records[i]
+        return self.records.pop()
+
+
+def upsert_body(rnd: random.Random, vehicle_id: str) -> Dict[str, Any]:
+    mileage = rnd.randrange(5_000, 250_000)
+    return {
+        "vehicle_id": vehicle_id,
+        "mileage": mileage,
+        "avg_monthly_km": round(rnd.uniform(300, 3_000), 1),
+        "last_services": {
+            item: {"last_km": max(0, mileage - rnd.randrange(0, 90_000)), "last_date": "2024-03-01T00:00:00+00:00"}
+            for item in rnd.sample(ITEMS, 2)
+        },
+    }
+
+
+# each operation returns (endpoint label, response or None when it had nothing to act on)
+Response = Optional[httpx.Response]
+Operation = Callable[[httpx.AsyncClient, State], Awaitable[Tuple[str, Response]]]
+
+
+async def op_upsert(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    vid = state.rnd.choice(state.vehicles)
+    return "POST /vehicles/upsert", await client.post("/vehicles/upsert", json=upsert_body(state.rnd, vid))
+
+
+async def op_due(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    vid = state.rnd.choice(state.vehicles)
+    return "GET /maintenance/due", await client.get("/maintenance/due", params={"vehicle_id": vid})
+
+
+async def op_full(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    vid = state.rnd.choice(state.vehicles)
+    return "GET /maintenance/full", await client.get("/maintenance/full", params={"vehicle_id": vid})
+
+
+async def op_record_create(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    body = {
+        "vehicle_id": state.rnd.choice(state.vehicles),
+        "item": state.rnd.choice(ITEMS),
+        "at_mileage": state.rnd.randrange(0, 250_000),
+    }
+    r = await client.post("/service-records", json=body)
+    if r.status_code == 201:
+        state.records.append(r.json()["id"])
+    return "POST /service-records", r
+
+
+async def op_record_list(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    vid = state.rnd.choice(state.vehicles)
+    return "GET /service-records", await client.get("/service-records", params={"vehicle_id": vid})
+
+
+async def op_record_update(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    rid = state.take_record()
+    if rid is None:
+        return "PUT /service-records/{rid}", None
+    try:
+        r = await client.put(f"/service-records/{rid}", json={"notes": "load test"})
+    finally:
+        state.records.append(rid)
+    return "PUT /service-records/{rid}", r
+
+
+async def op_record_delete(client: httpx.AsyncClient, state: State) -> Tuple[str, Response]:
+    rid = state.take_record()
+    if rid is None:
+        return "DELETE /service-records/{rid}", None
+    return "DELETE /service-records/{rid}", await client.delete(f"/service-records/{rid}")
+
+
+OPERATIONS: Dict[str, Operation] = {
+    "upsert": op_upsert,
+    "due": op_due,
+    "full": op_full,
+    "record_create": op_record_create,
+    "record_list": op_record_list,
+    "record_update": op_record_update,
+    "record_delete": op_record_delete,
+}
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    def add(self, endpoint: str, seconds: float, status: Optional[int]) -> None:
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        if status is None or status >= 400:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        if status is not None:
+            per = self.statuses.setdefault(endpoint, {})
+            per[status] = per.get(status, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for endpoint, lat in sorted(self.latencies.items()):
+            lat = sorted(lat)
+            errors = self.errors.get(endpoint, 0)
+            out[endpoint] = {
+                "requests": len(lat),
+                "rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+                "error_rate": round(errors / len(lat), 4),
+                "p50_ms": round(percentile(lat, 50) * 1e3, 3),
+                "p90_ms": round(percentile(lat, 90) * 1e3, 3),
+                "p99_ms": round(percentile(lat, 99) * 1e3, 3),
+                "max_ms": round(lat[-1] * 1e3, 3),
+                "statuses": {str(k): v for k, v in sorted(self.statuses.get(endpoint, {}).items())},
+            }
+        return out
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class Pacer:
+    """Hands out send slots at a fixed rate shared by all workers."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self.next_at = time.perf_counter()
+
+    async def wait(self) -> None:
+        at = self.next_at
+        self.next_at = max(at, time.perf_counter()) + self.interval
+        delay = at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def seed(client: httpx.AsyncClient, state: State, fleet_size: int, records_per_vehicle: int) -> None:
+    """Upsert the fleet and create its records; not timed."""
+    state.vehicles = [f"LT{i:06d}" for i in range(fleet_size)]
+    sem = asyncio.Semaphore(32)
+
+    async def one(coro):
+        async with sem:
+            r = await coro
+            r.raise_for_status()
+            return r
+
+    await asyncio.gather(*(one(client.post("/vehicles/upsert", json=upsert_body(state.rnd, vid))) for vid in state.vehicles))
+    rows = [
+        {"vehicle_id": vid, "item": state.rnd.choice(ITEMS), "at_mileage": state.rnd.randrange(0, 250_000)}
+        for vid in state.vehicles
+        for _ in range(records_per_vehicle)
+    ]
+    if rows:
+        body = "\n".join(json.dumps(row) for row in rows)
+        r = await client.post("/service-records/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+        r.raise_for_status()
+        report = r.json()
+        state.records = list(range(report["first_id"], report["last_id"] + 1))
+
+
+async def run_phase(client: httpx.AsyncClient, state: State, mix: Dict[str, float], phase: Dict[str, Any], stats: Stats) -> float:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    deadline = time.perf_counter() + phase["duration_s"]
+    pacer = Pacer(phase["rps"]) if phase.get("rps") else None
+
+    async def worker() -> None:
+        while True:
+            if pacer is not None:
+                await pacer.wait()
+            if time.perf_counter() >= deadline:
+                return
+            op = OPERATIONS[state.rnd.choices(names, weights)[0]]
+            start = time.perf_counter()
+            try:
+                endpoint, r = await op(client, state)
+            except httpx.HTTPError:
+                stats.add(op.__name__, time.perf_counter() - start, None)
+                continue
+            if r is not None:
+                stats.add(endpoint, time.perf_counter() - start, r.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(phase["concurrency"])))
+    return time.perf_counter() - started
+
+
+def make_client(url: Optional[str]) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=30.0, limits=httpx.Limits(max_connections=None))
+    from dcars_package.app import app  # in-process: the ASGI app without a server or sockets
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=30.0)
+
+
+async def run_scenario(scenario: Dict[str, Any], url: Optional[str] = None) -> Dict[str, Any]:
+    unknown = set(scenario["mix"]) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"unknown operations in mix: {sorted(unknown)}")
+    state = State(rnd=random.Random(scenario.get("seed", 1)))
+    stats = Stats()
+    async with make_client(url) as client:
+        await seed(client, state, scenario.get("fleet_size", 1_000), scenario.get("records_per_vehicle", 2))
+        elapsed = 0.0
+        for phase in scenario["phases"]:
+            elapsed += await run_phase(client, state, scenario["mix"], phase, stats)
+    total = sum(len(v) for v in stats.latencies.values())
+    return {
+        "scenario": scenario.get("name", "unnamed"),
+        "target": url or "in-process",
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(sum(stats.errors.values()) / total, 4) if total else 0.0,
+        "endpoints": stats.summary(elapsed),
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    lines = [
+        f"scenario={result['scenario']} target={result['target']} elapsed={result['elapsed_s']}s "
+        f"requests={result['requests']} rps={result['rps']} errors={result['error_rate']:.2%}",
+        f"{'endpoint':<32} {'reqs':>8} {'rps':>9} {'err%':>6} {'p50ms':>9} {'p90ms':>9} {'p99ms':>9} {'maxms':>9}",
+    ]
+    for endpoint, s in result["endpoints"].items():
+        lines.append(
+            f"{endpoint:<32} {s['requests']:>8} {s['rps']:>9.1f} {s['error_rate'] * 100:>6.2f} "
+            f"{s['p50_ms']:>9.2f} {s['p90_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("scenario", help="scenario JSON file")
+    ap.add_argument("--url", help="base URL of a running server; default runs the app in-process")
+    ap.add_argument("--concurrency", type=int, help="override every phase's concurrency")
+    ap.add_argument("--duration", type=float, help="override every phase's duration_s")
+    ap.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = ap.parse_args(argv)
+
+    with open(args.scenario) as f:
+        scenario = json.load(f)
+    for phase in scenario["phases"]:
+        if args.concurrency:
+            phase["concurrency"] = args.concurrency
+        if args.duration:
+            phase["duration_s"] = args.duration
+
+    result = asyncio.run(run_scenario(scenario, args.url))
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,91 @@
+import logging
+import threading
+from contextlib import asynccontextmanager, nullcontext
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 
-from fastapi import FastAPI, HTTPException, Query, Path as FPath, Response, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Path as FPath, Response, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-from dcars_package.services.maintenance_logic import compute_due
+from dcars_package import config
+from dcars_package.middleware.metrics import Metrics, MetricsMiddleware, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from dcars_package.middleware.profiling import ProfiledRoute, ProfilingMiddleware
+from dcars_package.profiling import span
+from dcars_package.responses import FastJSONResponse
+from dcars_package.routes import cars
+from dcars_package.routes.cars import catalogue_db
+from dcars_package.services.maintenance_logic import compute_due, DEFAULT_RULES, ITEM_FIELDS, COMPACT_FIELDS
+from dcars_package.services.fleet_engine import CompiledRules, FleetColumns, compute_fleet_due
+from dcars_package.services.fleet_stats import FleetStats
+from dcars_package.services.record_store import ServiceRecordStore
+from dcars_package.services.due_cache import DueCache
+from dcars_package.services.locks import StripedLock
+from dcars_package.services.upcoming_index import UpcomingIndex
+from dcars_package.services.versions import VehicleVersions, etag_matches
+from dcars_package.services import export, bulk_ingest, budget_forecast
+from dcars_package.services.pagination import SortedKeys, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from dcars_package.services.persistence import StatePersistence
+from dcars_package.services.shared_state import SharedState
+from dcars_package.services.startup import Startup
 
 BASE_DIR = Path(__file__).resolve().parent
 
-app = FastAPI(title="Dcars Maintenance API")
+logger = logging.getLogger("dcars")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global PERSISTENCE, SHARED
+    STARTUP.reset()
+    # writes must land on the loaded state, so this part finishes before serving
+    with STARTUP.phase("load_state"):
+        if config.STATE_DB:
+            SHARED = open_shared_state(config.STATE_DB)
+        elif config.DATA_DIR:
+            PERSISTENCE = open_persistence(config.DATA_DIR)
+    FLEET_STATS.start(MAINTENANCE_DB)
+    stop = threading.Event()
+    warmer = threading.Thread(target=warm_up, args=(stop,), name="dcars-warmup", daemon=True)
+    warmer.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        warmer.join()
+        FLEET_STATS.close()
+        if PERSISTENCE is not None:
+            PERSISTENCE.close()
+            PERSISTENCE = None
+        if SHARED is not None:
+            SHARED.close()
+            SHARED = None
+
+
+async def sync_shared_state() -> None:
+    """
+    Every request first catches up with writes other workers committed.
+    maybe_sync() blocks on the shared store, so it runs in the threadpool;
+    without shared state there is no thread hop.
+    """
+    if SHARED is not None:
+        await run_in_threadpool(SHARED.maybe_sync)
+
+
+app = FastAPI(title="Dcars Maintenance API", lifespan=lifespan, dependencies=[Depends(sync_shared_state)])
+# set before any route is declared: sync endpoints can then run under a request's profiler
+app.router.route_class = ProfiledRoute
+
+# per-route latency / status / in-flight, served at /metrics
+METRICS = Metrics()
+app.add_middleware(MetricsMiddleware, metrics=METRICS)
+# X-Profile: pstats|collapsed, only with DCARS_PROFILING=1
+app.add_middleware(ProfilingMiddleware)
+app.include_router(cars.router)
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 
 # ===========================
@@ -18,7 +93,217 @@ app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 # ===========================
 
 MAINTENANCE_DB: Dict[str, Dict[str, Any]] = {}
-SERVICE_RECORDS: List[Dict[str, Any]] = []  # {"id","vehicle_id","item","at_mileage","notes","created_at"}
+SERVICE_RECORDS = ServiceRecordStore()  # {"id","vehicle_id","item","at_mileage","notes","created_at"}
+
+FLEET_RULES = CompiledRules.compile(DEFAULT_RULES)
+
+# compute_due results keyed (vehicle_id, mileage override, UTC day)
+DUE_CACHE = DueCache(maxsize=config.DUE_CACHE_SIZE, ttl=config.DUE_CACHE_TTL)
+
+# projected due time per (vehicle, item), for /maintenance/upcoming
+UPCOMING = UpcomingIndex(DEFAULT_RULES)
+
+# vehicle ids in sort order, for keyset paging of /vehicles
+VEHICLE_KEYS: SortedKeys[str] = SortedKeys()
+
+# held around every read-modify-write of one vehicle's state (and its records);
+# different vehicles only contend when they share a stripe
+VEHICLE_LOCKS = StripedLock(config.LOCK_STRIPES)
+
+# /fleet/stats counters, kept current by reindex_vehicle + a daily sweep
+FLEET_STATS = FleetStats(FLEET_RULES)
+
+# per-vehicle versions behind the ETags of the single-vehicle read endpoints
+VERSIONS = VehicleVersions()
+
+# snapshot + write-ahead log; None unless DCARS_DATA_DIR is set
+PERSISTENCE: Optional[StatePersistence] = None
+
+# SQLite file shared by all workers; None unless DCARS_STATE_DB is set
+SHARED: Optional[SharedState] = None
+
+# startup phase timings and warm-up progress, served at /ready
+STARTUP = Startup()
+
+
+def open_persistence(data_dir: str) -> StatePersistence:
+    """Recover MAINTENANCE_DB / SERVICE_RECORDS from disk and start logging writes."""
+    persistence = StatePersistence(
+        data_dir,
+        sync=config.WAL_SYNC,
+        snapshot_interval=config.SNAPSHOT_INTERVAL,
+        snapshot_every_ops=config.SNAPSHOT_EVERY_OPS,
+    )
+    persistence.recover(MAINTENANCE_DB, SERVICE_RECORDS)
+    rebuild_indexes()
+    persistence.start(MAINTENANCE_DB, SERVICE_RECORDS)
+    return persistence
+
+
+def open_shared_state(path: str) -> SharedState:
+    """Load the shared fleet; from then on this worker's stores act as its read cache."""
+    shared = SharedState(
+        path,
+        on_vehicle=apply_shared_vehicle,
+        on_record=apply_shared_record,
+        on_reload=load_shared_state,
+        reserve_ids=lambda max_id: SERVICE_RECORDS.reserve_ids(max_id),
+    )
+    shared.load()
+    return shared
+
+
+def apply_shared_vehicle(vehicle_id: str, rec: Optional[Dict[str, Any]]) -> None:
+    if rec is None:
+        MAINTENANCE_DB.pop(vehicle_id, None)
+    else:
+        MAINTENANCE_DB[vehicle_id] = rec
+    reindex_vehicle(vehicle_id)
+
+
+def apply_shared_record(rid: int, rec: Optional[Dict[str, Any]]) -> None:
+    if rec is None:
+        old = SERVICE_RECORDS.delete(rid)
+        if old is not None:
+            VERSIONS.bump(old["vehicle_id"])
+    else:
+        old = SERVICE_RECORDS.get(rid)
+        SERVICE_RECORDS.put(rec)
+        if old is not None and old["vehicle_id"] != rec["vehicle_id"]:
+            VERSIONS.bump(old["vehicle_id"])
+        VERSIONS.bump(rec["vehicle_id"])
+
+
+def load_shared_state(vehicles: Dict[str, Dict[str, Any]], records: List[Dict[str, Any]]) -> None:
+    MAINTENANCE_DB.clear()
+    MAINTENANCE_DB.update(vehicles)
+    records.sort(key=lambda r: r["vehicle_id"])  # stable: ids stay ascending per vehicle
+    runs: Dict[str, int] = {}
+    for rec in records:
+        runs[rec["vehicle_id"]] = runs.get(rec["vehicle_id"], 0) + 1
+    SERVICE_RECORDS.load(records, list(runs.items()))
+    rebuild_indexes()
+
+
+def shared_write():
+    """Outermost scope of every write: serializes writers across workers in shared mode."""
+    return SHARED.transaction() if SHARED is not None else nullcontext()
+
+
+def logged_batch():
+    """Scope of a multi-row write: its WAL entries become one frame (one fsync, replayed whole)."""
+    return PERSISTENCE.batch() if PERSISTENCE is not None else nullcontext()
+
+
+def rebuild_indexes() -> None:
+    """Derive every index from MAINTENANCE_DB again, e.g. after loading state."""
+    # versions before the cache: prewarm_due re-checks them after each put
+    VERSIONS.reset()
+    DUE_CACHE.clear()
+    UPCOMING.rebuild(MAINTENANCE_DB)
+    VEHICLE_KEYS.reset(MAINTENANCE_DB)
+    FLEET_STATS.sweep(MAINTENANCE_DB)
+
+
+def vehicle_changed(vehicle_id: str) -> None:
+    """Called after every write that touches a vehicle's maintenance inputs."""
+    if PERSISTENCE is not None:
+        PERSISTENCE.log_vehicle(vehicle_id, MAINTENANCE_DB.get(vehicle_id))
+    if SHARED is not None:
+        SHARED.write_vehicle(vehicle_id, MAINTENANCE_DB.get(vehicle_id))
+    reindex_vehicle(vehicle_id)
+
+
+def reindex_vehicle(vehicle_id: str) -> None:
+    """Bring the derived indexes in line with MAINTENANCE_DB for one vehicle."""
+    VERSIONS.bump(vehicle_id)
+    DUE_CACHE.invalidate(vehicle_id)
+    UPCOMING.update(vehicle_id, MAINTENANCE_DB.get(vehicle_id))
+    FLEET_STATS.update(vehicle_id, MAINTENANCE_DB.get(vehicle_id))
+    if vehicle_id in MAINTENANCE_DB:
+        VEHICLE_KEYS.add(vehicle_id)
+    else:
+        VEHICLE_KEYS.discard(vehicle_id)
+
+
+def records_written(recs: List[Dict[str, Any]]) -> None:
+    """Called after service records are created or changed."""
+    if PERSISTENCE is not None:
+        PERSISTENCE.log_records(recs)
+    if SHARED is not None:
+        SHARED.write_records(recs)
+    for vehicle_id in {r["vehicle_id"] for r in recs}:
+        VERSIONS.bump(vehicle_id)
+
+
+def record_deleted(rid: int, vehicle_id: str) -> None:
+    if PERSISTENCE is not None:
+        PERSISTENCE.log_record_delete(rid)
+    if SHARED is not None:
+        SHARED.delete_record(rid)
+    VERSIONS.bump(vehicle_id)
+
+
+def warm_up(stop: threading.Event) -> None:
+    """Background part of startup; /ready turns 200 once it is through, whether warming worked or not."""
+    try:
+        with STARTUP.phase("compile_rules"):
+            warm_due_paths()
+        with STARTUP.phase("prewarm_due"):
+            prewarm_due(config.WARMUP_VEHICLES, stop)
+    except Exception:
+        logger.exception("warm-up failed; serving with cold caches")
+    if not stop.is_set():
+        STARTUP.mark_ready()
+
+
+def warm_due_paths() -> None:
+    """
+    Run the scalar and the vectorized due computation (and their JSON
+    encoding) once on a made-up vehicle, so the first real request does not
+    pay their first-call setup.
+    """
+    now = datetime.now(timezone.utc)
+    sample = {
+        "mileage": 20_000,
+        "avg_monthly_km": 1_000.0,
+        "last_services": {item: {"last_km": 0, "last_date": now} for item in FLEET_RULES.items},
+    }
+    fleet = compute_fleet_due(FleetColumns.from_db({"": sample}, FLEET_RULES), FLEET_RULES, now)
+    FastJSONResponse(fleet.vehicle_result(0))
+    FastJSONResponse(compute_due(
+        vehicle_id="", current_km=sample["mileage"], last_services=sample["last_services"],
+        avg_monthly_km=sample["avg_monthly_km"], now=now, fields=tuple(sorted(COMPACT_FIELDS)),
+    ))
+
+
+def prewarm_due(limit: int, stop: threading.Event, chunk: int = 2_000) -> int:
+    """
+    Put the /maintenance/full result of up to `limit` vehicles into
+    DUE_CACHE, computed chunk by chunk with compute_fleet_due. A vehicle
+    whose version moved since its chunk was read is dropped again right
+    after the put (reindex_vehicle bumps before it invalidates), so a write
+    during warm-up never leaves a stale entry behind.
+    """
+    vehicle_ids = list(MAINTENANCE_DB)[:max(limit, 0)]
+    STARTUP.progress(0, len(vehicle_ids))
+    now = datetime.now(timezone.utc)
+    warmed = 0
+    for start in range(0, len(vehicle_ids), chunk):
+        if stop.is_set():
+            break
+        batch = vehicle_ids[start:start + chunk]
+        seen = {vid: (VERSIONS.epoch, VERSIONS.get(vid)) for vid in batch}
+        db = {vid: rec for vid, rec in ((vid, MAINTENANCE_DB.get(vid)) for vid in batch) if rec is not None}
+        fleet = compute_fleet_due(FleetColumns.from_db(db, FLEET_RULES), FLEET_RULES, now)
+        for row, vid in enumerate(fleet.columns.vehicle_ids):
+            DUE_CACHE.put((vid, None, now.date()), fleet.vehicle_result(row))
+            if (VERSIONS.epoch, VERSIONS.get(vid)) != seen[vid]:
+                DUE_CACHE.invalidate(vid)
+            else:
+                warmed += 1
+        STARTUP.progress(start + len(batch), len(vehicle_ids))
+    return warmed
 
 
 # ===========================
@@ -35,6 +320,17 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: 503 until state is loaded and caches are warm; always reports phase timings."""
+    return JSONResponse(STARTUP.snapshot(), status_code=200 if STARTUP.ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(METRICS.render() + STARTUP.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 # ===========================
 # Maintenance models & helpers
 # ===========================
@@ -50,28 +346,157 @@ def parse_last_services(payload: Optional[Dict[str, Dict[str, Any]]]) -> Dict[st
     """
     Normalize last_services dict:
     - parse ISO date strings to datetime
-    - keep last_km as-is
+    - keep last_km as-is; it must be None or an int >= 0 (400 otherwise),
+      checked here so nothing has been written when it is rejected
     """
-    if not payload:
-        return {}
+    with span("parse_last_services"):
+        if not payload:
+            return {}
+        err = bulk_ingest.last_services_error(payload)
+        if err:
+            raise HTTPException(status_code=400, detail=err)
+
+        parsed: Dict[str, Dict[str, Any]] = {}
+        for item, meta in payload.items():
+            last_km = meta.get("last_km")
+            last_date_raw = meta.get("last_date")
+            last_date = None
+
+            if isinstance(last_date_raw, str):
+                try:
+                    last_date = datetime.fromisoformat(last_date_raw)
+                except Exception:
+                    last_date = None
+            elif isinstance(last_date_raw, datetime):
+                last_date = last_date_raw
 
-    parsed: Dict[str, Dict[str, Any]] = {}
-    for item, meta in payload.items():
-        last_km = meta.get("last_km")
-        last_date_raw = meta.get("last_date")
-        last_date = None
+            parsed[item] = {"last_km": last_km, "last_date": last_date}
 
-        if isinstance(last_date_raw, str):
-            try:
-                last_date = datetime.fromisoformat(last_date_raw)
-            except Exception:
-                last_date = None
-        elif isinstance(last_date_raw, datetime):
-            last_date = last_date_raw
+        return parsed
 
-        parsed[item] = {"last_km": last_km, "last_date": last_date}
 
-    return parsed
+def cached_compute_due(
+    vehicle_id: str,
+    mileage: Optional[int],
+    rec: Optional[Dict[str, Any]],
+    fields: Optional[tuple] = None,
+) -> Dict[str, Any]:
+    """
+    compute_due for the stored vehicle (or the mileage override).
+    Time ratios only move once a day, so the day is part of the key;
+    a field selection is cached apart from the full result.
+    """
+    now = datetime.now(timezone.utc)
+    key = (vehicle_id, mileage, now.date()) if fields is None else (vehicle_id, mileage, now.date(), fields)
+    seen = (VERSIONS.epoch, VERSIONS.get(vehicle_id))
+    with span("due_cache.get"):
+        result = DUE_CACHE.get(key)
+    if result is not None:
+        return result
+
+    current_km = mileage if mileage is not None else (rec["mileage"] if rec else 0)
+    result = compute_due(
+        vehicle_id=vehicle_id,
+        current_km=current_km,
+        last_services=rec["last_services"] if rec else {},
+        avg_monthly_km=rec["avg_monthly_km"] if rec else None,
+        now=now,
+        fields=fields,
+    )
+    DUE_CACHE.put(key, result)
+    # as in prewarm_due: a write during the compute has bumped the version by now,
+    # and one that swapped the record out from under the caller left rec behind
+    if (VERSIONS.epoch, VERSIONS.get(vehicle_id)) != seen or MAINTENANCE_DB.get(vehicle_id) is not rec:
+        DUE_CACHE.invalidate(vehicle_id)
+    return result
+
+
+def record_mileage(vehicle_id: str, at_mileage: int) -> None:
+    """A service record seen at at_mileage: the vehicle's mileage only moves forward."""
+    with VEHICLE_LOCKS.hold(vehicle_id):
+        MAINTENANCE_DB.setdefault(
+            vehicle_id,
+            {"last_services": {}, "avg_monthly_km": None, "mileage": at_mileage},
+        )
+        MAINTENANCE_DB[vehicle_id]["mileage"] = max(
+            MAINTENANCE_DB[vehicle_id]["mileage"],
+            at_mileage,
+        )
+        vehicle_changed(vehicle_id)
+
+
+def apply_record_batch(rows: List[Dict[str, Any]]) -> List[int]:
+    """
+    Store validated service-record rows in one go: one timestamp for the
+    batch and one mileage update per vehicle. Returns the new ids.
+    """
+    created_at = datetime.now(timezone.utc).isoformat()
+    with shared_write(), logged_batch():
+        recs = []
+        max_km: Dict[str, int] = {}
+        for row in rows:
+            recs.append({"id": SERVICE_RECORDS.next_id(), **row, "created_at": created_at})
+            vid, km = row["vehicle_id"], row["at_mileage"]
+            if km > max_km.get(vid, -1):
+                max_km[vid] = km
+
+        SERVICE_RECORDS.add_many(recs)
+        records_written(recs)
+        for vid, km in max_km.items():
+            record_mileage(vid, km)
+    return [r["id"] for r in recs]
+
+
+def export_format(request: Request, fmt: Optional[str]) -> str:
+    """?format= wins, then the Accept header; plain JSON otherwise."""
+    if fmt:
+        return fmt
+    accept = request.headers.get("accept", "")
+    if export.NDJSON in accept:
+        return "ndjson"
+    if export.CSV in accept:
+        return "csv"
+    return "json"
+
+
+def not_modified(request: Request, vehicle_id: str):
+    """
+    (etag, 304 response or None). Take the tag before reading any state: a
+    write landing in between then pairs fresh data with the older tag, which
+    only costs the client one more full response.
+    """
+    etag = VERSIONS.etag(vehicle_id, datetime.now(timezone.utc).date())
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, Response(status_code=304, headers={"ETag": etag})
+    return etag, None
+
+
+def page_params(limit: Optional[int], cursor: Optional[str], key_type: type):
+    """(limit, after_key) for a paged listing, or None when the caller wants the full list."""
+    if limit is None and cursor is None:
+        return None
+    try:
+        after = decode_cursor(cursor, key_type) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    return (limit or DEFAULT_PAGE_SIZE), after
+
+
+def page_body(rows: List[Dict[str, Any]], limit: int, key: str) -> Dict[str, Any]:
+    """rows holds up to limit + 1 entries; the extra one only tells us another page exists."""
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1][key]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def stream_rows(rows, fmt: str, columns: List[str], filename: str) -> StreamingResponse:
+    if fmt == "csv":
+        return StreamingResponse(
+            export.iter_csv(rows, columns),
+            media_type=export.CSV,
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+    return StreamingResponse(export.iter_ndjson(rows), media_type=export.NDJSON)
 
 
 # ===========================
@@ -85,82 +510,257 @@ def upsert_vehicle(body: UpsertBody):
     if body.mileage < 0:
         raise HTTPException(status_code=400, detail="mileage must be >= 0")
 
-    record = MAINTENANCE_DB.get(
-        vehicle_id,
-        {"last_services": {}, "avg_monthly_km": None, "mileage": 0},
-    )
+    last_services = parse_last_services(body.last_services)
+
+    with shared_write():
+        record = apply_upsert(vehicle_id, body.mileage, body.avg_monthly_km, last_services)
+    return {"ok": True, "vehicle_id": vehicle_id, "record": record}
 
-    record["mileage"] = body.mileage
 
-    if body.avg_monthly_km is not None:
-        record["avg_monthly_km"] = body.avg_monthly_km
+def apply_upsert(
+    vehicle_id: str,
+    mileage: int,
+    avg_monthly_km: Optional[float],
+    last_services: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """One validated upsert; the caller holds shared_write()."""
+    with VEHICLE_LOCKS.hold(vehicle_id):
+        record = MAINTENANCE_DB.get(
+            vehicle_id,
+            {"last_services": {}, "avg_monthly_km": None, "mileage": 0},
+        )
 
-    if body.last_services:
-        record["last_services"].update(parse_last_services(body.last_services))
+        record["mileage"] = mileage
+
+        if avg_monthly_km is not None:
+            record["avg_monthly_km"] = avg_monthly_km
+
+        if last_services:
+            record["last_services"].update(last_services)
+
+        MAINTENANCE_DB[vehicle_id] = record
+        vehicle_changed(vehicle_id)
+    return record
 
-    MAINTENANCE_DB[vehicle_id] = record
-    return {"ok": True, "vehicle_id": vehicle_id, "record": record}
+
+def apply_vehicle_batch(rows: List[Dict[str, Any]]) -> int:
+    """
+    All rows under one write scope, in order (a repeated vehicle_id: last row
+    wins), and one log frame: one fsync, recovered whole or not at all.
+    """
+    with shared_write(), logged_batch():
+        for row in rows:
+            apply_upsert(row["vehicle_id"], row["mileage"], row["avg_monthly_km"], row["last_services"])
+    return len({row["vehicle_id"] for row in rows})
+
+
+@app.post("/vehicles/upsert/bulk")
+async def bulk_upsert_vehicles(request: Request):
+    """
+    Body: a JSON array of /vehicles/upsert bodies (or {"vehicles": [...]}).
+    Bad rows are reported by index and skipped; the rest are applied together.
+    Returns counts only, not the stored records.
+    """
+    body, err = bulk_ingest.parse_json(await request.body())
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    if isinstance(body, dict):
+        body = body.get("vehicles")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=422, detail="expected a JSON array of vehicles")
+
+    dates: Dict[str, Optional[datetime]] = {}
+    rows, errors, rejected = [], [], 0
+    for i, raw in enumerate(body):
+        row, err = bulk_ingest.validate_vehicle(raw, dates)
+        if err is None:
+            rows.append(row)
+            continue
+        rejected += 1
+        if len(errors) < bulk_ingest.MAX_REPORTED_ERRORS:
+            errors.append({"index": i, "error": err})
+
+    vehicles = await run_in_threadpool(apply_vehicle_batch, rows) if rows else 0
+    return FastJSONResponse({
+        "accepted": len(rows),
+        "rejected": rejected,
+        "vehicles": vehicles,
+        "errors": errors,
+        "errors_truncated": rejected > len(errors),
+    })
 
 
 @app.get("/vehicles")
-def list_vehicles(vehicle_id: Optional[str] = Query(None)):
+def list_vehicles(
+    request: Request,
+    vehicle_id: Optional[str] = Query(None),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$"),
+    include_due: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+):
+    fmt = export_format(request, format)
+    paging = page_params(limit, cursor, str) if not vehicle_id else None
+    if paging:
+        limit, after = paging
+        rows = []
+        for vid in VEHICLE_KEYS.after(after, limit + 1):
+            rec = MAINTENANCE_DB.get(vid)
+            if rec is not None:
+                rows.append(dict(vehicle_id=vid, **rec))
+        return page_body(rows, limit, "vehicle_id")
+
+    if fmt != "json":
+        db = MAINTENANCE_DB
+        if vehicle_id:
+            db = {vehicle_id: MAINTENANCE_DB[vehicle_id]} if vehicle_id in MAINTENANCE_DB else {}
+        columns = export.VEHICLE_COLUMNS + (export.VEHICLE_DUE_COLUMNS if include_due else [])
+        return stream_rows(export.vehicle_rows(db, include_due), fmt, columns, "vehicles")
+
     if vehicle_id:
+        etag, cached = not_modified(request, vehicle_id)
+        if cached:
+            return cached
         rec = MAINTENANCE_DB.get(vehicle_id)
-        return [dict(vehicle_id=vehicle_id, **rec)] if rec else []
-    return [dict(vehicle_id=k, **v) for k, v in MAINTENANCE_DB.items()]
+        return JSONResponse(jsonable_encoder([dict(vehicle_id=vehicle_id, **rec)] if rec else []), headers={"ETag": etag})
+    # copy the items first: a concurrent upsert may add a vehicle mid-iteration
+    with span("vehicle_store.list"):
+        return [dict(vehicle_id=k, **v) for k, v in list(MAINTENANCE_DB.items())]
 
 
 @app.get("/maintenance/due")
 def maintenance_due(
+    request: Request,
     vehicle_id: str = Query(..., min_length=1),
     mileage: Optional[int] = Query(None),
 ):
+    etag, cached = not_modified(request, vehicle_id)
+    if cached:
+        return cached
     rec = MAINTENANCE_DB.get(vehicle_id)
     if not rec and mileage is None:
-        return {"vehicle_id": vehicle_id, "any_due": False, "items": [], "overall_urgency": 0.0}
+        return FastJSONResponse(
+            {"vehicle_id": vehicle_id, "any_due": False, "items": [], "overall_urgency": 0.0}, headers={"ETag": etag}
+        )
 
     current_km = mileage if mileage is not None else rec["mileage"]
 
     if current_km < 0:
         raise HTTPException(status_code=400, detail="mileage must be >= 0")
 
-    last_services = rec["last_services"] if rec else {}
-    avg_monthly_km = rec["avg_monthly_km"] if rec else None
-
-    result = compute_due(
-        vehicle_id=vehicle_id,
-        current_km=current_km,
-        last_services=last_services,
-        avg_monthly_km=avg_monthly_km,
-    )
+    result = cached_compute_due(vehicle_id, mileage, rec)
 
     # expose only due / high-urgency items
     due_or_high = [it for it in result["items"] if it["due"] or it["urgency_score"] >= 0.75]
 
-    return {
+    return FastJSONResponse({
         "vehicle_id": vehicle_id,
         "any_due": result["any_due"],
         "items": due_or_high,
         "overall_urgency": result["overall_urgency"],
-    }
+    }, headers={"ETag": etag})
+
+
+def parse_item_fields(fields: Optional[str], compact: bool) -> Optional[tuple]:
+    """?fields=a,b / ?compact=true -> sorted tuple of item keys (None: everything)."""
+    if fields:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = selected.difference(ITEM_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"unknown fields: {', '.join(sorted(unknown))}; allowed: {', '.join(ITEM_FIELDS)}",
+            )
+        return tuple(sorted(selected))
+    if compact:
+        return tuple(sorted(COMPACT_FIELDS))
+    return None
 
 
 @app.get("/maintenance/full")
 def maintenance_full(
+    request: Request,
     vehicle_id: str = Query(..., min_length=1),
     mileage: Optional[int] = Query(None),
+    fields: Optional[str] = Query(None, description="comma-separated item keys, e.g. item,due,urgency_score"),
+    compact: bool = Query(False, description="only item, due, km/days remaining and urgency_score"),
 ):
+    selected = parse_item_fields(fields, compact)
+    etag, cached = not_modified(request, vehicle_id)
+    if cached:
+        return cached
     rec = MAINTENANCE_DB.get(vehicle_id)
-    current_km = mileage if mileage is not None else (rec["mileage"] if rec else 0)
-    last_services = rec["last_services"] if rec else {}
-    avg_monthly_km = rec["avg_monthly_km"] if rec else None
+    return FastJSONResponse(cached_compute_due(vehicle_id, mileage, rec, selected), headers={"ETag": etag})
+
+
+@app.get("/maintenance/upcoming")
+def maintenance_upcoming(
+    within_days: float = Query(30, ge=0),
+    limit: int = Query(100, ge=1, le=10_000),
+):
+    now = datetime.now(timezone.utc)
+    entries = UPCOMING.upcoming(within_days, limit, now=now)
+    return {
+        "generated_at": now.isoformat(),
+        "within_days": within_days,
+        "items": [
+            {
+                "vehicle_id": vehicle_id,
+                "item": item,
+                "due_at": datetime.fromtimestamp(due_ts, timezone.utc).isoformat(),
+                "days_until": (datetime.fromtimestamp(due_ts, timezone.utc) - now).days,
+                "reason": reason,
+            }
+            for due_ts, _, vehicle_id, item, reason in entries
+        ],
+    }
+
+
+@app.get("/maintenance/cache/stats")
+def maintenance_cache_stats():
+    return DUE_CACHE.stats()
 
-    return compute_due(
-        vehicle_id=vehicle_id,
-        current_km=current_km,
-        last_services=last_services,
-        avg_monthly_km=avg_monthly_km,
-    )
+
+@app.get("/maintenance/locks/stats")
+def maintenance_lock_stats():
+    return VEHICLE_LOCKS.stats()
+
+
+@app.get("/maintenance/due/fleet")
+def maintenance_due_fleet(
+    only_due: bool = Query(False),
+    full: bool = Query(False),
+):
+    fleet = compute_fleet_due(FleetColumns.from_db(MAINTENANCE_DB, FLEET_RULES), FLEET_RULES)
+
+    if full:
+        # same per-vehicle payload as /maintenance/full
+        vehicles = [fleet.vehicle_result(i) for i in range(len(fleet)) if fleet.any_due[i] or not only_due]
+    else:
+        vehicles = fleet.summaries(only_due=only_due)
+
+    return {
+        "generated_at": fleet.now.isoformat(),
+        "vehicle_count": len(fleet),
+        "due_count": int(fleet.any_due.sum()),
+        "vehicles": vehicles,
+    }
+
+
+@app.get("/fleet/stats")
+def fleet_stats():
+    return FLEET_STATS.snapshot()
+
+
+@app.get("/fleet/forecast")
+def fleet_forecast(
+    months: int = Query(12, ge=1, le=120),
+    group_by: str = Query("none", pattern="^(none|make|model|make_model)$"),
+    db=Depends(catalogue_db),
+):
+    """Expected maintenance cost per month from maintenance_items prices and each vehicle's usage."""
+    rows = budget_forecast.maintenance_item_rows(db)
+    return FastJSONResponse(budget_forecast.forecast(rows, MAINTENANCE_DB, months=months, group_by=group_by))
 
 
 # ===========================
@@ -185,34 +785,67 @@ def create_service_record(payload: Dict[str, Any]):
     if at_mileage < 0:
         raise HTTPException(status_code=400, detail="at_mileage must be >= 0")
 
-    rec = {
-        "id": len(SERVICE_RECORDS) + 1,
-        "vehicle_id": str(vehicle_id),
-        "item": str(item),
-        "at_mileage": at_mileage,
-        "notes": notes,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-    }
+    vehicle_id = str(vehicle_id)
+    with shared_write(), VEHICLE_LOCKS.hold(vehicle_id):
+        rec = {
+            "id": SERVICE_RECORDS.next_id(),
+            "vehicle_id": vehicle_id,
+            "item": str(item),
+            "at_mileage": at_mileage,
+            "notes": notes,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        SERVICE_RECORDS.add(rec)
+        records_written([rec])
+        record_mileage(rec["vehicle_id"], at_mileage)
 
-    SERVICE_RECORDS.append(rec)
+    return rec
 
-    MAINTENANCE_DB.setdefault(
-        rec["vehicle_id"],
-        {"last_services": {}, "avg_monthly_km": None, "mileage": at_mileage},
-    )
-    MAINTENANCE_DB[rec["vehicle_id"]]["mileage"] = max(
-        MAINTENANCE_DB[rec["vehicle_id"]]["mileage"],
-        at_mileage,
-    )
 
-    return rec
+@app.post("/service-records/bulk")
+async def bulk_create_service_records(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+):
+    """
+    Streamed NDJSON (one record per line) or CSV (header: vehicle_id,item,at_mileage,notes).
+    Rows are validated and stored in batches; bad rows are reported, not fatal.
+    """
+    fmt = format or ("csv" if export.CSV in request.headers.get("content-type", "") else "ndjson")
+    report = bulk_ingest.IngestReport()
+    async for batch in bulk_ingest.iter_batches(request.stream(), fmt):
+        valid = report.split(batch)
+        if valid:
+            report.applied(await run_in_threadpool(apply_record_batch, valid))
+    return report.as_dict()
 
 
 @app.get("/service-records")
-def list_service_records(vehicle_id: Optional[str] = Query(None)):
+def list_service_records(
+    request: Request,
+    vehicle_id: Optional[str] = Query(None),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$"),
+    include_due: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+):
+    fmt = export_format(request, format)
+    paging = page_params(limit, cursor, int)
+    if paging:
+        limit, after = paging
+        return page_body(SERVICE_RECORDS.page(after, limit + 1, vehicle_id or None), limit, "id")
+
+    if fmt != "json":
+        rows = export.record_rows(SERVICE_RECORDS.scan(vehicle_id or None), MAINTENANCE_DB, include_due)
+        columns = export.RECORD_COLUMNS + (export.RECORD_DUE_COLUMNS if include_due else [])
+        return stream_rows(rows, fmt, columns, "service-records")
+
     if vehicle_id:
-        return [r for r in SERVICE_RECORDS if r["vehicle_id"] == vehicle_id]
-    return SERVICE_RECORDS
+        etag, cached = not_modified(request, vehicle_id)
+        if cached:
+            return cached
+        return FastJSONResponse(SERVICE_RECORDS.list(vehicle_id), headers={"ETag": etag})
+    return SERVICE_RECORDS.list()
 
 
 @app.put("/service-records/{rid}", status_code=200)
@@ -221,47 +854,52 @@ async def update_service_record(
     rid: int = FPath(..., ge=1),
 ):
     payload = await request.json()
+    # store writes (and the WAL fsync) block; keep them off the event loop
+    return await run_in_threadpool(apply_record_update, rid, payload)
 
-    for rec in SERVICE_RECORDS:
-        if rec["id"] == rid:
-            # update mileage
-            if "at_mileage" in payload:
-                try:
-                    new_m = int(payload["at_mileage"])
-                except Exception:
-                    raise HTTPException(status_code=422, detail="at_mileage must be int")
 
-                if new_m < 0:
-                    raise HTTPException(status_code=400, detail="at_mileage must be >= 0")
+def apply_record_update(rid: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    rec = SERVICE_RECORDS.get(rid)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="record not found")
 
-                rec["at_mileage"] = new_m
-                vid = rec["vehicle_id"]
+    # validate before taking the lock
+    if "at_mileage" in payload:
+        try:
+            new_m = int(payload["at_mileage"])
+        except Exception:
+            raise HTTPException(status_code=422, detail="at_mileage must be int")
 
-                MAINTENANCE_DB.setdefault(
-                    vid,
-                    {"last_services": {}, "avg_monthly_km": None, "mileage": new_m},
-                )
-                MAINTENANCE_DB[vid]["mileage"] = max(
-                    MAINTENANCE_DB[vid]["mileage"],
-                    new_m,
-                )
+        if new_m < 0:
+            raise HTTPException(status_code=400, detail="at_mileage must be >= 0")
 
-            # update notes if present
-            if "notes" in payload:
-                rec["notes"] = payload["notes"]
+    with shared_write(), VEHICLE_LOCKS.hold(rec["vehicle_id"]):
+        rec = SERVICE_RECORDS.get(rid)  # may have been replaced or deleted while we waited
+        if rec is None:
+            raise HTTPException(status_code=404, detail="record not found")
 
-            # return updated record (FastAPI -> status 200)
-            return rec
+        # update mileage
+        if "at_mileage" in payload:
+            rec["at_mileage"] = new_m
+            record_mileage(rec["vehicle_id"], new_m)
 
-    raise HTTPException(status_code=404, detail="record not found")
+        # update notes if present
+        if "notes" in payload:
+            rec["notes"] = payload["notes"]
+
+        records_written([rec])
+
+    # return updated record (FastAPI -> status 200)
+    return rec
 
 
 @app.delete("/service-records/{rid}", status_code=204)
 def delete_service_record(rid: int = FPath(..., ge=1)):
-    global SERVICE_RECORDS
-    for i, rec in enumerate(SERVICE_RECORDS):
-        if rec["id"] == rid:
-            SERVICE_RECORDS.pop(i)
-            return Response(status_code=204)
-    
-    raise HTTPException(status_code=404, detail="record not found")
\ No newline at end of file
+    rec = SERVICE_RECORDS.get(rid)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="record not found")
+    with shared_write(), VEHICLE_LOCKS.hold(rec["vehicle_id"]):
+        if SERVICE_RECORDS.delete(rid) is None:
+            raise HTTPException(status_code=404, detail="record not found")
+        record_deleted(rid, rec["vehicle_id"])
+    return Response(status_code=204)
\ No newline at end of file
@@ -0,0 +1,53 @@
+# dcars_package/config.py
+# Runtime settings, read once from DCARS_* environment variables.
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+# --- database ---
+DATABASE_URL = os.getenv("DCARS_DATABASE_URL", "sqlite:///./dcars.db")
+DB_POOL_SIZE = _env_int("DCARS_DB_POOL_SIZE", 5)
+DB_MAX_OVERFLOW = _env_int("DCARS_DB_MAX_OVERFLOW", 10)
+DB_POOL_TIMEOUT = _env_float("DCARS_DB_POOL_TIMEOUT", 30.0)
+# async engine behind get_async_db; unset = DATABASE_URL with the aiosqlite driver
+ASYNC_DATABASE_URL = os.getenv("DCARS_ASYNC_DATABASE_URL")
+ASYNC_DB_POOL_SIZE = _env_int("DCARS_ASYNC_DB_POOL_SIZE", 20)
+ASYNC_DB_MAX_OVERFLOW = _env_int("DCARS_ASYNC_DB_MAX_OVERFLOW", 20)
+
+# --- routes/service_records backend: "memory" | "sqlite" ---
+RECORDS_BACKEND = os.getenv("DCARS_RECORDS_BACKEND", "memory")
+
+# --- /maintenance/due + /maintenance/full result cache ---
+DUE_CACHE_SIZE = _env_int("DCARS_DUE_CACHE_SIZE", 10_000)
+DUE_CACHE_TTL = _env_float("DCARS_DUE_CACHE_TTL", 300.0)
+
+# --- persistence of the in-memory stores (disabled unless DCARS_DATA_DIR is set) ---
+DATA_DIR = os.getenv("DCARS_DATA_DIR")
+WAL_SYNC = os.getenv("DCARS_WAL_SYNC", "group")  # "group": ack after fsync | "async"
+SNAPSHOT_INTERVAL = _env_float("DCARS_SNAPSHOT_INTERVAL", 300.0)
+SNAPSHOT_EVERY_OPS = _env_int("DCARS_SNAPSHOT_EVERY_OPS", 100_000)
+
+# --- per-vehicle write locks (lock striping) ---
+LOCK_STRIPES = _env_int("DCARS_LOCK_STRIPES", 64)
+
+# --- one fleet shared by several uvicorn workers (SQLite WAL file); unset = per-process state ---
+STATE_DB = os.getenv("DCARS_STATE_DB")
+
+# --- /cars catalog response cache (per process; writes here invalidate it) ---
+CATALOG_CACHE_SIZE = _env_int("DCARS_CATALOG_CACHE_SIZE", 10_000)
+CATALOG_CACHE_TTL = _env_float("DCARS_CATALOG_CACHE_TTL", 300.0)
+
+# --- startup warm-up: vehicles whose /maintenance/full result is precomputed (0 = none) ---
+WARMUP_VEHICLES = _env_int("DCARS_WARMUP_VEHICLES", DUE_CACHE_SIZE)
+
+# --- per-request profiling via the X-Profile header (off unless DCARS_PROFILING=1) ---
+PROFILING = bool(_env_int("DCARS_PROFILING", 0))
+PROFILE_DIR = os.getenv("DCARS_PROFILE_DIR")  # unset: the profile is returned as the response body
+PROFILE_SAMPLE_INTERVAL = _env_float("DCARS_PROFILE_SAMPLE_INTERVAL", 0.001)
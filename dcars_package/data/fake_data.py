@@ -1,18 +1,20 @@
-from models.schemas import Car, Part, CarPart
+from dcars_package.schemas import Car, CarPart, CarWithParts
 
 FAKE_CARS = [
-    Car(id=1, make="יונדאי", model="i30", year=2016, engine_size="1.6L", fuel_type="בנזין"),
-    Car(id=2, make="טויוטה", model="קורולה", year=2018, engine_size="1.8L", fuel_type="היברידי"),
+    Car(id="FAKE1", make="יונדאי", model="i30", year=2016),
+    Car(id="FAKE2", make="טויוטה", model="קורולה", year=2018),
 ]
 
 FAKE_PARTS = [
-    Part(id=1, name="פילטר אוויר", part_number="28113-2P100", category="פילטרים"),
-    Part(id=2, name="פילטר שמן", part_number="26300-35504", category="פילטרים"),
+    CarPart(id=1, code="AIR_FILTER", name="פילטר אוויר", interval_km=15000, price=100.0),
+    CarPart(id=2, code="OIL_FILTER", name="פילטר שמן", interval_km=10000, price=80.0),
 ]
 
 CAR_PARTS_MAPPING = {
-    1: [
-        CarPart(car_id=1, part=FAKE_PARTS[0], maintenance_interval_km=15000, is_required_for_test=True),
-        CarPart(car_id=1, part=FAKE_PARTS[1], maintenance_interval_km=10000, is_required_for_test=False),
-    ]
-}
\ No newline at end of file
+    "FAKE1": [FAKE_PARTS[0], FAKE_PARTS[1]],
+}
+
+FAKE_CATALOG = [
+    CarWithParts(**car.model_dump(), parts=CAR_PARTS_MAPPING.get(car.id, []))
+    for car in FAKE_CARS
+]
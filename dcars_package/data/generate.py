@@ -0,0 +1,307 @@
+"""
+Synthetic fleet for performance testing: vehicles, their maintenance items
+and service records, with realistic mileage and dates.
+
+    python -m dcars_package.data.generate --vehicles 100000 --records 300000
+    python -m dcars_package.data.generate --vehicles 1000 --database-url sqlite:///./perf.db
+
+Vehicle ids are SYN<8 digits>; the CLI numbers new vehicles after the highest
+SYN id already in the database (or from --start), so loads can be repeated.
+
+Library use:
+
+    fleet = generate(100_000, 300_000, seed=1, start=next_vehicle_number(engine))
+    write_sql(engine, fleet)          # Core executemany, chunked
+    fill_memory(MAINTENANCE_DB, fleet)  # then app.rebuild_indexes()
+
+All sampling is vectorized numpy; SQL rows go to the driver's executemany
+in chunks, never through ORM objects.
+"""
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from dcars_package.services.maintenance_logic import DEFAULT_RULES
+
+CHUNK_ROWS = 50_000
+VEHICLE_PREFIX = "SYN"
+
+MAKES = {
+    "Toyota": ("Corolla", "Yaris", "RAV4", "Camry"),
+    "Hyundai": ("i10", "i20", "i30", "Tucson"),
+    "Kia": ("Picanto", "Rio", "Sportage", "Niro"),
+    "Mazda": ("2", "3", "6", "CX-5"),
+    "Skoda": ("Fabia", "Octavia", "Superb", "Kodiaq"),
+    "Honda": ("Jazz", "Civic", "Accord", "CR-V"),
+}
+# share of the fleet per make, same order as MAKES
+MAKE_WEIGHTS = (0.28, 0.22, 0.18, 0.12, 0.12, 0.08)
+# make price factor on top of ITEM_PRICES
+MAKE_PRICE = (1.0, 0.9, 0.9, 1.05, 1.0, 1.1)
+
+ITEM_NAMES = {
+    "engine_oil": "שמן מנוע",
+    "oil_filter": "פילטר שמן",
+    "air_filter": "פילטר אוויר",
+    "cabin_filter": "פילטר תא נוסעים",
+    "brake_fluid": "נוזל בלמים",
+    "coolant": "נוזל קירור",
+    "spark_plugs": "מצתים",
+}
+ITEM_PRICES = {
+    "engine_oil": 200.0, "oil_filter": 80.0, "air_filter": 100.0, "cabin_filter": 120.0,
+    "brake_fluid": 150.0, "coolant": 250.0, "spark_plugs": 300.0,
+}
+
+_DAY_US = 86_400_000_000
+
+
+@dataclass
+class SyntheticFleet:
+    """Column arrays; vehicle arrays are (V,), record arrays (R,), record_vehicle indexes vehicles."""
+    now: datetime
+    items: List[str]
+    vehicle_ids: List[str]
+    make: np.ndarray            # index into MAKES
+    model: np.ndarray           # index into the make's models
+    year: np.ndarray
+    mileage: np.ndarray
+    avg_monthly_km: np.ndarray
+    record_vehicle: np.ndarray
+    record_item: np.ndarray     # index into items
+    record_km: np.ndarray
+    record_time_us: np.ndarray  # epoch microseconds, UTC
+
+    @property
+    def rows(self) -> int:
+        """SQL rows write_sql inserts: vehicles + items + records + record items."""
+        return len(self.vehicle_ids) * (1 + len(self.items)) + 2 * len(self.record_vehicle)
+
+
+def generate(
+    n_vehicles: int,
+    n_records: int,
+    seed: int = 0,
+    now: Optional[datetime] = None,
+    rules: Dict[str, Any] = DEFAULT_RULES,
+    start: int = 0,
+) -> SyntheticFleet:
+    """
+    Vehicles 0-20 years old (newer ones more common) driving a log-normal
+    ~1,250 km per month; records spread over vehicles in proportion to their
+    mileage, items weighted by how often they come due (1 / km_interval), each
+    dated somewhere in the vehicle's life at the matching odometer reading.
+    Vehicle ids are numbered from `start`.
+    """
+    now = now or datetime.now(timezone.utc)
+    rng = np.random.default_rng(seed)
+    items = list(rules)
+    now_us = int(now.timestamp() * 1_000_000)
+
+    make = rng.choice(len(MAKES), size=n_vehicles, p=MAKE_WEIGHTS)
+    model = rng.integers(0, 4, size=n_vehicles)
+    age_months = np.minimum(rng.exponential(60.0, size=n_vehicles), 240.0) + rng.uniform(1.0, 12.0, size=n_vehicles)
+    year = now.year - (age_months // 12).astype(np.int64)
+    avg_km = np.clip(rng.lognormal(np.log(1_250.0), 0.4, size=n_vehicles), 200.0, 6_000.0).round(1)
+    mileage = (avg_km * age_months * rng.uniform(0.9, 1.1, size=n_vehicles)).astype(np.int64)
+
+    if n_vehicles and n_records:
+        weight = mileage.astype(np.float64) + 1.0
+        record_vehicle = rng.choice(n_vehicles, size=n_records, p=weight / weight.sum())
+        item_weight = np.array([1.0 / rules[i]["km_interval"] for i in items])
+        record_item = rng.choice(len(items), size=n_records, p=item_weight / item_weight.sum())
+        at = rng.uniform(0.05, 1.0, size=n_records)  # fraction of the vehicle's life so far
+        record_km = (mileage[record_vehicle] * at).astype(np.int64)
+        life_us = (age_months[record_vehicle] * 30 * _DAY_US).astype(np.int64)
+        record_time_us = now_us - (life_us * (1.0 - at)).astype(np.int64)
+    else:
+        record_vehicle = record_item = record_km = record_time_us = np.zeros(0, dtype=np.int64)
+
+    return SyntheticFleet(
+        now=now,
+        items=items,
+        vehicle_ids=[f"{VEHICLE_PREFIX}{i:08d}" for i in range(start, start + n_vehicles)],
+        make=make,
+        model=model,
+        year=year,
+        mileage=mileage,
+        avg_monthly_km=avg_km,
+        record_vehicle=record_vehicle,
+        record_item=record_item,
+        record_km=record_km,
+        record_time_us=record_time_us,
+    )
+
+
+def _datetimes(epoch_us: np.ndarray) -> List[datetime]:
+    """Naive UTC datetimes, as the SQL models store them."""
+    return epoch_us.astype("datetime64[us]").tolist()
+
+
+def _insert(conn, table, rows: List[Dict[str, Any]]) -> None:
+    """
+    executemany of a compiled Core INSERT, straight to the DBAPI cursor:
+    SQLAlchemy's per-row parameter processing costs more than SQLite's insert
+    itself at this volume, so only the columns whose type needs it (dates)
+    go through the type's bind processor.
+    """
+    from sqlalchemy import insert
+
+    if not rows:
+        return
+    columns = list(rows[0])
+    dialect = conn.dialect
+    compiled = insert(table).compile(dialect=dialect, column_keys=columns)
+    procs = {c: table.c[c].type.bind_processor(dialect) for c in columns}
+    procs = {c: p for c, p in procs.items() if p is not None}
+    # the compiled INSERT also binds columns with Python-side scalar defaults (total_cost)
+    defaults = {
+        c.key: c.default.arg for c in table.c
+        if c.key not in columns and c.default is not None and c.default.is_scalar
+    }
+    order = list(compiled.positiontup) if dialect.positional else columns + list(defaults)
+    # building an index once afterwards beats updating it row by row for big loads
+    indexes = list(table.indexes) if len(rows) >= CHUNK_ROWS else []
+    for ix in indexes:
+        ix.drop(conn, checkfirst=True)
+    for i in range(0, len(rows), CHUNK_ROWS):
+        chunk = rows[i:i + CHUNK_ROWS]
+        if procs or defaults:
+            chunk = [{**defaults, **r, **{c: p(r[c]) for c, p in procs.items()}} for r in chunk]
+        params = [tuple(r[c] for c in order) for r in chunk] if dialect.positional else chunk
+        conn.exec_driver_sql(str(compiled), params)
+    for ix in indexes:
+        ix.create(conn)
+
+
+def next_vehicle_number(engine) -> int:
+    """First number after the highest SYN id already stored (0 for a new database)."""
+    from sqlalchemy import func, inspect, select
+    from dcars_package import models
+
+    table = models.Vehicle.__table__
+    if not inspect(engine).has_table(table.name):
+        return 0
+    with engine.connect() as conn:
+        top = conn.execute(
+            select(func.max(table.c.id)).where(table.c.id.like(f"{VEHICLE_PREFIX}%"))
+        ).scalar()
+    return int(top[len(VEHICLE_PREFIX):]) + 1 if top else 0
+
+
+def write_sql(engine, fleet: SyntheticFleet) -> Dict[str, int]:
+    """
+    Insert the fleet in one transaction with Core executemany. Record ids are
+    assigned here (after the current max) so their item rows need no RETURNING.
+    """
+    from sqlalchemy import func, select
+    from dcars_package import models
+
+    makes = list(MAKES)
+    models.Base.metadata.create_all(bind=engine)
+    vehicle_rows = [
+        {"id": vid, "make": makes[mk], "model": MAKES[makes[mk]][md], "year": yr}
+        for vid, mk, md, yr in zip(fleet.vehicle_ids, fleet.make.tolist(), fleet.model.tolist(), fleet.year.tolist())
+    ]
+    item_rows = [
+        {
+            "vehicle_id": vid,
+            "code": item.upper(),
+            "name": ITEM_NAMES.get(item, item),
+            "interval_km": DEFAULT_RULES[item]["km_interval"] if item in DEFAULT_RULES else None,
+            "price": round(ITEM_PRICES.get(item, 100.0) * MAKE_PRICE[mk], 2),
+        }
+        for vid, mk in zip(fleet.vehicle_ids, fleet.make.tolist())
+        for item in fleet.items
+    ]
+
+    tables = [models.Vehicle.__table__, models.MaintenanceItem.__table__,
+              models.ServiceRecord.__table__, models.ServiceRecordItem.__table__]
+    try:
+        with engine.begin() as conn:
+            first_id = (conn.execute(select(func.max(models.ServiceRecord.id))).scalar() or 0) + 1
+            ids = range(first_id, first_id + len(fleet.record_vehicle))
+            times = _datetimes(fleet.record_time_us)
+            record_rows = [
+                {"id": rid, "vehicle_id": fleet.vehicle_ids[v], "date": t.date(), "at_time": t, "mileage": km}
+                for rid, v, t, km in zip(ids, fleet.record_vehicle.tolist(), times, fleet.record_km.tolist())
+            ]
+            record_item_rows = [
+                {"record_id": rid, "code": fleet.items[i]} for rid, i in zip(ids, fleet.record_item.tolist())
+            ]
+            for table, rows in zip(tables, (vehicle_rows, item_rows, record_rows, record_item_rows)):
+                _insert(conn, table, rows)
+    finally:
+        # _insert drops the indexes of big tables; a failed load must not leave them
+        # missing. On SQLite the DROP commits by itself and a rollback also undoes
+        # the re-create, so check them once the transaction is over.
+        with engine.begin() as conn:
+            for table in tables:
+                for ix in table.indexes:
+                    ix.create(conn, checkfirst=True)
+
+    return {
+        "vehicles": len(vehicle_rows),
+        "maintenance_items": len(item_rows),
+        "service_records": len(record_rows),
+        "service_record_items": len(record_item_rows),
+    }
+
+
+def fill_memory(db: Dict[str, Dict[str, Any]], fleet: SyntheticFleet) -> None:
+    """
+    Add the fleet to a MAINTENANCE_DB-shaped dict; last_services holds each
+    item's latest record. Callers rebuild their indexes afterwards.
+    """
+    n_items = len(fleet.items)
+    # latest record per (vehicle, item): sort by pair then time, keep each pair's last row
+    pair = fleet.record_vehicle * n_items + fleet.record_item
+    order = np.lexsort((fleet.record_time_us, pair))
+    last = order[np.append(pair[order][1:] != pair[order][:-1], True)] if len(order) else order
+    services: List[Dict[str, Dict[str, Any]]] = [{} for _ in fleet.vehicle_ids]
+    dates = [t.replace(tzinfo=timezone.utc) for t in _datetimes(fleet.record_time_us[last])]
+    for v, i, km, date in zip(fleet.record_vehicle[last].tolist(), fleet.record_item[last].tolist(),
+                              fleet.record_km[last].tolist(), dates):
+        services[v][fleet.items[i]] = {"last_km": km, "last_date": date}
+
+    for vid, km, avg, last_services in zip(
+        fleet.vehicle_ids, fleet.mileage.tolist(), fleet.avg_monthly_km.tolist(), services
+    ):
+        db[vid] = {"last_services": last_services, "avg_monthly_km": avg, "mileage": km}
+
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vehicles", type=int, default=10_000)
+    ap.add_argument("--records", type=int, default=None, help="service records (default: 3 per vehicle)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--start", type=int, default=None, help="first vehicle number (default: after the highest SYN id stored)")
+    ap.add_argument("--database-url", default=None, help="default: DCARS_DATABASE_URL")
+    args = ap.parse_args(argv)
+
+    from dcars_package import config
+    from dcars_package.db import make_engine
+
+    engine = make_engine(args.database_url or config.DATABASE_URL)
+    records = args.records if args.records is not None else 3 * args.vehicles
+    first = args.start if args.start is not None else next_vehicle_number(engine)
+    start = time.perf_counter()
+    fleet = generate(args.vehicles, records, seed=args.seed, start=first)
+    generated = time.perf_counter()
+    counts = write_sql(engine, fleet)
+    done = time.perf_counter()
+    print(
+        ", ".join(f"{v} {k}" for k, v in counts.items())
+        + f" ({fleet.rows} rows): generated in {generated - start:.2f}s, written in {done - generated:.2f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,14 @@
+from typing import Optional
+
 from sqlalchemy.orm import Session
 from dcars_package import models
 
 
-def seed(db: Session):
+def seed(db: Session, synthetic: int = 0, records: Optional[int] = None):
+    """
+    The three demo vehicles below; synthetic > 0 adds that many generated ones
+    (plus records, default 3 per vehicle) through data.generate's bulk insert.
+    """
     # אם כבר קיים רכב – לא נזרע שוב
     if db.query(models.Vehicle).first():
         print("⚠️ Data already exists, skipping seed.")
@@ -42,4 +48,10 @@ def seed(db: Session):
     ]
     db.add_all(items)
     db.commit()
-    print("✅ Seed completed: Vehicles & Maintenance items inserted")
\ No newline at end of file
+    print("✅ Seed completed: Vehicles & Maintenance items inserted")
+
+    if synthetic:
+        from dcars_package.data.generate import generate, write_sql
+        fleet = generate(synthetic, records if records is not None else 3 * synthetic)
+        counts = write_sql(db.get_bind(), fleet)
+        print(f"✅ Synthetic fleet inserted: {counts}")
\ No newline at end of file
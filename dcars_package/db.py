@@ -1,12 +1,91 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from typing import Optional
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./dcars.db"
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+from dcars_package import config
+
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+
+def make_engine(
+    url: str = SQLALCHEMY_DATABASE_URL,
+    *,
+    pool_size: int = config.DB_POOL_SIZE,
+    max_overflow: int = config.DB_MAX_OVERFLOW,
+    pool_timeout: float = config.DB_POOL_TIMEOUT,
+) -> Engine:
+    """
+    Engine factory. File-backed SQLite gets WAL journaling and a sized
+    QueuePool so readers don't block the writer.
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # single shared in-memory db; pool sizing does not apply
+        return create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    eng = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+    )
+
+    event.listen(eng, "connect", _sqlite_pragmas)
+    return eng
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+def async_url(url: str) -> str:
+    """sqlite:///x.db -> sqlite+aiosqlite:///x.db; other URLs must already name an async driver."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+def make_async_engine(
+    url: Optional[str] = None,
+    *,
+    pool_size: int = config.ASYNC_DB_POOL_SIZE,
+    max_overflow: int = config.ASYNC_DB_MAX_OVERFLOW,
+    pool_timeout: float = config.DB_POOL_TIMEOUT,
+) -> AsyncEngine:
+    """
+    make_engine for the async path (aiosqlite for SQLite). aiosqlite runs
+    each connection on its own thread, so a request waiting on SQLite holds
+    a pooled connection but no threadpool slot.
+    """
+    url = async_url(url or config.ASYNC_DATABASE_URL or SQLALCHEMY_DATABASE_URL)
+    if not url.startswith("sqlite"):
+        return create_async_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout)
+
+    if url.endswith(("://", ":///:memory:")):
+        return create_async_engine(url, poolclass=StaticPool)
+
+    eng = create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+    )
+    event.listen(eng.sync_engine, "connect", _sqlite_pragmas)
+    return eng
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -18,4 +97,25 @@ def get_db():
         yield db
     finally:
         db.close()
-        
\ No newline at end of file
+
+
+_async_sessions: Optional[async_sessionmaker] = None
+
+
+def async_sessions() -> async_sessionmaker:
+    """Sessions on the async engine, built on first use so the sync path never needs aiosqlite."""
+    global _async_sessions
+    if _async_sessions is None:
+        # no expiry on commit: an expired attribute would need a lazy load, which async sessions can't do
+        _async_sessions = async_sessionmaker(make_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_sessions
+
+
+async def get_async_db():
+    """
+    get_db for `async def` routes. FastAPI caches a dependency's value per
+    request, so every dependency of one request that asks for it shares this
+    session and the pooled connection behind it.
+    """
+    async with async_sessions()() as db:
+        yield db
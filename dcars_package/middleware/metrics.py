@@ -0,0 +1,122 @@
+# dcars_package/middleware/metrics.py
+"""
+Request metrics as a pure ASGI middleware: no BaseHTTPMiddleware task/queue
+per request and streaming bodies pass straight through.
+
+Everything is keyed by route template ("/service-records/{rid}"), never the
+raw path, so label cardinality stays bounded. Counters are plain ints updated
+on the event loop thread; each worker process exposes its own.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# seconds; Prometheus derives p50/p99 from these with histogram_quantile()
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+UNMATCHED = "<unmatched>"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metrics:
+    """Per-route latency histograms, status counters and in-flight gauges."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # (method, route) -> non-cumulative bucket counts, last slot is +Inf
+        self._hist: Dict[Tuple[str, str], List[int]] = {}
+        self._sum: Dict[Tuple[str, str], float] = {}
+        self._status: Dict[Tuple[str, str, int], int] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        counts = self._hist.get(key)
+        if counts is None:
+            counts = self._hist[key] = [0] * (len(self.buckets) + 1)
+            self._sum[key] = 0.0
+        counts[bisect_left(self.buckets, seconds)] += 1
+        self._sum[key] += seconds
+        skey = (method, route, status)
+        self._status[skey] = self._status.get(skey, 0) + 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        out = [
+            "# HELP dcars_http_request_duration_seconds Request latency until the last body byte.",
+            "# TYPE dcars_http_request_duration_seconds histogram",
+        ]
+        for (method, route), counts in sorted(self._hist.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            total = 0
+            for bound, n in zip(self.buckets, counts):
+                total += n
+                out.append(f'dcars_http_request_duration_seconds_bucket{{{labels},le="{_fmt(bound)}"}} {total}')
+            total += counts[-1]
+            out.append(f'dcars_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {total}')
+            out.append(f"dcars_http_request_duration_seconds_sum{{{labels}}} {self._sum[(method, route)]!r}")
+            out.append(f"dcars_http_request_duration_seconds_count{{{labels}}} {total}")
+
+        out.append("# HELP dcars_http_requests_total Finished requests by status code.")
+        out.append("# TYPE dcars_http_requests_total counter")
+        for (method, route, status), n in sorted(self._status.items()):
+            out.append(f'dcars_http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {n}')
+
+        out.append("# HELP dcars_http_requests_in_flight Requests currently being served.")
+        out.append("# TYPE dcars_http_requests_in_flight gauge")
+        for method, n in sorted(self.in_flight.items()):
+            out.append(f'dcars_http_requests_in_flight{{method="{method}"}} {n}')
+        return "\n".join(out) + "\n"
+
+
+def _route_label(scope, root_path: str) -> str:
+    # the router updates the scope it was handed, so the match is visible afterwards
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:  # a Mount (e.g. /static) moved its prefix into root_path
+        return mounted[len(root_path):] + "/{path}"
+    return UNMATCHED
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        method = scope["method"]
+        if method not in KNOWN_METHODS:
+            method = "OTHER"
+        status = 500
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+        metrics.in_flight[method] = metrics.in_flight.get(method, 0) + 1
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight[method] -= 1
+            metrics.observe(method, _route_label(scope, root_path), status, time.perf_counter() - start)
@@ -0,0 +1,120 @@
+# dcars_package/middleware/profiling.py
+"""
+Opt-in profiling of single requests: with DCARS_PROFILING=1, a request
+carrying `X-Profile: pstats` (cProfile) or `X-Profile: collapsed` (stack
+sampling) runs its endpoint under that profiler.
+
+The response gets a Server-Timing header with the named spans (see
+dcars_package.profiling.span). With DCARS_PROFILE_DIR set the profile is
+written there and named in X-Profile-File; otherwise the profile replaces
+the response body (text/plain) and the endpoint's status moves to
+X-Profile-Status.
+
+Only sync (`def`) endpoints are profiled, on the threadpool thread that runs
+them: an async endpoint shares its thread with every other request on the
+event loop. FastAPI's validation/serialization of a returned dict happens
+after the endpoint, so it only shows in the Server-Timing total. Sampling
+resolution is bounded by the GIL switch interval (5 ms by default). Without
+the header, or with profiling off, a request costs one flag check here and
+one ContextVar lookup per span.
+"""
+import functools
+import inspect
+import itertools
+import os
+import re
+import time
+
+from fastapi.routing import APIRoute
+
+from dcars_package import config
+from dcars_package.profiling import MODES, RequestProfile, active
+
+HEADER = b"x-profile"
+_ids = itertools.count(1)
+
+
+def profiled(endpoint):
+    """Wrap a sync endpoint so the current request's profiler (if any) runs on its thread."""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = active()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        profile.enter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.exit()
+
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """route_class of the app: sync endpoints go through profiled()."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _mode(scope):
+    for key, value in scope["headers"]:
+        if key == HEADER:
+            value = value.decode("latin-1").strip().lower()
+            return value if value in MODES else "pstats"
+    return None
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.PROFILING:
+            await self.app(scope, receive, send)
+            return
+        mode = _mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(mode, interval=config.PROFILE_SAMPLE_INTERVAL)
+        start_msg = None
+        body = []
+
+        async def buffer(message):
+            nonlocal start_msg
+            if message["type"] == "http.response.start":
+                start_msg = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        token = profile.activate()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, buffer)
+        finally:
+            total = time.perf_counter() - start
+            profile.deactivate(token)
+            profile.close()
+
+        headers = [(k, v) for k, v in start_msg["headers"] if k.lower() != b"content-length"]
+        headers.append((b"server-timing", profile.server_timing(total).encode()))
+        status = start_msg["status"]
+        if config.PROFILE_DIR:
+            route = getattr(scope.get("route"), "path", scope["path"])
+            stem = f"{int(time.time())}-{os.getpid()}-{next(_ids)}{re.sub(r'[^A-Za-z0-9]+', '_', route)}"
+            os.makedirs(config.PROFILE_DIR, exist_ok=True)
+            path = profile.dump(os.path.join(config.PROFILE_DIR, stem))
+            headers.append((b"x-profile-file", os.path.basename(path).encode()))
+            content = b"".join(body)
+        else:
+            content = profile.report().encode()
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-type"]
+            headers += [(b"content-type", b"text/plain; charset=utf-8"), (b"x-profile-status", str(status).encode())]
+            status = 200
+        headers.append((b"content-length", str(len(content)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": content})
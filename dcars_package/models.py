@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from dcars_package.db import Base
 
@@ -31,6 +31,7 @@ class ServiceRecord(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     vehicle_id = Column(String, ForeignKey("vehicles.id"), index=True)
     date = Column(Date)
+    at_time = Column(DateTime)  # UTC, naive
     mileage = Column(Integer)
     total_cost = Column(Float, default=0.0)
 
@@ -0,0 +1,178 @@
+"""
+Per-request profiling, driven by middleware/profiling.py.
+
+While a request is being profiled its RequestProfile sits in a context
+variable, which anyio copies into the threadpool thread that runs a sync
+endpoint. Everything here is a no-op otherwise: span() costs one
+ContextVar lookup and returns a shared do-nothing context manager.
+
+    with span("compute_due"):
+        ...
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Set, Tuple
+
+MODES = ("pstats", "collapsed")
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+_ACTIVE: ContextVar[Optional["RequestProfile"]] = ContextVar("dcars_profile", default=None)
+
+
+def active() -> Optional["RequestProfile"]:
+    return _ACTIVE.get()
+
+
+def span(name: str):
+    """Time the with-block under `name` when the current request is profiled."""
+    profile = _ACTIVE.get()
+    return _NO_SPAN if profile is None else _Span(profile, name)
+
+
+class _Span:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile: "RequestProfile", name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.profile.add_span(self.name, time.perf_counter() - self.start)
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class RequestProfile:
+    """
+    One profiled request. mode "pstats" runs the endpoint under cProfile
+    (deterministic, every call); "collapsed" samples the stack of the
+    endpoint's thread every `interval` seconds into flame-graph lines.
+    Spans are recorded in both modes.
+    """
+
+    def __init__(self, mode: str = "pstats", interval: float = 0.001):
+        if mode not in MODES:
+            raise ValueError(f"profile mode must be one of {', '.join(MODES)}")
+        self.mode = mode
+        self.interval = interval
+        self.spans: Dict[str, Tuple[int, float]] = {}  # name -> (count, seconds)
+        self._lock = threading.Lock()
+        self._profiler = cProfile.Profile() if mode == "pstats" else None
+        self._threads: Set[int] = set()
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.samples = 0
+
+    def activate(self):
+        """Make this the current request's profile; returns the token for deactivate()."""
+        return _ACTIVE.set(self)
+
+    @staticmethod
+    def deactivate(token) -> None:
+        _ACTIVE.reset(token)
+
+    def add_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            count, total = self.spans.get(name, (0, 0.0))
+            self.spans[name] = (count + 1, total + seconds)
+
+    # ---- the endpoint's thread ----
+
+    def enter(self) -> None:
+        """Called on the thread about to run the endpoint."""
+        if self._profiler is not None:
+            self._profiler.enable()
+            return
+        with self._lock:
+            self._threads.add(threading.get_ident())
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="dcars-profile-sampler", daemon=True)
+                self._sampler.start()
+
+    def exit(self) -> None:
+        if self._profiler is not None:
+            self._profiler.disable()
+            return
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = [t for t in self._threads if t != me]
+            frames = sys._current_frames()
+            for tid in threads:
+                frame = frames.get(tid)
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self._stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    # ---- output ----
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value: every span (summed per name) plus the whole request, in ms."""
+        parts = [
+            f'{name};dur={seconds * 1000:.3f};desc="{count}x"' for name, (count, seconds) in sorted(self.spans.items())
+        ]
+        parts.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(parts)
+
+    def report(self, limit: int = 40) -> str:
+        """Human-readable profile: pstats sorted by cumulative time, or collapsed stacks."""
+        spans = "".join(
+            f"# span {name}: {count}x {seconds * 1000:.3f} ms\n" for name, (count, seconds) in sorted(self.spans.items())
+        )
+        if self._profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            return spans + out.getvalue()
+        return spans + self.collapsed()
+
+    def collapsed(self) -> str:
+        """`frame;frame;frame count` lines (Brendan Gregg's folded format) for flamegraph tools."""
+        return "".join(f"{stack} {n}\n" for stack, n in self._stacks.most_common())
+
+    def dump(self, path_stem: str) -> str:
+        """Write the profile next to path_stem (.pstats or .collapsed); returns the file name."""
+        if self._profiler is not None:
+            path = path_stem + ".pstats"
+            self._profiler.dump_stats(path)
+        else:
+            path = path_stem + ".collapsed"
+            with open(path, "w") as f:
+                f.write(self.collapsed())
+        return path
@@ -0,0 +1,24 @@
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:  # optional: serializes dicts/lists several times faster than json
+    import orjson
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content)
+except ImportError:  # pragma: no cover
+    def dumps(content: Any) -> bytes:
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    For handlers whose result is already plain JSON types (dict/list/str/
+    number/None). Returning it directly skips FastAPI's jsonable_encoder walk
+    over the whole payload; orjson then writes the bytes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
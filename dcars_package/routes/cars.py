@@ -1,42 +1,168 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from models.schemas import Car
-from models.tables import CarTable
-from db.session import get_db
-from typing import List
+# dcars_package/routes/cars.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from functools import lru_cache
+from typing import List, Set
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from dcars_package import config
+from dcars_package.responses import dumps
+from dcars_package.schemas import Car, CarCreate, CarPart, CarPartCreate, CarWithParts
+from dcars_package.services.catalog_cache import ALL, CatalogCache
 
 router = APIRouter()
 
-@router.get("/cars", response_model=List[Car])
-def get_cars(db: Session = Depends(get_db)):
-    return db.query(CarTable).all()
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+# serialized response bodies; every write below invalidates the car it touches
+CATALOG_CACHE = CatalogCache(maxsize=config.CATALOG_CACHE_SIZE, ttl=config.CATALOG_CACHE_TTL)
 
-from models.schemas import Car, CarPart
-from models.tables import CarTable, CarPartTable
-from db.session import get_db
 
-router = APIRouter()
+@lru_cache(maxsize=None)
+def _create_tables(engine) -> None:
+    from dcars_package import models
+    models.Base.metadata.create_all(bind=engine)
+
+
+def catalogue_db():
+    """Session on the SQL catalogue (vehicles, maintenance_items); the engine is built on first use."""
+    # imported here so the in-memory app never builds the default engine
+    from dcars_package.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        _create_tables(db.get_bind())
+        yield db
+    finally:
+        db.close()
+
+
+_ASYNC_TABLES: Set[AsyncEngine] = set()
+
+
+async def async_catalogue_db():
+    """catalogue_db on the async engine, for the routes below; waiting on SQLite takes no threadpool slot."""
+    from dcars_package.db import get_async_db
+
+    async for db in get_async_db():
+        if db.bind not in _ASYNC_TABLES:
+            from dcars_package import models
+
+            async with db.bind.begin() as conn:
+                await conn.run_sync(models.Base.metadata.create_all)
+            _ASYNC_TABLES.add(db.bind)
+        yield db
+
+
+def _json(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _json_schema(model) -> dict:
+    """
+    `responses` entry for routes that return _json(): documents the body's
+    schema in OpenAPI, since the cached bytes never go through response_model.
+    """
+    return {200: {"model": model, "content": {"application/json": {}}}}
+
+
+def cars_query(include_parts: bool = False):
+    """All vehicles; with include_parts, their items come from one extra SELECT ... IN (selectinload)."""
+    from dcars_package import models
+
+    stmt = select(models.Vehicle).order_by(models.Vehicle.id)
+    if include_parts:
+        stmt = stmt.options(selectinload(models.Vehicle.maintenance_items))
+    return stmt
+
+
+def load_cars(db: Session, include_parts: bool = False):
+    return db.scalars(cars_query(include_parts)).all()
+
+
+def _part(p) -> dict:
+    # rows come from our own tables, so build the CarPart shape directly instead of validating
+    return {"id": p.id, "code": p.code, "name": p.name, "interval_km": p.interval_km, "price": p.price}
+
+
+def dump_cars(cars, include_parts: bool = False) -> bytes:
+    if not include_parts:
+        return dumps([{"id": c.id, "make": c.make, "model": c.model, "year": c.year} for c in cars])
+    return dumps([
+        {"id": c.id, "make": c.make, "model": c.model, "year": c.year, "parts": [_part(p) for p in c.maintenance_items]}
+        for c in cars
+    ])
+
 
 # === כל הרכבים ===
-@router.get("/cars", response_model=List[Car])
-def get_cars(db: Session = Depends(get_db)):
-    return db.query(CarTable).all()
+@router.get("/cars", response_class=Response, responses=_json_schema(List[CarWithParts]))
+async def get_cars(include_parts: bool = Query(False), db: AsyncSession = Depends(async_catalogue_db)):
+    key = (ALL, include_parts)
+    body = CATALOG_CACHE.get(key)
+    if body is None:
+        generation = CATALOG_CACHE.generation()
+        rows = (await db.scalars(cars_query(include_parts))).all()
+        # a whole-catalog dump is CPU work; keep it off the event loop
+        body = await run_in_threadpool(dump_cars, rows, include_parts)
+        CATALOG_CACHE.put(key, body, generation)
+    return _json(body)
 
 
 # === חלקים לרכב מסוים ===
-@router.get("/cars/{car_id}/parts", response_model=List[CarPart])
-def get_car_parts(car_id: int, db: Session = Depends(get_db)):
-    # נבדוק אם הרכב קיים
-    car = db.query(CarTable).filter(CarTable.id == car_id).first()
-    if not car:
+@router.get("/cars/{car_id}/parts", response_class=Response, responses=_json_schema(List[CarPart]))
+async def get_car_parts(car_id: str, db: AsyncSession = Depends(async_catalogue_db)):
+    key = (car_id, "parts")
+    body = CATALOG_CACHE.get(key)
+    if body is None:
+        from dcars_package import models
+
+        generation = CATALOG_CACHE.generation()
+        car = (await db.scalars(
+            select(models.Vehicle)
+            .options(selectinload(models.Vehicle.maintenance_items))
+            .where(models.Vehicle.id == car_id)
+        )).first()
+        if not car:
+            raise HTTPException(status_code=404, detail="רכב לא נמצא")
+        body = dumps([_part(p) for p in car.maintenance_items])
+        CATALOG_CACHE.put(key, body, generation)
+    return _json(body)
+
+
+@router.post("/cars", response_model=Car, status_code=201)
+async def upsert_car(payload: CarCreate, db: AsyncSession = Depends(async_catalogue_db)):
+    from dcars_package import models
+
+    car = await db.merge(models.Vehicle(**payload.model_dump()))
+    await db.commit()
+    CATALOG_CACHE.invalidate(payload.id)
+    return Car.model_validate(car)
+
+
+@router.post("/cars/{car_id}/parts", response_model=CarPart, status_code=201)
+async def add_car_part(car_id: str, payload: CarPartCreate, db: AsyncSession = Depends(async_catalogue_db)):
+    from dcars_package import models
+
+    if await db.get(models.Vehicle, car_id) is None:
         raise HTTPException(status_code=404, detail="רכב לא נמצא")
+    part = models.MaintenanceItem(vehicle_id=car_id, **payload.model_dump())
+    db.add(part)
+    await db.commit()
+    CATALOG_CACHE.invalidate(car_id)
+    return CarPart.model_validate(part)
+
 
-    # נשלוף את כל ההתאמות שלו (CarPartTable)
-    mappings = db.query(CarPartTable).filter(CarPartTable.car_id == car_id).all()
-    if not mappings:
-        return []
+@router.delete("/cars/{car_id}/parts/{part_id}", status_code=204)
+async def delete_car_part(car_id: str, part_id: int, db: AsyncSession = Depends(async_catalogue_db)):
+    from dcars_package import models
 
-    return mappings
\ No newline at end of file
+    res = await db.execute(
+        delete(models.MaintenanceItem)
+        .where(models.MaintenanceItem.id == part_id, models.MaintenanceItem.vehicle_id == car_id)
+    )
+    await db.commit()
+    if not res.rowcount:
+        raise HTTPException(status_code=404, detail="חלק לא נמצא")
+    CATALOG_CACHE.invalidate(car_id)
+    return Response(status_code=204)
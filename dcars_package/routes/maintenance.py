@@ -1,8 +1,10 @@
 # dcars_package/routes/maintenance.py
 from fastapi import APIRouter, Query
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Any
 from datetime import datetime, timedelta, timezone
 
+from dcars_package.routes import service_records
+
 router = APIRouter()
 
 # חוקים לדוגמה
@@ -21,16 +23,12 @@ class ServiceRecord:
         self.at_mileage = at_mileage
         self.at_time = at_time
 
-def compute_due(vehicle_id: str, current_mileage: Optional[int], history: List[ServiceRecord], now: Optional[datetime] = None) -> Dict[str, Any]:
+def compute_due(vehicle_id: str, current_mileage: Optional[int], last_by_item: Dict[str, ServiceRecord], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    last_by_item: the vehicle's latest record per item, as kept by the
+    repository's LatestServiceView, so this is O(#rules).
+    """
     now = now or datetime.now(timezone.utc)
-    last_by_item: Dict[str, ServiceRecord] = {}
-    for rec in history:
-        if rec.vehicle_id != vehicle_id:
-            continue
-        cur = last_by_item.get(rec.item)
-        if (cur is None) or (rec.at_time > cur.at_time) or (rec.at_mileage > cur.at_mileage):
-            last_by_item[rec.item] = rec
-
     results = []
     for item, rule in MAINTENANCE_RULES.items():
         km_interval = rule["km_interval"]
@@ -39,7 +37,11 @@ def compute_due(vehicle_id: str, current_mileage: Optional[int], history: List[S
 
         if last:
             km_since = (current_mileage - last.at_mileage) if current_mileage is not None else None
-            time_since = now - last.at_time
+            if last.at_time is None:  # legacy SQL row without a date: no time since
+                time_since = timedelta.max
+            else:
+                last_time = last.at_time if last.at_time.tzinfo is not None else last.at_time.replace(tzinfo=timezone.utc)
+                time_since = now - last_time
         else:
             km_since = current_mileage if current_mileage is not None else None
             time_since = timedelta.max
@@ -63,7 +65,7 @@ def compute_due(vehicle_id: str, current_mileage: Optional[int], history: List[S
             "due_by_km": bool(due_by_km),
             "due_by_time": bool(due_by_time),
             "last_service_at_mileage": last.at_mileage if last else None,
-            "last_service_at_time": last.at_time.isoformat() if last else None,
+            "last_service_at_time": last.at_time.isoformat() if last and last.at_time else None,
             "next_due_at_km": next_due_at_km,
             "urgency_score": urgency_score,
         })
@@ -87,17 +89,16 @@ def compute_due(vehicle_id: str, current_mileage: Optional[int], history: List[S
 
 @router.get("/full")
 def maintenance_full(vehicle_id: str = Query(...), mileage: Optional[int] = Query(None)):
-    history: List[ServiceRecord] = []  # TODO: לחבר ל-DB/records בעתיד
-    res = compute_due(vehicle_id=vehicle_id, current_mileage=mileage, history=history)
+    latest = service_records.repo.latest.latest(vehicle_id)
+    res = compute_due(vehicle_id=vehicle_id, current_mileage=mileage, last_by_item=latest)
     return res["full"]
 
 @router.get("/due")
 def maintenance_due(vehicle_id: str = Query(...), mileage: Optional[int] = Query(None)):
-    history: List[ServiceRecord] = []  # TODO: לחבר ל-DB/records בעתיד
-    res = compute_due(vehicle_id=vehicle_id, current_mileage=mileage, history=history)
+    latest = service_records.repo.latest.latest(vehicle_id)
+    res = compute_due(vehicle_id=vehicle_id, current_mileage=mileage, last_by_item=latest)
     return res["due"]
 
 @router.get("/records")
 def maintenance_records(vehicle_id: str):
-    # בסיסי עד שיהיה חיבור למסד
-    return {"vehicle_id": vehicle_id, "records": []}
\ No newline at end of file
+    return {"vehicle_id": vehicle_id, "records": service_records.repo.list(vehicle_id)}
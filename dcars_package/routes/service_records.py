@@ -1,25 +1,42 @@
 # dcars_package/routes/service_records.py
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Union
+from datetime import datetime, time, timezone
+import threading
 import uuid
 
-from dcars_package.schemas import ServiceRecordCreate, ServiceRecordUpdate, ServiceRecordResponse
+from sqlalchemy import and_, func, select, insert, update, delete, inspect
+from sqlalchemy.orm import sessionmaker
+
+from dcars_package import config
+from dcars_package.schemas import ServiceRecordCreate, ServiceRecordUpdate, ServiceRecordResponse, ServiceRecordPage
+from dcars_package.services.latest_service import LatestServiceView
+from dcars_package.services.pagination import SortedKeys, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
 # In-memory repo (זמני עד DB)
 class InMemoryServiceRecords:
     def __init__(self):
-        self._data: List[ServiceRecordResponse] = []
+        self._data: Dict[str, ServiceRecordResponse] = {}
+        self._ids: SortedKeys[str] = SortedKeys()
+        self._by_vehicle: Dict[str, SortedKeys[str]] = {}
+        # (vehicle, item) -> latest record, read by routes/maintenance
+        self.latest = LatestServiceView()
 
     def list(self, vehicle_id: Optional[str] = None) -> List[ServiceRecordResponse]:
         if vehicle_id:
-            return [r for r in self._data if r.vehicle_id == vehicle_id]
-        return list(self._data)
+            return self.page(None, len(self._data), vehicle_id)
+        return list(self._data.values())
+
+    def page(self, after: Optional[str], limit: int, vehicle_id: Optional[str] = None) -> List[ServiceRecordResponse]:
+        keys = self._by_vehicle.get(vehicle_id) if vehicle_id else self._ids
+        if keys is None:
+            return []
+        return [self._data[rid] for rid in keys.after(after, limit)]
 
     def get(self, record_id: str) -> Optional[ServiceRecordResponse]:
-        return next((r for r in self._data if r.id == record_id), None)
+        return self._data.get(record_id)
 
     def create(self, payload: ServiceRecordCreate) -> ServiceRecordResponse:
         rec = ServiceRecordResponse(
@@ -29,33 +46,290 @@ class InMemoryServiceRecords:
             at_mileage=payload.at_mileage,
             at_time=payload.at_time or datetime.now(timezone.utc),
         )
-        self._data.append(rec)
+        self._data[rec.id] = rec
+        self._ids.add(rec.id)
+        self._by_vehicle.setdefault(rec.vehicle_id, SortedKeys()).add(rec.id)
+        self.latest.add(rec)
         return rec
 
     def update(self, record_id: str, payload: ServiceRecordUpdate) -> Optional[ServiceRecordResponse]:
         rec = self.get(record_id)
         if not rec:
             return None
-        new = ServiceRecordResponse(
-            id=rec.id,
-            vehicle_id=rec.vehicle_id,
-            item=payload.item if payload.item is not None else rec.item,
-            at_mileage=payload.at_mileage if payload.at_mileage is not None else rec.at_mileage,
-            at_time=payload.at_time if payload.at_time is not None else rec.at_time,
+        # payload is already validated, so copy instead of re-validating
+        new = rec.model_copy(update=payload.model_dump(exclude_none=True))
+        self._data[record_id] = new
+        self.latest.replace(rec, new)
+        return new
+
+    def delete(self, record_id: str) -> bool:
+        rec = self._data.pop(record_id, None)
+        if rec is None:
+            return False
+        self._ids.discard(record_id)
+        per_vehicle = self._by_vehicle[rec.vehicle_id]
+        per_vehicle.discard(record_id)
+        if not per_vehicle:
+            del self._by_vehicle[rec.vehicle_id]
+        self.latest.remove(rec)
+        return True
+
+
+def _add_missing_columns(engine, table) -> None:
+    """
+    create_all never alters a table that already exists: add the columns a
+    database created by an older version lacks (service_records.at_time).
+    Existing rows keep NULL there; _row falls back to their date.
+    """
+    have = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    missing = [c for c in table.columns if c.name not in have]
+    if not missing:
+        return
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for column in missing:
+            conn.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(engine.dialect)}"
+            )
+
+
+def _to_db_time(at_time: datetime) -> datetime:
+    # SQLite DateTime has no tz; store naive UTC
+    if at_time.tzinfo is not None:
+        at_time = at_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return at_time
+
+
+class SqlServiceRecords:
+    """
+    Same interface as InMemoryServiceRecords, stored in models.ServiceRecord
+    (+ one ServiceRecordItem row holding the item code).
+
+    The latest-service view is built on first use, from the newest row of
+    each (vehicle, item) only, and then maintained by this process's writes
+    (an update or delete looks the key's new latest row up again); rows
+    written by other processes are not seen.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        # imported here so the in-memory backend never builds the default engine
+        from dcars_package import models
+        self._models = models
+        self._session = session_factory
+        models.Base.metadata.create_all(bind=session_factory.kw["bind"])
+        _add_missing_columns(session_factory.kw["bind"], models.ServiceRecord.__table__)
+        self._latest: Optional[LatestServiceView] = None
+        self._latest_lock = threading.Lock()
+
+    @property
+    def latest(self) -> LatestServiceView:
+        if self._latest is None:
+            with self._latest_lock:
+                if self._latest is None:
+                    view = LatestServiceView()
+                    view.load(self._newest())
+                    self._latest = view
+        return self._latest
+
+    def _newest(self, vehicle_id: Optional[str] = None, item: Optional[str] = None) -> List[ServiceRecordResponse]:
+        """
+        Newest record(s) of every (vehicle, item), or of one: a GROUP BY for the
+        latest time, joined back to its rows (ties are left to the view).
+        """
+        m = self._models
+        at = func.coalesce(m.ServiceRecord.at_time, m.ServiceRecord.date)
+        newest = (
+            select(m.ServiceRecord.vehicle_id, m.ServiceRecordItem.code, func.max(at).label("at"))
+            .join(m.ServiceRecordItem, m.ServiceRecordItem.record_id == m.ServiceRecord.id)
+            .group_by(m.ServiceRecord.vehicle_id, m.ServiceRecordItem.code)
+        )
+        if vehicle_id is not None:
+            newest = newest.where(m.ServiceRecord.vehicle_id == vehicle_id, m.ServiceRecordItem.code == item)
+        newest = newest.subquery()
+        stmt = self._select().join(newest, and_(
+            m.ServiceRecord.vehicle_id == newest.c.vehicle_id,
+            m.ServiceRecordItem.code == newest.c.code,
+            at == newest.c.at,
+        ))
+        with self._session() as db:
+            return [self._row(r) for r in db.execute(stmt)]
+
+    def _refresh_latest(self, *keys) -> None:
+        """After an update/delete: the view may not hold the next latest row of these keys."""
+        if self._latest is None:
+            return
+        for vehicle_id, item in set(keys):
+            self._latest.reset(vehicle_id, item, self._newest(vehicle_id, item))
+
+    def _select(self):
+        m = self._models
+        return (
+            select(
+                m.ServiceRecord.id,
+                m.ServiceRecord.vehicle_id,
+                m.ServiceRecordItem.code,
+                m.ServiceRecord.mileage,
+                m.ServiceRecord.at_time,
+                m.ServiceRecord.date,
+            )
+            .outerjoin(m.ServiceRecordItem, m.ServiceRecordItem.record_id == m.ServiceRecord.id)
+            .order_by(m.ServiceRecord.id)
         )
-        self._data = [r if r.id != record_id else new for r in self._data]
+
+    @staticmethod
+    def _row(row) -> ServiceRecordResponse:
+        # rows come from our own table, skip validation
+        if row.at_time is not None:
+            at_time = row.at_time.replace(tzinfo=timezone.utc)
+        else:  # written before at_time existed: midnight of its date, if any
+            at_time = datetime.combine(row.date, time(), tzinfo=timezone.utc) if row.date else None
+        return ServiceRecordResponse.model_construct(
+            id=str(row.id),
+            vehicle_id=row.vehicle_id,
+            item=row.code,
+            at_mileage=row.mileage,
+            at_time=at_time,
+        )
+
+    @staticmethod
+    def _pk(record_id: str) -> Optional[int]:
+        try:
+            return int(record_id)
+        except (TypeError, ValueError):
+            return None
+
+    def list(self, vehicle_id: Optional[str] = None) -> List[ServiceRecordResponse]:
+        stmt = self._select()
+        if vehicle_id:
+            stmt = stmt.where(self._models.ServiceRecord.vehicle_id == vehicle_id)
+        with self._session() as db:
+            return [self._row(r) for r in db.execute(stmt)]
+
+    def page(self, after: Optional[str], limit: int, vehicle_id: Optional[str] = None) -> List[ServiceRecordResponse]:
+        """Keyset page on the integer primary key: WHERE id > :after ORDER BY id LIMIT :limit."""
+        m = self._models
+        stmt = self._select().limit(limit)
+        if vehicle_id:
+            stmt = stmt.where(m.ServiceRecord.vehicle_id == vehicle_id)
+        if after is not None:
+            pk = self._pk(after)
+            if pk is None:
+                return []
+            stmt = stmt.where(m.ServiceRecord.id > pk)
+        with self._session() as db:
+            return [self._row(r) for r in db.execute(stmt)]
+
+    def get(self, record_id: str) -> Optional[ServiceRecordResponse]:
+        pk = self._pk(record_id)
+        if pk is None:
+            return None
+        with self._session() as db:
+            row = db.execute(self._select().where(self._models.ServiceRecord.id == pk)).first()
+        return self._row(row) if row else None
+
+    def create(self, payload: ServiceRecordCreate) -> ServiceRecordResponse:
+        return self.create_many([payload])[0]
+
+    def create_many(self, payloads: Iterable[ServiceRecordCreate]) -> List[ServiceRecordResponse]:
+        """One transaction, two executemany INSERTs (records, then items)."""
+        m = self._models
+        payloads = list(payloads)
+        if not payloads:
+            return []
+        rows = []
+        for p in payloads:
+            at_time = _to_db_time(p.at_time or datetime.now(timezone.utc))
+            rows.append({"vehicle_id": p.vehicle_id, "date": at_time.date(), "at_time": at_time, "mileage": p.at_mileage})
+
+        with self._session.begin() as db:
+            ids = db.execute(
+                insert(m.ServiceRecord).returning(m.ServiceRecord.id, sort_by_parameter_order=True),
+                rows,
+            ).scalars().all()
+            db.execute(
+                insert(m.ServiceRecordItem),
+                [{"record_id": rid, "code": p.item} for rid, p in zip(ids, payloads)],
+            )
+
+        out = [
+            ServiceRecordResponse.model_construct(
+                id=str(rid),
+                vehicle_id=p.vehicle_id,
+                item=p.item,
+                at_mileage=p.at_mileage,
+                at_time=row["at_time"].replace(tzinfo=timezone.utc),
+            )
+            for rid, p, row in zip(ids, payloads, rows)
+        ]
+        if self._latest is not None:
+            for rec in out:
+                self._latest.add(rec)
+        return out
+
+    def update(self, record_id: str, payload: ServiceRecordUpdate) -> Optional[ServiceRecordResponse]:
+        m = self._models
+        pk = self._pk(record_id)
+        if pk is None:
+            return None
+        values = {}
+        if payload.at_mileage is not None:
+            values["mileage"] = payload.at_mileage
+        if payload.at_time is not None:
+            values["at_time"] = _to_db_time(payload.at_time)
+            values["date"] = values["at_time"].date()
+
+        with self._session.begin() as db:
+            found = db.execute(self._select().where(m.ServiceRecord.id == pk)).first()
+            if not found:
+                return None
+            if values:
+                db.execute(update(m.ServiceRecord).where(m.ServiceRecord.id == pk).values(**values))
+            if payload.item is not None:
+                db.execute(update(m.ServiceRecordItem).where(m.ServiceRecordItem.record_id == pk).values(code=payload.item))
+        new = self.get(record_id)
+        self._refresh_latest((found.vehicle_id, found.code), (new.vehicle_id, new.item))
         return new
 
     def delete(self, record_id: str) -> bool:
-        prev = len(self._data)
-        self._data = [r for r in self._data if r.id != record_id]
-        return len(self._data) < prev
+        m = self._models
+        pk = self._pk(record_id)
+        if pk is None:
+            return False
+        with self._session.begin() as db:
+            found = db.execute(self._select().where(m.ServiceRecord.id == pk)).first()
+            if not found:
+                return False
+            db.execute(delete(m.ServiceRecordItem).where(m.ServiceRecordItem.record_id == pk))
+            db.execute(delete(m.ServiceRecord).where(m.ServiceRecord.id == pk))
+        self._refresh_latest((found.vehicle_id, found.code))
+        return True
+
+
+def build_repo():
+    if config.RECORDS_BACKEND == "sqlite":
+        from dcars_package.db import SessionLocal
+        return SqlServiceRecords(SessionLocal)
+    return InMemoryServiceRecords()
 
-repo = InMemoryServiceRecords()
+repo = build_repo()
 
-@router.get("", response_model=List[ServiceRecordResponse])
-def list_records(vehicle_id: Optional[str] = Query(None)):
-    return repo.list(vehicle_id)
+@router.get("", response_model=Union[ServiceRecordPage, List[ServiceRecordResponse]])
+def list_records(
+    vehicle_id: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+):
+    if limit is None and cursor is None:
+        return repo.list(vehicle_id)
+    try:
+        after = decode_cursor(cursor, str) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = limit or DEFAULT_PAGE_SIZE
+    rows = repo.page(after, limit + 1, vehicle_id)
+    items = rows[:limit]
+    return ServiceRecordPage(items=items, next_cursor=encode_cursor(items[-1].id) if len(rows) > limit else None)
 
 @router.post("", response_model=ServiceRecordResponse, status_code=201)
 def create_record(payload: ServiceRecordCreate):
@@ -73,4 +347,4 @@ def delete_record(record_id: str):
     ok = repo.delete(record_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Record not found")
-    return
\ No newline at end of file
+    return
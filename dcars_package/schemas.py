@@ -19,4 +19,38 @@ class ServiceRecordResponse(BaseModel):
     vehicle_id: str
     item: str
     at_mileage: int
-    at_time: datetime
\ No newline at end of file
+    at_time: Optional[datetime] = None  # None only for legacy SQL rows without a date
+
+class ServiceRecordPage(BaseModel):
+    items: List[ServiceRecordResponse]
+    next_cursor: Optional[str] = None
+
+class CarPart(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    code: Optional[str] = None
+    name: Optional[str] = None
+    interval_km: Optional[int] = None
+    price: Optional[float] = None
+
+class Car(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: str
+    make: Optional[str] = None
+    model: Optional[str] = None
+    year: Optional[int] = None
+
+class CarWithParts(Car):
+    parts: List[CarPart] = []
+
+class CarCreate(BaseModel):
+    id: str = Field(..., min_length=1)
+    make: Optional[str] = None
+    model: Optional[str] = None
+    year: Optional[int] = None
+
+class CarPartCreate(BaseModel):
+    code: str = Field(..., min_length=1)
+    name: Optional[str] = None
+    interval_km: Optional[int] = Field(None, gt=0)
+    price: Optional[float] = Field(None, ge=0)
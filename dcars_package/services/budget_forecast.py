@@ -0,0 +1,178 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# one forecast month = 30 days, like months_interval and avg_monthly_km elsewhere
+MONTH_DAYS = 30
+GROUP_BY = ("none", "make", "model", "make_model")
+# (vehicle, item) pairs projected per array pass; bounds the (pairs x months) temporaries
+CHUNK_PAIRS = 65_536
+
+# (vehicle_id, code, interval_km, price, make, model)
+ItemRow = Tuple[str, str, Optional[int], Optional[float], Optional[str], Optional[str]]
+
+
+def _group_key(make: Optional[str], model: Optional[str], group_by: str) -> Tuple[Optional[str], ...]:
+    if group_by == "make":
+        return (make,)
+    if group_by == "model":
+        return (model,)
+    if group_by == "make_model":
+        return (make, model)
+    return ()
+
+
+@dataclass
+class BudgetPairs:
+    """One row per priced (vehicle, maintenance item) pair that has a known vehicle state."""
+    mileage: np.ndarray      # (P,)
+    avg_km: np.ndarray       # (P,) km per month, nan when unknown
+    base_km: np.ndarray      # (P,) last service km, 0 when never serviced
+    interval_km: np.ndarray  # (P,)
+    price: np.ndarray        # (P,)
+    group: np.ndarray        # (P,) index into groups
+    groups: List[Tuple[Optional[str], ...]]
+    skipped: int             # item rows without interval/price or without a vehicle in db
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[ItemRow],
+        db: Mapping[str, Dict[str, Any]],
+        group_by: str = "none",
+    ) -> "BudgetPairs":
+        """
+        rows: maintenance_items joined with vehicles. Mileage, avg_monthly_km
+        and last services come from db (MAINTENANCE_DB); the item code is
+        matched to last_services case-insensitively (ENGINE_OIL -> engine_oil).
+        """
+        mileage: List[float] = []
+        avg_km: List[float] = []
+        base_km: List[float] = []
+        interval: List[float] = []
+        price: List[float] = []
+        group: List[int] = []
+        group_index: Dict[Tuple[Optional[str], ...], int] = {}
+        skipped = 0
+
+        for vehicle_id, code, interval_km, item_price, make, model in rows:
+            rec = db.get(vehicle_id)
+            if rec is None or not interval_km or interval_km <= 0 or item_price is None:
+                skipped += 1
+                continue
+            services = rec.get("last_services") or {}
+            last = services.get((code or "").lower()) or {}
+            avg = rec.get("avg_monthly_km")
+            mileage.append(rec["mileage"])
+            avg_km.append(avg if avg is not None and avg > 0 else np.nan)
+            base_km.append(last.get("last_km") or 0)
+            interval.append(interval_km)
+            price.append(item_price)
+            group.append(group_index.setdefault(_group_key(make, model, group_by), len(group_index)))
+
+        return cls(
+            mileage=np.array(mileage, dtype=np.float64),
+            avg_km=np.array(avg_km, dtype=np.float64),
+            base_km=np.array(base_km, dtype=np.float64),
+            interval_km=np.array(interval, dtype=np.float64),
+            price=np.array(price, dtype=np.float64),
+            group=np.array(group, dtype=np.int64),
+            groups=list(group_index),
+            skipped=skipped,
+        )
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+
+def project_costs(pairs: BudgetPairs, months: int) -> np.ndarray:
+    """
+    Expected cost per (group, month), shape (G, months).
+
+    A pair first comes due when mileage reaches base_km + interval_km
+    (immediately if already past it) and again every interval_km after that,
+    driving avg_km per month. Occurrences before month edge m are
+    ceil((m - t0) / period) for m > t0, so per-month counts are the
+    differences between consecutive edges, computed for all pairs and edges
+    in one broadcast. Without a known avg_km only an overdue item costs
+    anything (once, in month 0).
+    """
+    n_groups = len(pairs.groups)
+    out = np.zeros(n_groups * months, dtype=np.float64)
+    if not len(pairs) or months <= 0:
+        return out.reshape(n_groups, months)
+
+    edges = np.arange(1, months + 1, dtype=np.float64)  # month k spans [k, k+1) -> edges 1..months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        remaining = pairs.base_km + pairs.interval_km - pairs.mileage
+        t0 = np.where(remaining <= 0, 0.0, remaining / pairs.avg_km)  # nan: never within reach
+        period = np.where(np.isnan(pairs.avg_km), np.inf, pairs.interval_km / pairs.avg_km)
+
+        for start in range(0, len(pairs), CHUNK_PAIRS):
+            sl = slice(start, start + CHUNK_PAIRS)
+            t, p = t0[sl, None], period[sl, None]
+            seen = np.where(edges > t, np.maximum(np.ceil((edges - t) / p), 1.0), 0.0)  # (chunk, months)
+            per_month = np.diff(seen, axis=1, prepend=0.0)
+            cells = pairs.group[sl, None] * months + np.arange(months)
+            out += np.bincount(
+                cells.ravel(), weights=(per_month * pairs.price[sl, None]).ravel(), minlength=n_groups * months
+            )
+    return out.reshape(n_groups, months)
+
+
+def forecast(
+    rows: Iterable[ItemRow],
+    db: Mapping[str, Dict[str, Any]],
+    months: int = 12,
+    group_by: str = "none",
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Response body of GET /fleet/forecast."""
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+    now = now or datetime.now(timezone.utc)
+    pairs = BudgetPairs.from_rows(rows, db, group_by)
+    costs = project_costs(pairs, months)
+    total = costs.sum(axis=0) if len(pairs.groups) else np.zeros(months)
+
+    key_names = {"make": ("make",), "model": ("model",), "make_model": ("make", "model")}.get(group_by, ())
+    groups = []
+    if key_names:
+        for key, row in sorted(zip(pairs.groups, costs.tolist()), key=lambda kv: -sum(kv[1])):
+            groups.append({
+                **dict(zip(key_names, key)),
+                "total": round(sum(row), 2),
+                "monthly": [round(c, 2) for c in row],
+            })
+
+    return {
+        "generated_at": now.isoformat(),
+        "months": [
+            {"month": i, "from": (now + timedelta(days=i * MONTH_DAYS)).date().isoformat(), "cost": round(c, 2)}
+            for i, c in enumerate(total.tolist())
+        ],
+        "total": round(float(total.sum()), 2),
+        "group_by": group_by,
+        "groups": groups,
+        "pairs": len(pairs),
+        "skipped_items": pairs.skipped,
+    }
+
+
+def maintenance_item_rows(session) -> List[ItemRow]:
+    """maintenance_items joined with their vehicle's make/model, in one query."""
+    # imported here so importing this module never builds the default engine
+    from sqlalchemy import select
+    from dcars_package import models
+
+    stmt = select(
+        models.MaintenanceItem.vehicle_id,
+        models.MaintenanceItem.code,
+        models.MaintenanceItem.interval_km,
+        models.MaintenanceItem.price,
+        models.Vehicle.make,
+        models.Vehicle.model,
+    ).join(models.Vehicle, models.Vehicle.id == models.MaintenanceItem.vehicle_id)
+    return [tuple(r) for r in session.execute(stmt)]
@@ -0,0 +1,208 @@
+import csv
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+try:  # optional, several times faster than json for small objects
+    import orjson
+    _loads = orjson.loads
+    _JSONError = orjson.JSONDecodeError
+except ImportError:  # pragma: no cover
+    _JSONError = ValueError
+
+    def _loads(line: bytes) -> Any:
+        return json.loads(line.decode("utf-8"))
+
+# rows validated and applied together; bounds memory for any upload size
+BATCH_ROWS = 5_000
+# per-row errors returned to the caller; the counts stay exact past this
+MAX_REPORTED_ERRORS = 1_000
+
+Row = Dict[str, Any]
+
+
+def validate_row(raw: Any) -> Tuple[Optional[Row], Optional[str]]:
+    """Same checks as POST /service-records, returning an error string instead of raising."""
+    if not isinstance(raw, dict):
+        return None, "row must be an object"
+    vehicle_id = raw.get("vehicle_id")
+    item = raw.get("item")
+    at_mileage = raw.get("at_mileage")
+    if vehicle_id is None or item is None or at_mileage is None or at_mileage == "":
+        return None, "missing required fields: vehicle_id, item, at_mileage"
+    try:
+        at_mileage = int(at_mileage)
+    except Exception:
+        return None, "at_mileage must be int"
+    if at_mileage < 0:
+        return None, "at_mileage must be >= 0"
+    notes = raw.get("notes")
+    return {
+        "vehicle_id": str(vehicle_id),
+        "item": str(item),
+        "at_mileage": at_mileage,
+        "notes": notes if notes != "" else None,
+    }, None
+
+
+def parse_date(raw: Any, cache: Dict[str, Optional[datetime]]) -> Optional[datetime]:
+    """
+    ISO string / datetime -> datetime, None when unparseable. A fleet sync
+    repeats the same few service dates over and over, so each distinct string
+    is parsed once per batch and then served from cache.
+    """
+    if isinstance(raw, str):
+        try:
+            return cache[raw]
+        except KeyError:
+            pass
+        try:
+            parsed: Optional[datetime] = datetime.fromisoformat(raw)
+        except ValueError:
+            parsed = None
+        cache[raw] = parsed
+        return parsed
+    return raw if isinstance(raw, datetime) else None
+
+
+def last_services_error(services: Dict[str, Dict[str, Any]]) -> Optional[str]:
+    """Why a last_services mapping would break the due math, or None when it is fine."""
+    for item, meta in services.items():
+        last_km = meta.get("last_km")
+        if last_km is not None and (not isinstance(last_km, int) or isinstance(last_km, bool) or last_km < 0):
+            return f"last_services.{item}.last_km must be an int >= 0"
+    return None
+
+
+def validate_vehicle(raw: Any, dates: Dict[str, Optional[datetime]]) -> Tuple[Optional[Row], Optional[str]]:
+    """Same checks and normalization as POST /vehicles/upsert; dates is the batch's parse cache."""
+    if not isinstance(raw, dict):
+        return None, "row must be an object"
+    vehicle_id = raw.get("vehicle_id")
+    mileage = raw.get("mileage")
+    if vehicle_id is None or vehicle_id == "" or mileage is None:
+        return None, "missing required fields: vehicle_id, mileage"
+    try:
+        mileage = int(mileage)
+    except Exception:
+        return None, "mileage must be int"
+    if mileage < 0:
+        return None, "mileage must be >= 0"
+    avg = raw.get("avg_monthly_km")
+    if avg is not None:
+        try:
+            avg = float(avg)
+        except Exception:
+            return None, "avg_monthly_km must be a number"
+    services = raw.get("last_services") or {}
+    if not isinstance(services, dict) or not all(isinstance(m, dict) for m in services.values()):
+        return None, "last_services must map item -> {last_km, last_date}"
+    err = last_services_error(services)
+    if err:
+        return None, err
+    return {
+        "vehicle_id": str(vehicle_id),
+        "mileage": mileage,
+        "avg_monthly_km": avg,
+        "last_services": {
+            item: {"last_km": meta.get("last_km"), "last_date": parse_date(meta.get("last_date"), dates)}
+            for item, meta in services.items()
+        },
+    }, None
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[List[bytes]]:
+    """Complete lines of each received chunk; the partial last line waits for the next one."""
+    tail = b""
+    async for chunk in stream:
+        if not chunk:
+            continue
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        if lines:
+            yield lines
+    if tail:
+        yield [tail]
+
+
+def parse_json(data: bytes) -> Tuple[Optional[Any], Optional[str]]:
+    try:
+        return _loads(data), None
+    except (_JSONError, UnicodeDecodeError):
+        return None, "invalid JSON"
+
+
+async def iter_batches(
+    stream: AsyncIterator[bytes],
+    fmt: str,
+    batch_rows: int = BATCH_ROWS,
+) -> AsyncIterator[List[Tuple[int, Optional[Row], Optional[str]]]]:
+    """
+    Yield lists of (row_number, row, error) from an NDJSON or CSV body.
+    CSV needs a header line; rows are 1-based and don't count the header or blank lines.
+    """
+    header: Optional[List[str]] = None
+    batch: List[Tuple[int, Optional[Row], Optional[str]]] = []
+    row_no = 0
+    async for lines in iter_lines(stream):
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if not line.strip():
+                continue
+            if fmt == "csv":
+                cells = next(csv.reader([line.decode("utf-8", "replace")]))
+                if header is None:
+                    header = [c.strip() for c in cells]
+                    continue
+                raw, err = dict(zip(header, cells)), None
+            else:
+                raw, err = parse_json(line)
+            row_no += 1
+            row = None
+            if err is None:
+                row, err = validate_row(raw)
+            batch.append((row_no, row, err))
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class IngestReport:
+    def __init__(self) -> None:
+        self.accepted = 0
+        self.rejected = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.first_id: Optional[int] = None
+        self.last_id: Optional[int] = None
+
+    def split(self, batch: List[Tuple[int, Optional[Row], Optional[str]]]) -> List[Row]:
+        """Record the batch's errors and return its valid rows."""
+        valid = []
+        for row_no, row, err in batch:
+            if err is None:
+                valid.append(row)
+                continue
+            self.rejected += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({"row": row_no, "error": err})
+        return valid
+
+    def applied(self, ids: List[int]) -> None:
+        if not ids:
+            return
+        self.accepted += len(ids)
+        if self.first_id is None:
+            self.first_id = ids[0]
+        self.last_id = ids[-1]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "first_id": self.first_id,
+            "last_id": self.last_id,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
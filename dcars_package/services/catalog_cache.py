@@ -0,0 +1,49 @@
+import threading
+from typing import Any, Dict, Hashable, Optional
+
+from dcars_package.services.due_cache import CacheKey, DueCache
+
+# first key element of fleet-wide entries (the /cars listing)
+ALL = "*"
+
+
+class CatalogCache:
+    """
+    Serialized catalog responses, keyed (car_id, ...) or (ALL, ...).
+
+    A write to a car drops its entries and every fleet-wide one. Readers note
+    generation() before querying and hand it back to put(), so a result read
+    before a concurrent write is never stored after that write's invalidation.
+    Entries also expire after ttl, which bounds staleness from writes made by
+    other processes.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0):
+        self._entries = DueCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def put(self, key: CacheKey, value: Any, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._entries.put(key, value)
+
+    def invalidate(self, car_id: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.invalidate(car_id)
+            self._entries.invalidate(ALL)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._entries.stats(), "generation": self._generation}
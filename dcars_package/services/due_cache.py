@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+# (vehicle_id, ...) - the first element is what invalidate() matches on
+CacheKey = Tuple[Hashable, ...]
+
+
+class DueCache:
+    """
+    Bounded LRU cache with a TTL for compute_due results.
+    Keys start with the vehicle_id so writes can drop every entry of one vehicle.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._by_vehicle: Dict[Hashable, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _drop(self, key: CacheKey) -> None:
+        del self._data[key]
+        keys = self._by_vehicle.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_vehicle[key[0]]
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                self._drop(key)
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._by_vehicle.setdefault(key[0], set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate(self, vehicle_id: Hashable) -> int:
+        """Drop every cached entry of one vehicle; returns how many were dropped."""
+        with self._lock:
+            keys = self._by_vehicle.pop(vehicle_id, None)
+            if not keys:
+                return 0
+            for key in keys:
+                del self._data[key]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_vehicle.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from dcars_package.services.maintenance_logic import compute_due, compute_item_due, DEFAULT_RULES
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+
+VEHICLE_COLUMNS = ["vehicle_id", "mileage", "avg_monthly_km", "last_services"]
+VEHICLE_DUE_COLUMNS = ["any_due", "overall_urgency", "due_items"]
+RECORD_COLUMNS = ["id", "vehicle_id", "item", "at_mileage", "notes", "created_at"]
+RECORD_DUE_COLUMNS = ["item_due"]
+
+# rows per yielded chunk; keeps memory flat without one write per row
+CHUNK_ROWS = 500
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
+def vehicle_rows(
+    db: Dict[str, Dict[str, Any]],
+    include_due: bool = False,
+    now: Optional[datetime] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    One row per vehicle. Walks a snapshot of the keys only, so vehicles
+    written during the export are read fresh and deleted ones are skipped.
+    """
+    now = now or datetime.now(timezone.utc)
+    for vehicle_id in list(db):
+        rec = db.get(vehicle_id)
+        if rec is None:
+            continue
+        row = {"vehicle_id": vehicle_id, **rec}
+        if include_due:
+            res = compute_due(
+                vehicle_id=vehicle_id,
+                current_km=rec["mileage"],
+                last_services=rec["last_services"],
+                avg_monthly_km=rec["avg_monthly_km"],
+                now=now,
+            )
+            row["any_due"] = res["any_due"]
+            row["overall_urgency"] = res["overall_urgency"]
+            row["due_items"] = [it["item"] for it in res["items"] if it["due"]]
+        yield row
+
+
+def record_rows(
+    records: Iterable[Dict[str, Any]],
+    db: Dict[str, Dict[str, Any]],
+    include_due: bool = False,
+    now: Optional[datetime] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Service records, optionally with whether the record's item is due right now."""
+    now = now or datetime.now(timezone.utc)
+    for rec in records:
+        if not include_due:
+            yield rec
+            continue
+        vehicle = db.get(rec["vehicle_id"])
+        item_due = None
+        if vehicle is not None and rec["item"] in DEFAULT_RULES:
+            meta = vehicle["last_services"].get(rec["item"], {})
+            item_due = compute_item_due(
+                item=rec["item"],
+                current_km=vehicle["mileage"],
+                last_service_km=meta.get("last_km"),
+                last_service_date=meta.get("last_date"),
+                avg_monthly_km=vehicle["avg_monthly_km"],
+                now=now,
+            )["due"]
+        yield {**rec, "item_due": item_due}
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    buf: List[str] = []
+    for row in rows:
+        buf.append(json.dumps(row, default=_json_default))
+        if len(buf) >= CHUNK_ROWS:
+            yield "\n".join(buf) + "\n"
+            buf.clear()
+    if buf:
+        yield "\n".join(buf) + "\n"
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, dict):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, list):
+        return ";".join(map(str, value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    n = 0
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(c)) for c in columns])
+        n += 1
+        if n % CHUNK_ROWS == 0:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    yield out.getvalue()
@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List, Mapping
+
+import numpy as np
+
+from dcars_package.services.maintenance_logic import DEFAULT_RULES, match_tz
+
+# Same weights as compute_item_due
+W_KM, W_TIME = 0.6, 0.4
+
+_DAY_US = 86_400_000_000
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def _to_epoch_us(dt: datetime) -> int:
+    """Microseconds since epoch; naive datetimes are taken as UTC."""
+    return (dt - (_EPOCH if dt.tzinfo is None else _EPOCH_UTC)) // _US
+
+
+@dataclass
+class CompiledRules:
+    """DEFAULT_RULES-style dict flattened into per-item arrays."""
+    rules: Dict[str, Any]
+    items: List[str]
+    km_interval: np.ndarray
+    days_interval: np.ndarray
+    caprice: np.ndarray
+
+    @classmethod
+    def compile(cls, rules: Dict[str, Any] = DEFAULT_RULES) -> "CompiledRules":
+        items = list(rules.keys())
+        return cls(
+            rules=rules,
+            items=items,
+            km_interval=np.array([rules[i]["km_interval"] for i in items], dtype=np.float64),
+            days_interval=np.array([rules[i]["months_interval"] * 30 for i in items], dtype=np.int64),
+            caprice=np.array([rules[i].get("caprice", 0.0) for i in items], dtype=np.float64),
+        )
+
+
+@dataclass
+class FleetColumns:
+    """Column view of MAINTENANCE_DB: one row per vehicle, one column per rule item."""
+    vehicle_ids: List[str]
+    mileage: np.ndarray          # (V,)
+    avg_monthly_km: np.ndarray   # (V,) nan when unknown
+    last_km: np.ndarray          # (V, I)
+    has_km: np.ndarray           # (V, I) bool
+    last_date_us: np.ndarray     # (V, I) epoch microseconds
+    has_date: np.ndarray         # (V, I) bool
+    last_services: List[Dict[str, Dict[str, Any]]]
+
+    @classmethod
+    def from_db(cls, db: Mapping[str, Dict[str, Any]], rules: CompiledRules) -> "FleetColumns":
+        entries = list(db.items())  # one consistent key set even while writers add vehicles
+        n, m = len(entries), len(rules.items)
+        vehicle_ids: List[str] = []
+        mileage: List[Any] = []
+        avg_km = np.full(n, np.nan, dtype=np.float64)
+        last_km: List[Any] = [0] * (n * m)
+        has_km = np.zeros((n, m), dtype=bool)
+        last_date_us = np.zeros((n, m), dtype=np.int64)
+        has_date = np.zeros((n, m), dtype=bool)
+        last_services: List[Dict[str, Dict[str, Any]]] = []
+
+        for row, (vid, rec) in enumerate(entries):
+            vehicle_ids.append(vid)
+            mileage.append(rec["mileage"])
+            if rec.get("avg_monthly_km") is not None:
+                avg_km[row] = rec["avg_monthly_km"]
+            services = rec.get("last_services") or {}
+            last_services.append(services)
+            for col, item in enumerate(rules.items):
+                meta = services.get(item)
+                if not meta:
+                    continue
+                km = meta.get("last_km")
+                if km is not None:
+                    last_km[row * m + col] = km
+                    has_km[row, col] = True
+                date = meta.get("last_date")
+                if date is not None:
+                    last_date_us[row, col] = _to_epoch_us(date)
+                    has_date[row, col] = True
+
+        # int64 unless someone stored fractional km, so results keep the scalar types
+        km_dtype = np.int64 if all(isinstance(v, int) for v in mileage + last_km) else np.float64
+        return cls(
+            vehicle_ids=vehicle_ids,
+            mileage=np.array(mileage, dtype=km_dtype).reshape(n),
+            avg_monthly_km=avg_km,
+            last_km=np.array(last_km, dtype=km_dtype).reshape(n, m),
+            has_km=has_km,
+            last_date_us=last_date_us,
+            has_date=has_date,
+            last_services=last_services,
+        )
+
+
+@dataclass
+class FleetDue:
+    """Result arrays of compute_fleet_due, shape (V, I) unless noted."""
+    columns: FleetColumns
+    rules: CompiledRules
+    now: datetime
+    km_ratio: np.ndarray
+    time_ratio: np.ndarray
+    urgency: np.ndarray
+    due: np.ndarray
+    due_km_at: np.ndarray
+    km_remaining: np.ndarray
+    days_remaining: np.ndarray
+    any_due: np.ndarray           # (V,)
+    overall_urgency: np.ndarray   # (V,)
+
+    def __len__(self) -> int:
+        return len(self.columns.vehicle_ids)
+
+    def vehicle_result(self, row: int) -> Dict[str, Any]:
+        """Materialize one vehicle; equal to compute_due() for the same inputs."""
+        cols, rules, now = self.columns, self.rules, self.now
+        services = cols.last_services[row]
+        current_km = cols.mileage[row].item()
+        km_ratio = self.km_ratio[row].tolist()
+        time_ratio = self.time_ratio[row].tolist()
+        urgency = self.urgency[row].tolist()
+        due = self.due[row].tolist()
+        due_km_at = self.due_km_at[row].tolist()
+        km_remaining = self.km_remaining[row].tolist()
+        days_remaining = self.days_remaining[row].tolist()
+        has_km = cols.has_km[row].tolist()
+        has_date = cols.has_date[row].tolist()
+
+        items = []
+        for col, item in enumerate(rules.items):
+            rule = rules.rules[item]
+            last_date = services.get(item, {}).get("last_date")
+            due_time_at = (match_tz(last_date, now) if last_date else now) + timedelta(days=rule["months_interval"] * 30)
+            items.append({
+                "item": item,
+                "due": due[col],
+                "km_remaining": km_remaining[col] if has_km[col] else None,
+                "days_remaining": days_remaining[col] if has_date[col] else None,
+                "next_due_at": {
+                    "km": max(due_km_at[col], current_km) if has_km[col] else due_km_at[col],
+                    "date": due_time_at.isoformat(),
+                },
+                "urgency_score": urgency[col],
+                "details": {
+                    "km_ratio": km_ratio[col],
+                    "time_ratio": time_ratio[col],
+                    "caprice": rule.get("caprice", 0.0),
+                    "rules": rule,
+                },
+            })
+
+        return {
+            "vehicle_id": cols.vehicle_ids[row],
+            "current_km": current_km,
+            "any_due": bool(self.any_due[row]),
+            "overall_urgency": self.overall_urgency[row].item() if rules.items else 0.0,
+            "items": items,
+            "generated_at": now.isoformat(),
+        }
+
+    def summaries(self, only_due: bool = False) -> List[Dict[str, Any]]:
+        """Compact per-vehicle rows for the fleet endpoint."""
+        rows = np.flatnonzero(self.any_due) if only_due else range(len(self))
+        items = self.rules.items
+        out = []
+        for row in rows:
+            out.append({
+                "vehicle_id": self.columns.vehicle_ids[row],
+                "current_km": self.columns.mileage[row].item(),
+                "any_due": bool(self.any_due[row]),
+                "overall_urgency": self.overall_urgency[row].item() if items else 0.0,
+                "due_items": [items[c] for c in np.flatnonzero(self.due[row])],
+            })
+        return out
+
+
+def compute_fleet_due(
+    columns: FleetColumns,
+    rules: CompiledRules,
+    now: Optional[datetime] = None,
+) -> FleetDue:
+    """
+    Batched compute_due over every vehicle and rule item at once.
+    Same formulas as compute_item_due, evaluated as (V, I) array passes.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_us = _to_epoch_us(now)
+
+    mileage = columns.mileage[:, None]
+    km_since = np.maximum(0, mileage - columns.last_km)
+    km_ratio = np.where(columns.has_km, np.clip(km_since / rules.km_interval, 0.0, 1.0), 0.5)
+
+    days_since = (now_us - columns.last_date_us) // _DAY_US
+    time_ratio = np.where(columns.has_date, np.clip(days_since / rules.days_interval, 0.0, 1.0), 0.5)
+
+    base_score = W_KM * km_ratio + W_TIME * time_ratio
+    urgency = np.clip(base_score + 0.5 * rules.caprice, 0.0, 1.0)
+    due = (km_ratio >= 1.0) | (time_ratio >= 1.0)
+
+    km_interval = rules.km_interval.astype(columns.last_km.dtype)
+    due_km_at = np.where(columns.has_km, columns.last_km, 0) + km_interval
+    km_remaining = due_km_at - mileage
+    days_remaining = (columns.last_date_us + rules.days_interval * _DAY_US - now_us) // _DAY_US
+
+    if rules.items:
+        any_due = due.any(axis=1)
+        overall_urgency = urgency.max(axis=1)
+    else:
+        any_due = np.zeros(len(columns.vehicle_ids), dtype=bool)
+        overall_urgency = np.zeros(len(columns.vehicle_ids), dtype=np.float64)
+
+    return FleetDue(
+        columns=columns,
+        rules=rules,
+        now=now,
+        km_ratio=km_ratio,
+        time_ratio=time_ratio,
+        urgency=urgency,
+        due=due,
+        due_km_at=due_km_at,
+        km_remaining=km_remaining,
+        days_remaining=days_remaining,
+        any_due=any_due,
+        overall_urgency=overall_urgency,
+    )
@@ -0,0 +1,194 @@
+import logging
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+from dcars_package.services.fleet_engine import CompiledRules, FleetColumns, compute_fleet_due
+from dcars_package.services.maintenance_logic import compute_due
+
+logger = logging.getLogger("dcars")
+
+SWEEP_RETRY_SECONDS = 60.0
+URGENCY_BINS = 10  # [0, 0.1), [0.1, 0.2), ... [0.9, 1.0]
+MILEAGE_EDGES = (0, 25_000, 50_000, 75_000, 100_000, 150_000, 200_000, 300_000)  # last bin is open-ended
+
+# (indexes of due items, urgency bin, mileage bin, mileage)
+Contribution = Tuple[Tuple[int, ...], int, int, float]
+
+_STAT_FIELDS = ("due", "urgency_score")
+
+
+def _urgency_bin(urgency: float) -> int:
+    return min(int(urgency * URGENCY_BINS), URGENCY_BINS - 1)
+
+
+def _mileage_bin(km: float) -> int:
+    return max(bisect_right(MILEAGE_EDGES, km) - 1, 0)
+
+
+class FleetStats:
+    """
+    Fleet-wide due counts per item, overall_urgency and mileage histograms.
+
+    Every vehicle's contribution to the counters is remembered, so a write
+    swaps one contribution for another in O(#rules) and snapshot() costs
+    O(#rules + #bins) whatever the fleet size. Urgency also grows with time
+    alone; sweep() recomputes the whole fleet in one vectorized pass and
+    start() runs it once a day.
+    """
+
+    def __init__(self, rules: CompiledRules):
+        self.rules = rules
+        self._contrib: Dict[str, Contribution] = {}
+        self._due = [0] * len(rules.items)
+        self._any_due = 0
+        self._urgency = [0] * URGENCY_BINS
+        self._mileage = [0] * len(MILEAGE_EDGES)
+        self._mileage_sum = 0.0
+        self._lock = threading.Lock()
+        # vehicles written while a sweep computes; the sweep keeps their newer contribution
+        self._touched: Optional[Set[str]] = None
+        self.swept_at: Optional[datetime] = None
+        self.updates = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._contrib)
+
+    def _apply(self, c: Contribution, sign: int) -> None:
+        due, urgency_bin, mileage_bin, km = c
+        for col in due:
+            self._due[col] += sign
+        if due:
+            self._any_due += sign
+        self._urgency[urgency_bin] += sign
+        self._mileage[mileage_bin] += sign
+        self._mileage_sum += sign * km
+
+    def _contribution(self, rec: Dict[str, Any], now: datetime) -> Contribution:
+        result = compute_due(
+            vehicle_id="",
+            current_km=rec["mileage"],
+            last_services=rec.get("last_services") or {},
+            avg_monthly_km=rec.get("avg_monthly_km"),
+            rules=self.rules.rules,
+            now=now,
+            fields=_STAT_FIELDS,
+        )
+        due = tuple(col for col, it in enumerate(result["items"]) if it["due"])
+        return due, _urgency_bin(result["overall_urgency"]), _mileage_bin(rec["mileage"]), rec["mileage"]
+
+    def update(self, vehicle_id: str, rec: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """The vehicle's new state (None: removed)."""
+        new = None if rec is None else self._contribution(rec, now or datetime.now(timezone.utc))
+        with self._lock:
+            old = self._contrib.pop(vehicle_id, None)
+            if old is not None:
+                self._apply(old, -1)
+            if new is not None:
+                self._contrib[vehicle_id] = new
+                self._apply(new, +1)
+            if self._touched is not None:
+                self._touched.add(vehicle_id)
+            self.updates += 1
+
+    def sweep(self, db: Mapping[str, Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """Recompute every vehicle at `now`; also how the counters are first built."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            self._touched = set()
+        try:
+            fleet = compute_fleet_due(FleetColumns.from_db(db, self.rules), self.rules, now)
+            ids = fleet.columns.vehicle_ids
+            mileage = fleet.columns.mileage.astype(np.float64)
+            urgency_bins = np.minimum((fleet.overall_urgency * URGENCY_BINS).astype(np.int64), URGENCY_BINS - 1)
+            mileage_bins = np.maximum(np.searchsorted(MILEAGE_EDGES, mileage, side="right") - 1, 0)
+            due_rows = fleet.due.tolist()
+            contrib: Dict[str, Contribution] = {
+                vid: (tuple(c for c, d in enumerate(due_rows[row]) if d), ub, mb, km)
+                for row, (vid, ub, mb, km) in enumerate(
+                    zip(ids, urgency_bins.tolist(), mileage_bins.tolist(), fleet.columns.mileage.tolist())
+                )
+            }
+            due = fleet.due.sum(axis=0).tolist() if len(ids) else [0] * len(self.rules.items)
+            any_due = int(fleet.any_due.sum())
+            urgency = np.bincount(urgency_bins, minlength=URGENCY_BINS).tolist()
+            mileage_hist = np.bincount(mileage_bins, minlength=len(MILEAGE_EDGES)).tolist()
+            mileage_sum = float(mileage.sum())
+        except BaseException:
+            with self._lock:
+                self._touched = None
+            raise
+
+        with self._lock:
+            old, self._contrib = self._contrib, contrib
+            self._due, self._any_due, self._urgency = due, any_due, urgency
+            self._mileage, self._mileage_sum = mileage_hist, mileage_sum
+            for vid in self._touched:
+                # written after the columns were read: the sweep's view of it may be stale
+                stale = contrib.pop(vid, None)
+                if stale is not None:
+                    self._apply(stale, -1)
+                current = old.get(vid)
+                if current is not None:
+                    contrib[vid] = current
+                    self._apply(current, +1)
+            self._touched = None
+            self.swept_at = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._contrib)
+            due = list(self._due)
+            any_due = self._any_due
+            urgency = list(self._urgency)
+            mileage = list(self._mileage)
+            mileage_sum = self._mileage_sum
+        bounds = [f"{lo}-{hi}" for lo, hi in zip(MILEAGE_EDGES, MILEAGE_EDGES[1:])] + [f"{MILEAGE_EDGES[-1]}+"]
+        return {
+            "vehicle_count": n,
+            "due_vehicles": any_due,
+            "due_by_item": dict(zip(self.rules.items, due)),
+            "urgency_histogram": [
+                {"from": i / URGENCY_BINS, "to": (i + 1) / URGENCY_BINS, "vehicles": c} for i, c in enumerate(urgency)
+            ],
+            "mileage": {
+                "mean": round(mileage_sum / n, 1) if n else None,
+                "histogram": [{"range": b, "vehicles": c} for b, c in zip(bounds, mileage)],
+            },
+            "swept_at": self.swept_at.isoformat() if self.swept_at else None,
+        }
+
+    def start(self, db: Mapping[str, Dict[str, Any]]) -> None:
+        """
+        Background thread sweeping shortly after every UTC midnight. A failed
+        sweep is logged and tried again a minute later; the thread keeps going.
+        """
+        def run() -> None:
+            retry = False
+            while True:
+                now = datetime.now(timezone.utc)
+                midnight = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) + timedelta(days=1, seconds=1)
+                if self._stop.wait(SWEEP_RETRY_SECONDS if retry else (midnight - now).total_seconds()):
+                    return
+                try:
+                    # from_db reads a list(db.items()) copy, so writers may add vehicles meanwhile
+                    self.sweep(db)
+                    retry = False
+                except Exception:
+                    logger.exception("fleet stats sweep failed")
+                    retry = True
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="dcars-fleet-stats", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
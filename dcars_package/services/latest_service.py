@@ -0,0 +1,115 @@
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# (vehicle_id, item)
+ViewKey = Tuple[str, str]
+
+
+_NO_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _aware(at_time: Optional[datetime]) -> datetime:
+    # records may carry naive times (= UTC); keep them comparable with aware ones.
+    # A legacy SQL row may have no time at all: older than any dated record.
+    if at_time is None:
+        return _NO_TIME
+    return at_time if at_time.tzinfo is not None else at_time.replace(tzinfo=timezone.utc)
+
+
+def _order(rec: Any) -> Tuple[datetime, int, str]:
+    # newest service time wins; mileage, then id break ties so the result never depends on arrival order
+    return _aware(rec.at_time), rec.at_mileage, str(rec.id)
+
+
+class LatestServiceView:
+    """
+    Materialized (vehicle_id, item) -> latest service record, kept up to date
+    by the record repository on create / update / delete.
+
+    Records are anything with id, vehicle_id, item, at_mileage and at_time.
+    Every record stays in its (vehicle, item) bucket so a delete of the latest
+    one falls back to the next latest by rescanning that bucket only.
+    """
+
+    def __init__(self) -> None:
+        self._latest: Dict[ViewKey, Any] = {}
+        self._buckets: Dict[ViewKey, Dict[str, Any]] = {}
+        self._items: Dict[str, Dict[str, Any]] = {}  # vehicle_id -> {item: latest}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def latest(self, vehicle_id: str) -> Dict[str, Any]:
+        """{item: latest record} for one vehicle (a copy; empty when it has none)."""
+        with self._lock:
+            return dict(self._items.get(vehicle_id, ()))
+
+    def get(self, vehicle_id: str, item: str) -> Optional[Any]:
+        return self._latest.get((vehicle_id, item))
+
+    def load(self, records: Iterable[Any]) -> None:
+        with self._lock:
+            self._latest.clear()
+            self._buckets.clear()
+            self._items.clear()
+            for rec in records:
+                self._add(rec)
+
+    def add(self, rec: Any) -> None:
+        with self._lock:
+            self._add(rec)
+
+    def remove(self, rec: Any) -> None:
+        with self._lock:
+            self._remove(rec)
+
+    def reset(self, vehicle_id: str, item: str, records: Iterable[Any]) -> None:
+        """
+        Make records the only ones known for (vehicle_id, item). For stores that
+        keep just the newest rows here and look the next latest up themselves.
+        """
+        key = (vehicle_id, item)
+        with self._lock:
+            self._buckets.pop(key, None)
+            self._set(key, None)
+            for rec in records:
+                self._add(rec)
+
+    def replace(self, old: Any, new: Any) -> None:
+        """An update may move the record to another (vehicle, item) bucket."""
+        with self._lock:
+            self._remove(old)
+            self._add(new)
+
+    def _set(self, key: ViewKey, rec: Optional[Any]) -> None:
+        vehicle_id, item = key
+        if rec is None:
+            self._latest.pop(key, None)
+            items = self._items.get(vehicle_id)
+            if items is not None:
+                items.pop(item, None)
+                if not items:
+                    del self._items[vehicle_id]
+        else:
+            self._latest[key] = rec
+            self._items.setdefault(vehicle_id, {})[item] = rec
+
+    def _add(self, rec: Any) -> None:
+        key = (rec.vehicle_id, rec.item)
+        self._buckets.setdefault(key, {})[str(rec.id)] = rec
+        cur = self._latest.get(key)
+        if cur is None or _order(rec) > _order(cur):
+            self._set(key, rec)
+
+    def _remove(self, rec: Any) -> None:
+        key = (rec.vehicle_id, rec.item)
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.pop(str(rec.id), None) is None:
+            return
+        if not bucket:
+            del self._buckets[key]
+            self._set(key, None)
+        elif str(self._latest[key].id) == str(rec.id):
+            self._set(key, max(bucket.values(), key=_order))
@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List
+
+
+class StripedLock:
+    """
+    A fixed pool of re-entrant locks; a key always maps to the same stripe.
+    Writers of one vehicle serialize, writers of different vehicles only meet
+    when their ids hash to the same stripe (1 in `stripes`).
+
+    Counters are per stripe and only touched while that stripe is held.
+    """
+
+    def __init__(self, stripes: int = 64):
+        if stripes < 1:
+            raise ValueError("stripes must be >= 1")
+        self.stripes = stripes
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        self._acquired = [0] * stripes
+        self._contended = [0] * stripes
+        self._wait = [0.0] * stripes
+        self._max_wait = [0.0] * stripes
+
+    def stripe(self, key: Hashable) -> int:
+        return hash(key) % self.stripes
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        i = hash(key) % self.stripes
+        lock = self._locks[i]
+        if lock.acquire(blocking=False):
+            waited = 0.0
+        else:
+            start = time.perf_counter()
+            lock.acquire()
+            waited = time.perf_counter() - start
+        try:
+            self._acquired[i] += 1
+            if waited:
+                self._contended[i] += 1
+                self._wait[i] += waited
+                if waited > self._max_wait[i]:
+                    self._max_wait[i] = waited
+            yield
+        finally:
+            lock.release()
+
+    def stats(self, top: int = 5) -> Dict[str, Any]:
+        acquired = sum(self._acquired)
+        contended = sum(self._contended)
+        hottest: List[Dict[str, Any]] = [
+            {
+                "stripe": i,
+                "acquisitions": self._acquired[i],
+                "contended": self._contended[i],
+                "wait_seconds": round(self._wait[i], 6),
+                "max_wait_seconds": round(self._max_wait[i], 6),
+            }
+            for i in sorted(range(self.stripes), key=lambda i: self._wait[i], reverse=True)[:top]
+            if self._contended[i]
+        ]
+        return {
+            "stripes": self.stripes,
+            "acquisitions": acquired,
+            "contended": contended,
+            "contention_rate": round(contended / acquired, 6) if acquired else 0.0,
+            "wait_seconds": round(sum(self._wait), 6),
+            "max_wait_seconds": round(max(self._max_wait), 6),
+            "hottest": hottest,
+        }
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional
+from typing import Collection, Dict, Any, Optional
+
+from dcars_package.profiling import span
 
 DEFAULT_RULES = {
     "engine_oil": {"km_interval": 15000, "months_interval": 12, "caprice": 0.1},
@@ -14,6 +16,21 @@ DEFAULT_RULES = {
 def clamp(x: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return max(lo, min(hi, x))
 
+
+def match_tz(when: datetime, now: datetime) -> datetime:
+    """when, aware or naive like now; naive datetimes are UTC (as in fleet_engine)."""
+    if (when.tzinfo is None) == (now.tzinfo is None):
+        return when
+    if now.tzinfo is None:
+        return when.astimezone(timezone.utc).replace(tzinfo=None)
+    return when.replace(tzinfo=timezone.utc)
+
+# keys of one compute_item_due result, in output order
+ITEM_FIELDS = ("item", "due", "km_remaining", "days_remaining", "next_due_at", "urgency_score", "details")
+# ?compact=true: what a client needs to show the list
+COMPACT_FIELDS = ("item", "due", "km_remaining", "days_remaining", "urgency_score")
+
+
 def compute_item_due(
     *,
     item: str,
@@ -23,11 +40,20 @@ def compute_item_due(
     avg_monthly_km: Optional[float],
     rules: Dict[str, Any] = DEFAULT_RULES,
     now: Optional[datetime] = None,
+    fields: Optional[Collection[str]] = None,
 ) -> Dict[str, Any]:
+    """
+    Due state of one item. fields limits the result to those keys (see
+    ITEM_FIELDS); keys that aren't asked for are never built.
+    """
     now = now or datetime.now(timezone.utc)
     rule = rules.get(item)
     if not rule:
-        return {"item": item, "due": False, "reason": "no_rule", "urgency_score": 0.0}
+        res = {"item": item, "due": False, "reason": "no_rule", "urgency_score": 0.0}
+        return res if fields is None else {k: v for k, v in res.items() if k in fields or k == "reason"}
+
+    if last_service_date is not None:
+        last_service_date = match_tz(last_service_date, now)
 
     km_interval = rule["km_interval"]
     months_interval = rule["months_interval"]
@@ -57,6 +83,27 @@ def compute_item_due(
 
     due_flag = (km_ratio >= 1.0) or (time_ratio >= 1.0)
 
+    if fields is not None:
+        out: Dict[str, Any] = {}
+        if "item" in fields:
+            out["item"] = item
+        if "due" in fields:
+            out["due"] = bool(due_flag)
+        if "km_remaining" in fields:
+            out["km_remaining"] = km_remaining
+        if "days_remaining" in fields:
+            out["days_remaining"] = days_remaining
+        if "next_due_at" in fields:
+            out["next_due_at"] = {
+                "km": max(due_km_at, current_km) if km_remaining is not None else due_km_at,
+                "date": due_time_at.isoformat(),
+            }
+        if "urgency_score" in fields:
+            out["urgency_score"] = urgency_score
+        if "details" in fields:
+            out["details"] = {"km_ratio": km_ratio, "time_ratio": time_ratio, "caprice": caprice, "rules": rule}
+        return out
+
     next_due_at = {
         "km": max(due_km_at, current_km) if km_remaining is not None else due_km_at,
         "date": due_time_at.isoformat(),
@@ -85,28 +132,37 @@ def compute_due(
     avg_monthly_km: Optional[float] = None,
     rules: Dict[str, Any] = DEFAULT_RULES,
     now: Optional[datetime] = None,
+    fields: Optional[Collection[str]] = None,
 ) -> Dict[str, Any]:
-    now = now or datetime.now(timezone.utc)
-    results = []
-    for item in rules.keys():
-        meta = last_services.get(item, {})
-        res = compute_item_due(
-            item=item,
-            current_km=current_km,
-            last_service_km=meta.get("last_km"),
-            last_service_date=meta.get("last_date"),
-            avg_monthly_km=avg_monthly_km,
-            rules=rules,
-            now=now,
-        )
-        results.append(res)
-    overall_urgency = max((r["urgency_score"] for r in results), default=0.0)
-    any_due = any(r["due"] for r in results)
-    return {
-        "vehicle_id": vehicle_id,
-        "current_km": current_km,
-        "any_due": any_due,
-        "overall_urgency": overall_urgency,
-        "items": results,
-        "generated_at": now.isoformat(),
-    }
+    with span("compute_due"):
+        now = now or datetime.now(timezone.utc)
+        # any_due / overall_urgency need these two whatever the caller selected
+        item_fields = None if fields is None else frozenset(fields) | {"due", "urgency_score"}
+        results = []
+        for item in rules.keys():
+            meta = last_services.get(item, {})
+            res = compute_item_due(
+                item=item,
+                current_km=current_km,
+                last_service_km=meta.get("last_km"),
+                last_service_date=meta.get("last_date"),
+                avg_monthly_km=avg_monthly_km,
+                rules=rules,
+                now=now,
+                fields=item_fields,
+            )
+            results.append(res)
+        overall_urgency = max((r["urgency_score"] for r in results), default=0.0)
+        any_due = any(r["due"] for r in results)
+        if fields is not None:
+            for extra in item_fields.difference(fields):
+                for r in results:
+                    del r[extra]
+        return {
+            "vehicle_id": vehicle_id,
+            "current_km": current_km,
+            "any_due": any_due,
+            "overall_urgency": overall_urgency,
+            "items": results,
+            "generated_at": now.isoformat(),
+        }
@@ -0,0 +1,67 @@
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Generic, Iterable, List, Optional, TypeVar
+
+K = TypeVar("K")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 10_000
+
+
+def encode_cursor(key: Any) -> str:
+    """Opaque cursor for 'everything after key'."""
+    raw = json.dumps([key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_type: type) -> Any:
+    """Inverse of encode_cursor; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        (key,) = json.loads(raw)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if type(key) is not key_type:
+        raise ValueError("invalid cursor")
+    return key
+
+
+class SortedKeys(Generic[K]):
+    """
+    Sorted key list for keyset paging: seeking to a cursor is a bisect,
+    so page k costs O(log n + page_size) rather than O(k * page_size).
+    """
+
+    def __init__(self, keys: Iterable[K] = ()):
+        self._keys: List[K] = sorted(set(keys))
+        self._lock = threading.Lock()  # add/discard are bisect-then-mutate
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: K) -> bool:
+        i = bisect_left(self._keys, key)
+        return i < len(self._keys) and self._keys[i] == key
+
+    def reset(self, keys: Iterable[K]) -> None:
+        keys = sorted(set(keys))
+        with self._lock:
+            self._keys = keys
+
+    def add(self, key: K) -> None:
+        with self._lock:
+            i = bisect_left(self._keys, key)
+            if i == len(self._keys) or self._keys[i] != key:
+                self._keys.insert(i, key)
+
+    def discard(self, key: K) -> None:
+        with self._lock:
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+
+    def after(self, key: Optional[K], limit: int) -> List[K]:
+        i = 0 if key is None else bisect_right(self._keys, key)
+        return self._keys[i:i + limit]
@@ -0,0 +1,391 @@
+"""
+Durable state for the in-memory stores: an append-only write-ahead log plus
+periodic snapshots.
+
+Every log entry is a physical after-image ("vehicle X now looks like this",
+"record R now looks like this", "record N is gone"), so replaying an entry
+that a snapshot already contains is harmless. That lets snapshots be taken
+without stopping writers: rotate the log at seq S, copy the state, label the
+copy S, and on recovery replay everything after S.
+
+Layout of the data directory:
+    snapshot-<seq>.bin   pickled dict, newest one wins; records are grouped by
+                         vehicle so recovery can rebuild the indexes in bulk
+    wal-<first_seq>.log  frames of <len:u32><crc32:u32><seq:u64><pickle>
+                         (a "batch" frame carries several pickled entries,
+                         replayed together)
+"""
+import gc
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dcars_package.services.record_store import ServiceRecordStore
+
+logger = logging.getLogger("dcars")
+
+_HEADER = struct.Struct("<IIQ")
+_SNAPSHOT_FORMAT = 2
+
+Op = Tuple[Any, ...]
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"wal-{first_seq:020d}.log"
+
+
+def _seq_of(path: Path) -> int:
+    return int(path.stem.split("-", 1)[1])
+
+
+def _frames(path: Path) -> Iterator[Tuple[int, int, Op]]:
+    """(end offset, seq, op) of each valid frame; stops at a torn or corrupt tail."""
+    with open(path, "rb") as f:
+        data = f.read()
+    pos, end = 0, len(data)
+    while pos + _HEADER.size <= end:
+        length, crc, seq = _HEADER.unpack_from(data, pos)
+        start = pos + _HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            logger.warning("wal %s: torn frame at byte %s, ignoring the rest", path.name, pos)
+            return
+        pos = start + length
+        yield pos, seq, pickle.loads(payload)
+    if pos < end:
+        logger.warning("wal %s: torn frame at byte %s, ignoring the rest", path.name, pos)
+
+
+def read_segment(path: Path) -> Iterator[Tuple[int, Op]]:
+    """Frames of one segment in order; stops at a torn or corrupt tail."""
+    for _, seq, op in _frames(path):
+        yield seq, op
+
+
+class WriteAheadLog:
+    """
+    Append-only log with group commit: appenders queue frames, one flusher
+    thread writes everything queued and fsyncs once for the whole group.
+    With sync="group" append() returns after its frame is on disk; with
+    sync="async" it returns right away and durability lags by one fsync.
+    """
+
+    def __init__(self, directory: Path, next_seq: int, sync: str = "group"):
+        self.directory = directory
+        self.sync = sync
+        self._cond = threading.Condition()
+        # held while writing/fsyncing or swapping the segment file; taken under _cond
+        self._io = threading.Lock()
+        self._pending: List[bytes] = []
+        self._seq = next_seq - 1
+        self._synced_seq = self._seq
+        self._closed = False
+        self.appends = 0
+        self.fsyncs = 0
+        self._file = open(directory / _segment_name(next_seq), "ab", buffering=0)
+        _fsync_dir(directory)
+        self._flusher = threading.Thread(target=self._run, name="dcars-wal", daemon=True)
+        self._flusher.start()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def append(self, op: Op) -> int:
+        payload = pickle.dumps(op, protocol=pickle.HIGHEST_PROTOCOL)
+        crc = zlib.crc32(payload)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-ahead log is closed")
+            self._seq += 1
+            seq = self._seq
+            self._pending.append(_HEADER.pack(len(payload), crc, seq) + payload)
+            self.appends += 1
+            self._cond.notify_all()
+            if self.sync == "group":
+                while self._synced_seq < seq and not self._closed:
+                    self._cond.wait()
+        return seq
+
+    def _write(self, frames: List[bytes]) -> None:
+        self._file.write(b"".join(frames))
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+                frames, self._pending = self._pending, []
+                last = self._seq
+                # before letting go of _cond, so rotate() cannot swap the file under
+                # these frames or write later ones ahead of them
+                self._io.acquire()
+            # fsync outside _cond: appenders keep queueing the next group meanwhile
+            try:
+                self._write(frames)
+            finally:
+                self._io.release()
+            with self._cond:
+                self._synced_seq = max(self._synced_seq, last)
+                self._cond.notify_all()
+
+    def rotate(self) -> int:
+        """Start a new segment; returns the last seq that went to the old ones."""
+        with self._cond, self._io:
+            # the flusher's group in flight (if any) is on disk once we hold _io
+            if self._pending:
+                self._write(self._pending)
+                self._pending = []
+            self._synced_seq = self._seq
+            self._cond.notify_all()
+            self._file.close()
+            self._file = open(self.directory / _segment_name(self._seq + 1), "ab", buffering=0)
+            _fsync_dir(self.directory)
+            return self._seq
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        self._file.close()
+
+
+class StatePersistence:
+    """Snapshot + WAL for MAINTENANCE_DB and the ServiceRecordStore."""
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        sync: str = "group",
+        snapshot_interval: float = 300.0,
+        snapshot_every_ops: int = 100_000,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sync = sync
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_every_ops = snapshot_every_ops
+        self.wal: Optional[WriteAheadLog] = None
+        self.last_snapshot_seq = 0
+        self.last_snapshot_at = time.monotonic()
+        self.recovery: Dict[str, Any] = {}
+        self._snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._local = threading.local()
+
+    # ---- logging hooks ----
+
+    def log_vehicle(self, vehicle_id: str, rec: Optional[Dict[str, Any]]) -> None:
+        self._log(("vehicle", vehicle_id, rec))
+
+    def log_records(self, recs: List[Dict[str, Any]]) -> None:
+        self._log(("records", recs))
+
+    def log_record_delete(self, rid: int) -> None:
+        self._log(("delete", rid))
+
+    def _log(self, op: Op) -> None:
+        ops = getattr(self._local, "ops", None)
+        if ops is None:
+            self.wal.append(op)
+        else:
+            # pickled now, while the caller still holds the locks guarding op's contents
+            ops.append(pickle.dumps(op, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        This thread's log entries inside the block go to the log as one frame
+        on exit: one fsync for the whole batch, and recovery replays all of it
+        or none of it. Nested blocks join the outermost one.
+        """
+        if getattr(self._local, "ops", None) is not None:
+            yield
+            return
+        self._local.ops = []
+        try:
+            yield
+        finally:
+            ops, self._local.ops = self._local.ops, None
+            # also after an error: memory already holds whatever was applied
+            if ops:
+                self.wal.append(("batch", ops))
+
+    # ---- recovery ----
+
+    def _snapshots(self) -> List[Path]:
+        return sorted(self.directory.glob("snapshot-*.bin"), key=_seq_of)
+
+    def _segments(self) -> List[Path]:
+        return sorted(self.directory.glob("wal-*.log"), key=_seq_of)
+
+    def recover(self, db: Dict[str, Dict[str, Any]], store: ServiceRecordStore) -> Dict[str, Any]:
+        """Load the newest snapshot, replay the log tail, then open a fresh segment."""
+        t0 = time.perf_counter()
+        snap_seq = 0
+        max_id = 0
+        # millions of fresh containers and nothing to collect: the cyclic GC
+        # would only rescan them over and over
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            snapshots = self._snapshots()
+            if snapshots:
+                with open(snapshots[-1], "rb") as f:
+                    snap = pickle.load(f)
+                snap_seq = snap["seq"]
+                db.update(snap["vehicles"])
+                store.load(snap["records"], snap["record_runs"])
+                max_id = snap["max_id"]
+                del snap
+            t1 = time.perf_counter()
+
+            last_seq, replayed = snap_seq, 0
+            for path in self._segments():
+                valid = 0
+                for valid, seq, op in _frames(path):
+                    if seq <= snap_seq:
+                        continue
+                    max_id = max(max_id, self._apply(op, db, store))
+                    last_seq = max(last_seq, seq)
+                    replayed += 1
+                if path.stat().st_size > valid:
+                    # cut the torn tail off: the next segment may be this very file
+                    # (a tear in its first frame), and frames appended after the
+                    # garbage would be unreadable on the restart after this one
+                    os.truncate(path, valid)
+                    with open(path, "rb+") as f:
+                        os.fsync(f.fileno())
+            t2 = time.perf_counter()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        store.reserve_ids(max_id)
+        self.last_snapshot_seq = snap_seq
+        self.wal = WriteAheadLog(self.directory, next_seq=last_seq + 1, sync=self.sync)
+        self.recovery = {
+            "snapshot_seq": snap_seq,
+            "replayed_ops": replayed,
+            "vehicles": len(db),
+            "records": len(store),
+            "snapshot_load_s": round(t1 - t0, 4),
+            "replay_s": round(t2 - t1, 4),
+            "total_s": round(t2 - t0, 4),
+        }
+        logger.info("state recovered: %s", self.recovery)
+        return self.recovery
+
+    @staticmethod
+    def _apply(op: Op, db: Dict[str, Dict[str, Any]], store: ServiceRecordStore) -> int:
+        """Redo one log entry; returns the highest record id it mentions."""
+        kind = op[0]
+        if kind == "vehicle":
+            _, vehicle_id, rec = op
+            if rec is None:
+                db.pop(vehicle_id, None)
+            else:
+                db[vehicle_id] = rec
+            return 0
+        if kind == "records":
+            for rec in op[1]:
+                store.put(rec)
+            return max((rec["id"] for rec in op[1]), default=0)
+        if kind == "delete":
+            store.delete(op[1])
+            return op[1]
+        if kind == "batch":
+            return max((StatePersistence._apply(pickle.loads(sub), db, store) for sub in op[1]), default=0)
+        raise ValueError(f"unknown wal entry {kind!r}")
+
+    # ---- snapshots ----
+
+    def snapshot(self, db: Dict[str, Dict[str, Any]], store: ServiceRecordStore) -> Path:
+        """
+        Fuzzy snapshot labelled with the seq the log was rotated at. Writes that
+        race with the copy are in the new segment too and get replayed over it.
+        """
+        with self._snapshot_lock:
+            seq = self.wal.rotate()
+            final = self.directory / f"snapshot-{seq:020d}.bin"
+            tmp = final.with_suffix(".tmp")
+            for attempt in range(3):
+                try:
+                    recs, runs = store.grouped()
+                    with open(tmp, "wb") as f:
+                        # streamed: no second, serialized copy of the whole state in memory
+                        pickle.dump({
+                            "format": _SNAPSHOT_FORMAT,
+                            "seq": seq,
+                            "vehicles": dict(db),
+                            "records": recs,
+                            "record_runs": runs,
+                            "max_id": store.max_id,
+                        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+                        f.flush()
+                        os.fsync(f.fileno())
+                        size = f.tell()
+                    break
+                except RuntimeError:  # a dict changed size while being copied; take another copy
+                    if attempt == 2:
+                        raise
+            os.replace(tmp, final)
+            _fsync_dir(self.directory)
+
+            # everything up to seq is in the snapshot now
+            for old in self._snapshots():
+                if _seq_of(old) < seq:
+                    old.unlink()
+            for segment in self._segments():
+                if _seq_of(segment) <= seq:
+                    segment.unlink()
+
+            self.last_snapshot_seq = seq
+            self.last_snapshot_at = time.monotonic()
+            logger.info("snapshot written: seq=%s bytes=%s records=%s", seq, size, len(recs))
+            return final
+
+    def start(self, db: Dict[str, Dict[str, Any]], store: ServiceRecordStore) -> None:
+        """Background thread that snapshots on the interval or after enough ops."""
+
+        def run() -> None:
+            while not self._stop.wait(1.0):
+                ops = self.wal.seq - self.last_snapshot_seq
+                due = time.monotonic() - self.last_snapshot_at >= self.snapshot_interval
+                if ops and (due or ops >= self.snapshot_every_ops):
+                    try:
+                        self.snapshot(db, store)
+                    except Exception:
+                        logger.exception("snapshot failed")
+
+        self._thread = threading.Thread(target=run, name="dcars-snapshot", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.wal is not None:
+            self.wal.close()
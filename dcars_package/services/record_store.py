@@ -0,0 +1,178 @@
+import itertools
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+
+from dcars_package.profiling import span
+
+
+class ServiceRecordStore:
+    """
+    Service records keyed by id, with a per-vehicle secondary index.
+    Ids come from a monotonic counter and are never reused after a delete.
+    Writes hold an internal lock for the few index updates they make; reads
+    are single dict lookups and take none.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_vehicle: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._ids = itertools.count(1)
+        # ids in ascending order for keyset paging; deleted ids linger until compaction
+        self._order: List[int] = []
+        self._dead = 0
+        self._max_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._by_id.values())
+
+    @property
+    def max_id(self) -> int:
+        """Highest id ever stored, deleted or not."""
+        return self._max_id
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def reserve_ids(self, max_id: int) -> None:
+        """Make next_id() continue after max_id (used after restoring state)."""
+        with self._lock:
+            self._max_id = max(self._max_id, max_id)
+            self._ids = itertools.count(self._max_id + 1)
+
+    def add(self, rec: Dict[str, Any]) -> Dict[str, Any]:
+        """Index a record that already carries an id from next_id()."""
+        rid = rec["id"]
+        with span("record_store.add"), self._lock:
+            if not self._order or rid > self._order[-1]:
+                self._order.append(rid)
+            else:
+                i = bisect_left(self._order, rid)
+                if i == len(self._order) or self._order[i] != rid:
+                    self._order.insert(i, rid)
+            self._by_id[rid] = rec
+            self._by_vehicle.setdefault(rec["vehicle_id"], {})[rid] = rec
+            if rid > self._max_id:
+                self._max_id = rid
+        return rec
+
+    def put(self, rec: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert or replace a record by id."""
+        with span("record_store.put"), self._lock:
+            old = self._by_id.get(rec["id"])
+            if old is not None and old["vehicle_id"] == rec["vehicle_id"]:
+                self._by_id[rec["id"]] = rec
+                self._by_vehicle[rec["vehicle_id"]][rec["id"]] = rec
+                return rec
+            if old is not None:
+                self.delete(rec["id"])
+            return self.add(rec)
+
+    def add_many(self, recs: List[Dict[str, Any]]) -> None:
+        """Index a batch of fresh records whose ids were taken from next_id() in order."""
+        if not recs:
+            return
+        with span("record_store.add_many"), self._lock:
+            if self._order and recs[0]["id"] < self._order[-1]:
+                # another writer got in between id allocation and now; keep the order sorted
+                for rec in recs:
+                    self.add(rec)
+                return
+            by_vehicle = self._by_vehicle
+            for rec in recs:
+                by_vehicle.setdefault(rec["vehicle_id"], {})[rec["id"]] = rec
+            self._by_id.update((rec["id"], rec) for rec in recs)
+            self._order.extend(rec["id"] for rec in recs)
+            self._max_id = max(self._max_id, recs[-1]["id"])
+
+    def grouped(self) -> Tuple[List[Dict[str, Any]], List[Tuple[str, int]]]:
+        """All records grouped by vehicle, plus the (vehicle_id, count) run of each group."""
+        recs: List[Dict[str, Any]] = []
+        runs: List[Tuple[str, int]] = []
+        for vehicle_id, per_vehicle in list(self._by_vehicle.items()):
+            group = list(per_vehicle.values())
+            recs.extend(group)
+            runs.append((vehicle_id, len(group)))
+        return recs, runs
+
+    def load(self, recs: List[Dict[str, Any]], runs: List[Tuple[str, int]]) -> None:
+        """
+        Bulk-restore an empty store from the output of grouped(). Building each
+        per-vehicle dict from one slice is much cheaper than indexing rows one by one.
+        """
+        ids = [rec["id"] for rec in recs]
+        by_vehicle: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        start = 0
+        for vehicle_id, count in runs:
+            end = start + count
+            group = recs[start:end]
+            # one vehicle_id string per vehicle instead of one per record
+            for rec in group:
+                rec["vehicle_id"] = vehicle_id
+            by_vehicle[vehicle_id] = dict(zip(ids[start:end], group))
+            start = end
+        by_id = dict(zip(ids, recs))
+        ids.sort()
+        with self._lock:
+            self._by_id = by_id
+            self._by_vehicle = by_vehicle
+            self._order = ids
+            self._dead = 0
+            if ids:
+                self._max_id = max(self._max_id, ids[-1])
+
+    def get(self, rid: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(rid)
+
+    def list(self, vehicle_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with span("record_store.list"):
+            if vehicle_id is None:
+                return list(self._by_id.values())
+            return list(self._by_vehicle.get(vehicle_id, {}).values())
+
+    def scan(self, vehicle_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Lazy iteration over a snapshot of ids; records deleted meanwhile are skipped."""
+        source = self._by_id if vehicle_id is None else self._by_vehicle.get(vehicle_id, {})
+        for rid in list(source):
+            rec = self._by_id.get(rid)
+            if rec is not None:
+                yield rec
+
+    def delete(self, rid: int) -> Optional[Dict[str, Any]]:
+        with span("record_store.delete"), self._lock:
+            rec = self._by_id.pop(rid, None)
+            if rec is None:
+                return None
+            per_vehicle = self._by_vehicle[rec["vehicle_id"]]
+            del per_vehicle[rid]
+            if not per_vehicle:
+                del self._by_vehicle[rec["vehicle_id"]]
+            self._dead += 1
+            if self._dead > 1024 and self._dead > len(self._by_id):
+                self._order = [i for i in self._order if i in self._by_id]
+                self._dead = 0
+            return rec
+
+    def page(self, after: Optional[int], limit: int, vehicle_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Up to `limit` records with id > after, in id order."""
+        with span("record_store.page"):
+            if vehicle_id is not None:
+                # per-vehicle sets are small; sorting them is cheaper than another index
+                per_vehicle = self._by_vehicle.get(vehicle_id, {})
+                ids = sorted(per_vehicle)
+                i = 0 if after is None else bisect_right(ids, after)
+                return [per_vehicle[rid] for rid in ids[i:i + limit]]
+
+            order, by_id = self._order, self._by_id
+            i = 0 if after is None else bisect_right(order, after)
+            out: List[Dict[str, Any]] = []
+            while i < len(order) and len(out) < limit:
+                rec = by_id.get(order[i])
+                if rec is not None:
+                    out.append(rec)
+                i += 1
+            return out
@@ -0,0 +1,270 @@
+"""
+One fleet shared by several worker processes through an SQLite (WAL) file.
+
+Each worker keeps serving from its in-memory stores and indexes, which act
+as a read cache of the database:
+
+- Writes run inside transaction(): BEGIN IMMEDIATE takes SQLite's single
+  writer lock across all processes, pulls what other workers committed, then
+  the handler mutates memory as usual and the write hooks copy every changed
+  vehicle/record into the database plus a row in `changes`.
+- Reads call maybe_sync() first. `PRAGMA data_version` only moves when
+  another connection committed, so the common case costs one pragma; when it
+  moved, the worker re-reads just the keys listed in `changes` since the last
+  seq it applied.
+
+`changes` is trimmed to the newest KEEP_CHANGES rows; a worker that fell
+further behind than that reloads everything.
+"""
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("dcars")
+
+KEEP_CHANGES = 100_000
+_IN_CHUNK = 500  # stay below SQLite's bound-parameter limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicles (vehicle_id TEXT PRIMARY KEY, doc BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS service_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vehicle_id TEXT NOT NULL,
+    doc BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,   -- 'vehicle' | 'record'
+    key TEXT NOT NULL
+);
+"""
+
+VehicleHook = Callable[[str, Optional[Dict[str, Any]]], None]
+RecordHook = Callable[[int, Optional[Dict[str, Any]]], None]
+ReloadHook = Callable[[Dict[str, Dict[str, Any]], List[Dict[str, Any]]], None]
+
+
+def _dumps(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class SharedState:
+    """
+    on_vehicle / on_record apply one row another worker changed (None: gone);
+    on_reload replaces the whole in-memory state; reserve_ids moves the local
+    record id counter past every id the database has handed out.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        on_vehicle: VehicleHook,
+        on_record: RecordHook,
+        on_reload: ReloadHook,
+        reserve_ids: Callable[[int], None],
+        busy_timeout: float = 30.0,
+    ):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._on_vehicle = on_vehicle
+        self._on_record = on_record
+        self._on_reload = on_reload
+        self._reserve_ids = reserve_ids
+        # one connection per process, only used under _lock
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._writes = 0
+        self._stale = False
+        self.last_seq = 0
+        self._data_version = -1
+        self.syncs = 0
+        self.reloads = 0
+        self.applied_changes = 0
+        self.commits = 0
+        self.lock_waits = 0
+
+    # ---- reading other workers' changes ----
+
+    def load(self) -> None:
+        """Full reload of vehicles and records into memory."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._load()
+            finally:
+                self._conn.execute("COMMIT")
+
+    def _load(self) -> None:
+        vehicles = {vid: pickle.loads(doc) for vid, doc in self._conn.execute("SELECT vehicle_id, doc FROM vehicles")}
+        records = [pickle.loads(doc) for (doc,) in self._conn.execute("SELECT doc FROM service_records ORDER BY id")]
+        self.last_seq = self._sequence("changes")
+        self._on_reload(vehicles, records)
+        self._reserve_ids(self._sequence("service_records"))
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._stale = False
+        self.reloads += 1
+
+    def _sequence(self, table: str) -> int:
+        row = self._conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    def maybe_sync(self) -> None:
+        """Cheap check before serving a read; skips if a local writer is busy (it syncs anyway)."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version or self._stale:
+                self._conn.execute("BEGIN")
+                try:
+                    self._pull()
+                finally:
+                    self._conn.execute("COMMIT")
+                self._data_version = version
+        finally:
+            self._lock.release()
+
+    def _pull(self) -> None:
+        if self._stale:
+            self._load()
+            return
+        rows = self._conn.execute(
+            "SELECT seq, kind, key FROM changes WHERE seq > ? ORDER BY seq", (self.last_seq,)
+        ).fetchall()
+        if not rows:
+            return
+        if rows[0][0] != self.last_seq + 1:
+            # the rows we missed were trimmed away
+            self._load()
+            return
+        vehicle_ids = {key for _, kind, key in rows if kind == "vehicle"}
+        record_ids = {int(key) for _, kind, key in rows if kind == "record"}
+
+        found_vehicles = dict(self._fetch("SELECT vehicle_id, doc FROM vehicles WHERE vehicle_id IN ({})", list(vehicle_ids)))
+        for vid in vehicle_ids:
+            doc = found_vehicles.get(vid)
+            self._on_vehicle(vid, pickle.loads(doc) if doc is not None else None)
+        found_records = dict(self._fetch("SELECT id, doc FROM service_records WHERE id IN ({})", list(record_ids)))
+        for rid in sorted(record_ids):
+            doc = found_records.get(rid)
+            self._on_record(rid, pickle.loads(doc) if doc is not None else None)
+
+        self._reserve_ids(self._sequence("service_records"))
+        self.last_seq = rows[-1][0]
+        self.applied_changes += len(rows)
+        self.syncs += 1
+
+    def _fetch(self, sql: str, keys: List[Any]) -> Iterator[Tuple[Any, bytes]]:
+        for i in range(0, len(keys), _IN_CHUNK):
+            chunk = keys[i:i + _IN_CHUNK]
+            yield from self._conn.execute(sql.format(",".join("?" * len(chunk))), chunk)
+
+    # ---- writing ----
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Cross-process write section. Re-entrant within a thread; take it
+        before any per-vehicle lock so lock order is always the same.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+
+            self._begin_immediate()
+            self._depth, self._writes = 1, 0
+            try:
+                self._pull()
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                if self._writes:
+                    # memory already holds the rolled-back writes; start over from disk
+                    self._stale = True
+                raise
+            else:
+                self.last_seq = self._sequence("changes")
+                self.commits += 1
+                if self.commits % 1_000 == 0:
+                    self._conn.execute("DELETE FROM changes WHERE seq <= ?", (self.last_seq - KEEP_CHANGES,))
+                self._conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def _begin_immediate(self) -> None:
+        """
+        Take the database write lock. SQLite's own busy handler backs off to
+        100 ms sleeps, far longer than a write here holds the lock, so poll
+        at sub-millisecond intervals instead.
+        """
+        deadline = time.monotonic() + self.busy_timeout
+        delay = 0.0002
+        self._conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            while True:
+                try:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    return
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) or time.monotonic() > deadline:
+                        raise
+                    self.lock_waits += 1
+                time.sleep(delay)
+                delay = min(delay * 2, 0.002)
+        finally:
+            self._conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+
+    def _changed(self, kind: str, keys: List[str]) -> None:
+        if not self._depth:
+            raise RuntimeError("shared state write outside transaction()")
+        self._conn.executemany("INSERT INTO changes (kind, key) VALUES (?, ?)", [(kind, k) for k in keys])
+        self._writes += len(keys)
+
+    def write_vehicle(self, vehicle_id: str, rec: Optional[Dict[str, Any]]) -> None:
+        self._changed("vehicle", [vehicle_id])
+        if rec is None:
+            self._conn.execute("DELETE FROM vehicles WHERE vehicle_id = ?", (vehicle_id,))
+        else:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vehicles (vehicle_id, doc) VALUES (?, ?)", (vehicle_id, _dumps(rec))
+            )
+
+    def write_records(self, recs: List[Dict[str, Any]]) -> None:
+        self._changed("record", [str(r["id"]) for r in recs])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO service_records (id, vehicle_id, doc) VALUES (?, ?, ?)",
+            [(r["id"], r["vehicle_id"], _dumps(r)) for r in recs],
+        )
+
+    def delete_record(self, rid: int) -> None:
+        self._changed("record", [str(rid)])
+        self._conn.execute("DELETE FROM service_records WHERE id = ?", (rid,))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "last_seq": self.last_seq,
+            "syncs": self.syncs,
+            "reloads": self.reloads,
+            "commits": self.commits,
+            "lock_waits": self.lock_waits,
+            "applied_changes": self.applied_changes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("dcars")
+
+
+class Startup:
+    """
+    Phases of one process start (loading state, warming caches) with their
+    durations, plus the warm-up progress behind /ready. Phases may run on a
+    background thread while the app already answers /health.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start over, e.g. when the lifespan runs again in the same process."""
+        with self._lock:
+            self.started = self._clock()
+            self.phases: List[Dict[str, Any]] = []
+            self.current: Optional[str] = None
+            self.done = 0
+            self.total = 0
+            self.ready_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        with self._lock:
+            self.current = name
+            self.done = self.total = 0
+        start = self._clock()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            seconds = self._clock() - start
+            with self._lock:
+                self.phases.append({"phase": name, "seconds": round(seconds, 4), "error": error})
+                self.current = None
+            logger.info("startup phase %s: %.3fs%s", name, seconds, f" ({error})" if error else "")
+
+    def progress(self, done: int, total: int) -> None:
+        """Units of work finished in the current phase (vehicles warmed, ...)."""
+        with self._lock:
+            self.done, self.total = done, total
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self.ready_at = self._clock()
+            seconds = self.ready_at - self.started
+        logger.info("ready after %.3fs", seconds)
+
+    @property
+    def ready(self) -> bool:
+        return self.ready_at is not None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": "ready" if self.ready_at is not None else "starting",
+                "phase": self.current,
+                "progress": {"done": self.done, "total": self.total},
+                "phases": [dict(p) for p in self.phases],
+                "time_to_ready": None if self.ready_at is None else round(self.ready_at - self.started, 4),
+            }
+
+    def render(self) -> str:
+        """Prometheus lines, appended to /metrics."""
+        with self._lock:
+            phases = list(self.phases)
+            ready = None if self.ready_at is None else self.ready_at - self.started
+        out = [
+            "# HELP dcars_startup_phase_seconds Duration of each startup phase of this process.",
+            "# TYPE dcars_startup_phase_seconds gauge",
+        ]
+        out += [f'dcars_startup_phase_seconds{{phase="{p["phase"]}"}} {p["seconds"]!r}' for p in phases]
+        out.append("# HELP dcars_startup_ready_seconds Time from startup until /ready turned 200.")
+        out.append("# TYPE dcars_startup_ready_seconds gauge")
+        if ready is not None:
+            out.append(f"dcars_startup_ready_seconds {round(ready, 4)!r}")
+        return "\n".join(out) + "\n"
@@ -0,0 +1,125 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from dcars_package.services.maintenance_logic import DEFAULT_RULES
+
+# (due_ts, seq, vehicle_id, item, reason)
+Entry = Tuple[float, int, str, str, str]
+
+
+def _ts(dt: datetime) -> float:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def project_due(
+    rec: Dict[str, Any],
+    rules: Dict[str, Any] = DEFAULT_RULES,
+    now: Optional[datetime] = None,
+) -> List[Tuple[str, float, str]]:
+    """
+    Projected due time per rule item as (item, due_ts, reason).
+
+    Mirrors compute_item_due: the time side comes due at last_date + months*30
+    days, the km side when mileage reaches last_km + km_interval, assuming the
+    vehicle keeps driving avg_monthly_km per 30 days from `now` on. Items with
+    neither side known never become due and are left out.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_ts = _ts(now)
+    mileage = rec["mileage"]
+    avg_km = rec.get("avg_monthly_km")
+    services = rec.get("last_services") or {}
+
+    out = []
+    for item, rule in rules.items():
+        meta = services.get(item) or {}
+        candidates = []
+
+        last_date = meta.get("last_date")
+        if last_date is not None:
+            candidates.append((_ts(last_date + timedelta(days=rule["months_interval"] * 30)), "time"))
+
+        last_km = meta.get("last_km")
+        if last_km is not None:
+            remaining = last_km + rule["km_interval"] - mileage
+            if remaining <= 0:
+                candidates.append((now_ts, "km"))
+            elif avg_km and avg_km > 0:
+                candidates.append((now_ts + remaining / avg_km * 30 * 86400, "km"))
+
+        if candidates:
+            due_ts, reason = min(candidates)
+            out.append((item, due_ts, reason))
+    return out
+
+
+class UpcomingIndex:
+    """
+    Min-heap of projected due times per (vehicle, item).
+    Updates push fresh entries and leave the old ones to be skipped lazily;
+    the heap is rebuilt once stale entries outnumber live ones.
+    """
+
+    def __init__(self, rules: Dict[str, Any] = DEFAULT_RULES):
+        self.rules = rules
+        self._heap: List[Entry] = []
+        self._live: Dict[Tuple[str, str], int] = {}  # (vehicle_id, item) -> seq of the live entry
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def update(self, vehicle_id: str, rec: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """Re-project one vehicle; rec=None removes it."""
+        projected = project_due(rec, self.rules, now) if rec else []
+        with self._lock:
+            for item in self.rules:
+                self._live.pop((vehicle_id, item), None)
+            for item, due_ts, reason in projected:
+                seq = next(self._seq)
+                self._live[(vehicle_id, item)] = seq
+                heapq.heappush(self._heap, (due_ts, seq, vehicle_id, item, reason))
+            if len(self._heap) > 2 * len(self._live) + 64:
+                self._compact()
+
+    def rebuild(self, db: Dict[str, Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        with self._lock:
+            self._heap, self._live = [], {}
+            for vehicle_id, rec in db.items():
+                for item, due_ts, reason in project_due(rec, self.rules, now):
+                    seq = next(self._seq)
+                    self._live[(vehicle_id, item)] = seq
+                    self._heap.append((due_ts, seq, vehicle_id, item, reason))
+            heapq.heapify(self._heap)
+
+    def _compact(self) -> None:
+        self._heap = [e for e in self._heap if self._live.get((e[2], e[3])) == e[1]]
+        heapq.heapify(self._heap)
+
+    def upcoming(self, within_days: float, limit: int, now: Optional[datetime] = None) -> List[Entry]:
+        """
+        Live entries due before now + within_days, soonest first (overdue included).
+        Walks the heap array as a tree through a small frontier heap, so the
+        cost is O(k log k) for k visited entries and the index is left intact.
+        """
+        horizon = _ts(now or datetime.now(timezone.utc)) + within_days * 86400
+        out: List[Entry] = []
+        with self._lock:
+            heap, live = self._heap, self._live
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and len(out) < limit:
+                entry, i = heapq.heappop(frontier)
+                if entry[0] > horizon:
+                    break
+                if live.get((entry[2], entry[3])) == entry[1]:
+                    out.append(entry)
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+        return out
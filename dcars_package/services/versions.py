@@ -0,0 +1,54 @@
+import itertools
+import secrets
+import threading
+from datetime import date
+from typing import Dict, Hashable, Optional
+
+
+class VehicleVersions:
+    """
+    A version per vehicle, bumped by every write that can change what the
+    vehicle's read endpoints return. Versions come from one process-wide
+    counter, so they only grow, even across delete + re-create.
+
+    The epoch changes on reset() (state reloaded) and differs per process,
+    so a tag issued by another worker or before a restart never matches by
+    accident; the worst case is a full 200 where a 304 was possible.
+    """
+
+    def __init__(self) -> None:
+        self._versions: Dict[Hashable, int] = {}
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.epoch = secrets.token_hex(4)
+
+    def get(self, vehicle_id: Hashable) -> int:
+        return self._versions.get(vehicle_id, 0)
+
+    def bump(self, vehicle_id: Hashable) -> int:
+        with self._lock:
+            v = self._versions[vehicle_id] = next(self._counter)
+        return v
+
+    def reset(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self.epoch = secrets.token_hex(4)
+
+    def etag(self, vehicle_id: Hashable, day: date) -> str:
+        """Weak tag of version + day: due figures also move with the date alone."""
+        return f'W/"{self.epoch}-{self.get(vehicle_id)}-{day:%Y%m%d}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
@@ -0,0 +1,29 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from dcars_package import db as db_module
+from dcars_package.db import async_url, get_async_db, make_async_engine
+
+
+def test_async_url_swaps_sqlite_driver():
+    assert async_url("sqlite:///./dcars.db") == "sqlite+aiosqlite:///./dcars.db"
+    assert async_url("sqlite://") == "sqlite+aiosqlite://"
+    assert async_url("postgresql+asyncpg://h/db") == "postgresql+asyncpg://h/db"
+
+
+def test_one_session_per_request(tmp_path, monkeypatch):
+    engine = make_async_engine(f"sqlite:///{tmp_path}/a.db", pool_size=2)
+    monkeypatch.setattr(db_module, "_async_sessions", async_sessionmaker(engine, expire_on_commit=False))
+
+    async def journal(db=Depends(get_async_db)):
+        return (await db.execute(text("PRAGMA journal_mode"))).scalar()
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def route(mode: str = Depends(journal), db=Depends(get_async_db), again=Depends(get_async_db)):
+        return {"same": db is again, "mode": mode}
+
+    assert TestClient(app).get("/").json() == {"same": True, "mode": "wal"}
@@ -0,0 +1,41 @@
+from benchmarks import harness
+
+
+def _res(best, calibration):
+    return {"ns_per_op": best, "best_ns_per_op": best, "ops": 1, "repeats": 1, "calibration_ns": calibration}
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = {"a": _res(100, 1000), "b": _res(100, 1000), "gone": _res(1, 1000)}
+    results = {"a": _res(115, 1000), "b": _res(130, 1000), "new": _res(1, 1000)}
+    rows = {r["case"]: r for r in harness.compare(results, baseline, threshold=0.2)}
+    assert set(rows) == {"a", "b"}
+    assert not rows["a"]["regressed"] and rows["b"]["regressed"]
+
+
+def test_compare_normalizes_machine_speed():
+    # everything (reference workload included) 50 % slower: not a regression
+    rows = harness.compare({"a": _res(150, 1500)}, {"a": _res(100, 1000)})
+    assert rows[0]["ratio"] == 1.0 and not rows[0]["regressed"]
+
+
+def test_measure_reports_per_op_time():
+    res = harness.measure(lambda: sum(range(100)), ops=100, repeat=2, min_time=0.001)
+    assert 0 < res["best_ns_per_op"] <= res["ns_per_op"]
+    assert res["calibration_ns"] > 0
+
+
+def test_handler_cases_call_the_current_handlers():
+    from benchmarks import bench_suite
+    from dcars_package import app as app_module
+
+    saved_db, saved_records = dict(app_module.MAINTENANCE_DB), app_module.SERVICE_RECORDS
+    try:
+        db, raw = bench_suite.make_fleet(20)
+        for _, fn, _ in bench_suite.handler_cases(db, raw, bench_suite.make_records(sorted(db))):
+            fn()
+    finally:
+        app_module.MAINTENANCE_DB.clear()
+        app_module.MAINTENANCE_DB.update(saved_db)
+        app_module.SERVICE_RECORDS = saved_records
+        app_module.rebuild_indexes()
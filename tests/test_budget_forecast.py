@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from dcars_package import models
+from dcars_package.app import app, catalogue_db
+from dcars_package.data.seed_data import seed
+from dcars_package.db import make_engine
+from dcars_package.services.budget_forecast import BudgetPairs, forecast, project_costs
+
+client = TestClient(app)
+
+
+def test_projection_counts_each_occurrence():
+    db = {
+        "fast": {"mileage": 14_000, "avg_monthly_km": 5_000, "last_services": {"engine_oil": {"last_km": 0}}},
+        "late": {"mileage": 20_000, "avg_monthly_km": None, "last_services": {}},
+    }
+    rows = [
+        ("fast", "ENGINE_OIL", 15_000, 100.0, "Toyota", "Corolla"),  # due in month 0, then every 3 months
+        ("late", "ENGINE_OIL", 15_000, 50.0, "Mazda", "3"),           # overdue, no usage: once, now
+        ("late", "COOLANT", 60_000, 500.0, "Mazda", "3"),             # not due, no usage: never
+        ("gone", "ENGINE_OIL", 15_000, 80.0, "Honda", "Civic"),       # not in db
+    ]
+    pairs = BudgetPairs.from_rows(rows, db, "make")
+    costs = project_costs(pairs, 7)
+    assert costs.tolist() == [[100, 0, 0, 100, 0, 0, 100], [50, 0, 0, 0, 0, 0, 0]]
+    assert pairs.skipped == 1
+
+    out = forecast(rows, db, months=7, group_by="make")
+    assert out["total"] == 350
+    assert [g["make"] for g in out["groups"]] == ["Toyota", "Mazda"]
+
+
+def test_forecast_endpoint_from_seeded_catalogue(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/catalogue.db", pool_size=1)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        seed(db)
+
+    def override():
+        with Session() as db:
+            yield db
+
+    app.dependency_overrides[catalogue_db] = override
+    try:
+        client.post("/vehicles/upsert", json={"vehicle_id": "ABC123", "mileage": 16_000, "avg_monthly_km": 1_000})
+        r = client.get("/fleet/forecast", params={"months": 6, "group_by": "make_model"})
+    finally:
+        app.dependency_overrides.pop(catalogue_db)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["pairs"] >= 3
+    corolla = next(g for g in body["groups"] if g["model"] == "Corolla")
+    assert corolla["monthly"][0] == 280.0  # oil + filter overdue at 16k; air filter at 20k in month 4
+    assert corolla["monthly"][4] == 100.0
@@ -0,0 +1,106 @@
+import json
+from fastapi.testclient import TestClient
+from dcars_package import app as app_module
+from dcars_package.app import app, MAINTENANCE_DB
+from dcars_package.services.persistence import StatePersistence
+from dcars_package.services.record_store import ServiceRecordStore
+
+client = TestClient(app)
+
+
+def test_bulk_ndjson_with_errors():
+    lines = [
+        {"vehicle_id": "BULK1", "item": "engine_oil", "at_mileage": 10000},
+        {"vehicle_id": "BULK1", "item": "coolant", "at_mileage": 25000, "notes": "ok"},
+        {"vehicle_id": "BULK1", "item": "coolant", "at_mileage": -5},
+        {"vehicle_id": "BULK2", "item": "coolant"},
+    ]
+    body = "\n".join(json.dumps(x) for x in lines) + "\n{not json\n"
+    r = client.post("/service-records/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 200
+    rep = r.json()
+    assert (rep["accepted"], rep["rejected"]) == (2, 3)
+    assert [e["row"] for e in rep["errors"]] == [3, 4, 5]
+    assert rep["last_id"] == rep["first_id"] + 1
+
+    assert MAINTENANCE_DB["BULK1"]["mileage"] == 25000
+    assert "BULK2" not in MAINTENANCE_DB
+    stored = client.get("/service-records", params={"vehicle_id": "BULK1"}).json()
+    assert [x["notes"] for x in stored] == [None, "ok"]
+
+
+def test_bulk_csv():
+    body = "vehicle_id,item,at_mileage,notes\r\nBULK3,oil_filter,500,\r\nBULK3,oil_filter,abc,\r\n"
+    r = client.post("/service-records/bulk", params={"format": "csv"}, content=body)
+    rep = r.json()
+    assert (rep["accepted"], rep["rejected"]) == (1, 1)
+    assert rep["errors"] == [{"row": 2, "error": "at_mileage must be int"}]
+    assert MAINTENANCE_DB["BULK3"]["mileage"] == 500
+
+
+def test_bulk_vehicle_upsert():
+    body = [
+        {"vehicle_id": "BV1", "mileage": 30000, "last_services": {"engine_oil": {"last_km": 20000, "last_date": "2024-01-05"}}},
+        {"vehicle_id": "BV2", "mileage": "1200", "avg_monthly_km": 900},
+        {"vehicle_id": "BV3", "mileage": -1},
+        {"mileage": 5},
+        {"vehicle_id": "BV1", "mileage": 31000},
+    ]
+    r = client.post("/vehicles/upsert/bulk", json=body)
+    assert r.status_code == 200
+    rep = r.json()
+    assert (rep["accepted"], rep["rejected"], rep["vehicles"]) == (3, 2, 2)
+    assert [e["index"] for e in rep["errors"]] == [2, 3]
+
+    assert MAINTENANCE_DB["BV1"]["mileage"] == 31000
+    assert MAINTENANCE_DB["BV1"]["last_services"]["engine_oil"]["last_date"].isoformat() == "2024-01-05T00:00:00"
+    assert MAINTENANCE_DB["BV2"]["avg_monthly_km"] == 900.0
+    assert "BV3" not in MAINTENANCE_DB
+
+    assert client.post("/vehicles/upsert/bulk", content="[{").status_code == 400
+    assert client.post("/vehicles/upsert/bulk", json={"vehicles": {}}).status_code == 422
+
+
+def test_bulk_vehicle_upsert_skips_bad_last_km():
+    body = [
+        {"vehicle_id": "BK1", "mileage": 1000, "last_services": {"engine_oil": {"last_km": 500}}},
+        {"vehicle_id": "BK2", "mileage": 1000, "last_services": {"engine_oil": {"last_km": "abc"}}},
+        {"vehicle_id": "BK3", "mileage": 1000, "last_services": {"coolant": {"last_km": -1}}},
+        {"vehicle_id": "BK4", "mileage": 1000, "last_services": {"coolant": {"last_km": None, "last_date": "2024-01-01"}}},
+    ]
+    r = client.post("/vehicles/upsert/bulk", json=body)
+    assert r.status_code == 200
+    rep = r.json()
+    assert (rep["accepted"], rep["rejected"]) == (2, 2)
+    assert rep["errors"][0]["error"] == "last_services.engine_oil.last_km must be an int >= 0"
+    assert [e["index"] for e in rep["errors"]] == [1, 2]
+    assert "BK1" in MAINTENANCE_DB and "BK4" in MAINTENANCE_DB
+    assert "BK2" not in MAINTENANCE_DB and "BK3" not in MAINTENANCE_DB
+
+
+def test_bulk_batch_is_one_wal_append(tmp_path, monkeypatch):
+    persistence = StatePersistence(str(tmp_path))
+    persistence.recover({}, ServiceRecordStore())
+    monkeypatch.setattr(app_module, "PERSISTENCE", persistence)
+    lines = [{"vehicle_id": f"BULKW{i % 5}", "item": "coolant", "at_mileage": 1000 + i} for i in range(20)]
+    body = "\n".join(json.dumps(x) for x in lines) + "\n"
+    r = client.post("/service-records/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.json()["accepted"] == 20
+    # records plus five vehicle mileages, one frame and one fsync
+    assert persistence.wal.appends == 1 and persistence.wal.fsyncs == 1
+    persistence.close()
+
+
+def test_bulk_vehicle_upsert_is_one_wal_append(tmp_path, monkeypatch):
+    persistence = StatePersistence(str(tmp_path))
+    persistence.recover({}, ServiceRecordStore())
+    monkeypatch.setattr(app_module, "PERSISTENCE", persistence)
+    rows = [{"vehicle_id": f"BULKV{i}", "mileage": 1000 * i} for i in range(10)]
+    assert client.post("/vehicles/upsert/bulk", json=rows).status_code == 200
+    assert persistence.wal.appends == 1 and persistence.wal.fsyncs == 1
+    persistence.close()
+
+    db, reopened = {}, StatePersistence(str(tmp_path))
+    reopened.recover(db, ServiceRecordStore())
+    reopened.close()
+    assert {vid: rec["mileage"] for vid, rec in db.items()} == {r["vehicle_id"]: r["mileage"] for r in rows}
@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from dcars_package import models
+from dcars_package.app import app
+from dcars_package.data.seed_data import seed
+from dcars_package.db import make_async_engine, make_engine
+from dcars_package.routes import cars
+
+client = TestClient(app)
+
+
+def _catalogue(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/cars.db", pool_size=1)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        seed(db)
+    async_engine = make_async_engine(f"sqlite:///{tmp_path}/cars.db", pool_size=1)
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    async def override():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[cars.async_catalogue_db] = override
+    cars.CATALOG_CACHE.clear()
+    return statements
+
+
+def test_cars_eager_loaded_and_cached(tmp_path):
+    statements = _catalogue(tmp_path)
+    try:
+        body = client.get("/cars", params={"include_parts": "true"}).json()
+        assert [c["id"] for c in body] == ["ABC123", "LMN456", "XYZ987"]
+        assert all(len(c["parts"]) == 3 for c in body)
+        assert sum(s.lstrip().upper().startswith("SELECT") for s in statements) == 2  # vehicles + one IN query
+
+        statements.clear()
+        assert client.get("/cars", params={"include_parts": "true"}).json() == body
+        assert client.get("/cars").json()[0] == {"id": "ABC123", "make": "Toyota", "model": "Corolla", "year": 2018}
+        client.get("/cars")
+        assert sum(s.lstrip().upper().startswith("SELECT") for s in statements) == 1  # only the first plain listing
+    finally:
+        app.dependency_overrides.pop(cars.async_catalogue_db)
+
+
+def test_car_part_writes_invalidate(tmp_path):
+    _catalogue(tmp_path)
+    try:
+        assert len(client.get("/cars/ABC123/parts").json()) == 3
+        assert client.get("/cars/NOPE/parts").status_code == 404
+
+        r = client.post("/cars/ABC123/parts", json={"code": "COOLANT", "interval_km": 60000, "price": 300})
+        assert r.status_code == 201
+        parts = client.get("/cars/ABC123/parts").json()
+        assert [p["code"] for p in parts][-1] == "COOLANT"
+        listed = client.get("/cars", params={"include_parts": "true"}).json()
+        assert len(listed[0]["parts"]) == 4
+
+        assert client.delete(f"/cars/ABC123/parts/{r.json()['id']}").status_code == 204
+        assert len(client.get("/cars/ABC123/parts").json()) == 3
+
+        assert client.post("/cars", json={"id": "NEW1", "make": "Kia"}).status_code == 201
+        assert "NEW1" in {c["id"] for c in client.get("/cars").json()}
+    finally:
+        app.dependency_overrides.pop(cars.async_catalogue_db)
+
+
+def test_cached_routes_document_their_schema():
+    paths = client.get("/openapi.json").json()["paths"]
+    for path, model in (("/cars", "CarWithParts"), ("/cars/{car_id}/parts", "CarPart")):
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema["items"]["$ref"] == f"#/components/schemas/{model}"
@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from dcars_package.app import app
+from dcars_package.services.maintenance_logic import COMPACT_FIELDS, compute_due
+
+client = TestClient(app)
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+LAST = {"engine_oil": {"last_km": 10_000, "last_date": datetime(2024, 1, 1, tzinfo=timezone.utc)}}
+
+
+def test_fields_match_full_result():
+    full = compute_due(vehicle_id="v", current_km=30_000, last_services=LAST, avg_monthly_km=None, now=NOW)
+    part = compute_due(
+        vehicle_id="v", current_km=30_000, last_services=LAST, avg_monthly_km=None, now=NOW, fields=("item", "due")
+    )
+    assert part["any_due"] == full["any_due"]
+    assert part["overall_urgency"] == full["overall_urgency"]
+    assert part["items"] == [{"item": it["item"], "due": it["due"]} for it in full["items"]]
+
+
+def test_full_endpoint_compact_and_fields():
+    client.post("/vehicles/upsert", json={"vehicle_id": "cf-1", "mileage": 50_000})
+    compact = client.get("/maintenance/full", params={"vehicle_id": "cf-1", "compact": "true"}).json()
+    assert all(set(it) == set(COMPACT_FIELDS) for it in compact["items"])
+
+    r = client.get("/maintenance/full", params={"vehicle_id": "cf-1", "fields": "item,urgency_score"})
+    assert r.status_code == 200
+    assert all(set(it) == {"item", "urgency_score"} for it in r.json()["items"])
+
+    full = client.get("/maintenance/full", params={"vehicle_id": "cf-1"}).json()
+    assert "details" in full["items"][0]
+
+
+def test_unknown_field_rejected():
+    r = client.get("/maintenance/full", params={"vehicle_id": "cf-1", "fields": "item,bogus"})
+    assert r.status_code == 400
@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+from dcars_package import app as app_module
+from dcars_package.app import app, DUE_CACHE
+from dcars_package.services.due_cache import DueCache
+
+client = TestClient(app)
+
+
+def test_lru_ttl_and_invalidate():
+    now = [0.0]
+    cache = DueCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put(("a", None, 1), "A")
+    cache.put(("b", None, 1), "B")
+    assert cache.get(("a", None, 1)) == "A"
+    cache.put(("c", None, 1), "C")  # "b" is least recently used
+    assert cache.get(("b", None, 1)) is None
+    assert cache.evictions == 1
+
+    now[0] = 11
+    assert cache.get(("a", None, 1)) is None  # expired
+    assert cache.evictions == 2
+
+    cache.put(("c", 5000, 1), "C2")
+    assert cache.invalidate("c") == 2
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_writes_evict_cached_due():
+    client.post("/vehicles/upsert", json={"vehicle_id": "CACHE1", "mileage": 1000})
+    before = DUE_CACHE.stats()
+    first = client.get("/maintenance/full", params={"vehicle_id": "CACHE1"}).json()
+    second = client.get("/maintenance/full", params={"vehicle_id": "CACHE1"}).json()
+    assert first == second
+    stats = DUE_CACHE.stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+    client.post("/service-records", json={"vehicle_id": "CACHE1", "item": "coolant", "at_mileage": 9000})
+    after = client.get("/maintenance/full", params={"vehicle_id": "CACHE1"}).json()
+    assert after["current_km"] == 9000
+
+    r = client.get("/maintenance/cache/stats")
+    assert r.status_code == 200
+    assert r.json()["invalidations"] >= 1
+
+
+def test_result_of_a_compute_raced_by_a_write_is_not_kept(monkeypatch):
+    client.post("/vehicles/upsert", json={"vehicle_id": "RACE1", "mileage": 10_000})
+    DUE_CACHE.invalidate("RACE1")
+    real = app_module.compute_due
+
+    def write_during_compute(*args, **kwargs):
+        result = real(*args, **kwargs)
+        monkeypatch.setattr(app_module, "compute_due", real)
+        client.post("/vehicles/upsert", json={"vehicle_id": "RACE1", "mileage": 99_000})
+        return result
+
+    monkeypatch.setattr(app_module, "compute_due", write_during_compute)
+    assert client.get("/maintenance/full", params={"vehicle_id": "RACE1"}).json()["current_km"] == 10_000
+    assert client.get("/maintenance/full", params={"vehicle_id": "RACE1"}).json()["current_km"] == 99_000
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+from dcars_package.app import app
+from dcars_package.services.versions import etag_matches
+
+client = TestClient(app)
+
+
+def _poll(path, params, etag):
+    return client.get(path, params=params, headers={"If-None-Match": etag})
+
+
+def test_etag_304_until_vehicle_changes():
+    client.post("/vehicles/upsert", json={"vehicle_id": "ET-1", "mileage": 1000})
+    rid = client.post("/service-records", json={"vehicle_id": "ET-1", "item": "coolant", "at_mileage": 900}).json()["id"]
+
+    reads = [
+        ("/vehicles", {"vehicle_id": "ET-1"}),
+        ("/maintenance/full", {"vehicle_id": "ET-1"}),
+        ("/service-records", {"vehicle_id": "ET-1"}),
+    ]
+    tags = []
+    for path, params in reads:
+        r = client.get(path, params=params)
+        assert r.status_code == 200
+        tags.append(r.headers["etag"])
+        again = _poll(path, params, r.headers["etag"])
+        assert again.status_code == 304 and again.content == b""
+
+    client.put(f"/service-records/{rid}", json={"notes": "changed"})
+    for (path, params), tag in zip(reads, tags):
+        r = _poll(path, params, tag)
+        assert r.status_code == 200
+        assert r.headers["etag"] != tag
+
+    # another vehicle's write leaves ET-1's tag alone
+    tag = client.get("/maintenance/full", params={"vehicle_id": "ET-1"}).headers["etag"]
+    client.post("/vehicles/upsert", json={"vehicle_id": "ET-2", "mileage": 5})
+    assert _poll("/maintenance/full", {"vehicle_id": "ET-1"}, tag).status_code == 304
+
+
+def test_etag_matching():
+    assert etag_matches('"a", W/"x-1-20250101"', 'W/"x-1-20250101"')
+    assert etag_matches('"x-1-20250101"', 'W/"x-1-20250101"')
+    assert etag_matches("*", 'W/"x"')
+    assert not etag_matches(None, 'W/"x"')
+    assert not etag_matches('W/"x-2-20250101"', 'W/"x-1-20250101"')
@@ -0,0 +1,36 @@
+import csv
+import io
+import json
+from fastapi.testclient import TestClient
+from dcars_package.app import app
+
+client = TestClient(app)
+
+
+def test_vehicles_ndjson_with_due():
+    client.post("/vehicles/upsert", json={
+        "vehicle_id": "EXP1", "mileage": 40000,
+        "last_services": {"engine_oil": {"last_km": 10000, "last_date": "2024-01-01T00:00:00+00:00"}},
+    })
+    r = client.get("/vehicles", params={"vehicle_id": "EXP1", "include_due": True},
+                   headers={"Accept": "application/x-ndjson"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["last_services"]["engine_oil"]["last_date"] == "2024-01-01T00:00:00+00:00"
+    assert "engine_oil" in rows[0]["due_items"]
+
+
+def test_service_records_csv():
+    for km in (1000, 2000):
+        client.post("/service-records", json={"vehicle_id": "EXP2", "item": "coolant", "at_mileage": km})
+    r = client.get("/service-records", params={"vehicle_id": "EXP2", "format": "csv", "include_due": True})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row["at_mileage"] for row in rows] == ["1000", "2000"]
+    assert rows[0]["item_due"] == "False"
+
+    # default stays a JSON list
+    assert isinstance(client.get("/service-records", params={"vehicle_id": "EXP2"}).json(), list)
@@ -0,0 +1,66 @@
+import random
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from dcars_package.app import app, MAINTENANCE_DB
+from dcars_package.services.maintenance_logic import compute_due, DEFAULT_RULES
+from dcars_package.services.fleet_engine import CompiledRules, FleetColumns, compute_fleet_due
+
+client = TestClient(app)
+
+
+def _random_fleet(n, seed=7):
+    rnd = random.Random(seed)
+    now = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    db = {}
+    for i in range(n):
+        last_services = {}
+        for item in DEFAULT_RULES:
+            roll = rnd.random()
+            if roll < 0.2:
+                continue
+            last_km = rnd.randint(0, 150000) if roll > 0.3 else None
+            last_date = now - timedelta(days=rnd.randint(-10, 2000), seconds=rnd.randint(0, 86399)) if roll < 0.9 else None
+            if last_date is not None and roll < 0.6:
+                last_date = last_date.replace(tzinfo=None)  # naive, as parsed from "2024-01-05"
+            last_services[item] = {"last_km": last_km, "last_date": last_date}
+        db[f"V{i}"] = {
+            "mileage": rnd.randint(0, 200000),
+            "avg_monthly_km": rnd.choice([None, 1200.0]),
+            "last_services": last_services,
+        }
+    return db, now
+
+
+def test_fleet_matches_scalar_compute_due():
+    db, now = _random_fleet(300)
+    rules = CompiledRules.compile(DEFAULT_RULES)
+    fleet = compute_fleet_due(FleetColumns.from_db(db, rules), rules, now=now)
+
+    for row, (vid, rec) in enumerate(db.items()):
+        expected = compute_due(
+            vehicle_id=vid,
+            current_km=rec["mileage"],
+            last_services=rec["last_services"],
+            avg_monthly_km=rec["avg_monthly_km"],
+            now=now,
+        )
+        assert fleet.vehicle_result(row) == expected
+
+
+def test_fleet_endpoint_only_due():
+    MAINTENANCE_DB["FLEET1"] = {"mileage": 50000, "avg_monthly_km": None,
+                                "last_services": {"engine_oil": {"last_km": 10000, "last_date": None}}}
+    MAINTENANCE_DB["FLEET2"] = {"mileage": 1000, "avg_monthly_km": None,
+                                "last_services": {"engine_oil": {"last_km": 0, "last_date": None}}}
+
+    r = client.get("/maintenance/due/fleet", params={"only_due": True})
+    assert r.status_code == 200
+    data = r.json()
+    rows = {v["vehicle_id"]: v for v in data["vehicles"]}
+    assert "engine_oil" in rows["FLEET1"]["due_items"]
+    assert "FLEET2" not in rows
+
+    r = client.get("/maintenance/due/fleet", params={"full": True})
+    full = {v["vehicle_id"]: v for v in r.json()["vehicles"]}
+    assert full["FLEET2"]["any_due"] is False
+    assert len(full["FLEET2"]["items"]) == len(DEFAULT_RULES)
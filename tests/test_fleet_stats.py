@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+from dcars_package.app import app
+from dcars_package.services.fleet_engine import CompiledRules
+from dcars_package.services.fleet_stats import FleetStats
+
+client = TestClient(app)
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+RULES = CompiledRules.compile()
+
+
+def _fleet():
+    return {
+        f"S{i}": {
+            "mileage": 10_000 * i,
+            "avg_monthly_km": None,
+            "last_services": {"engine_oil": {"last_km": 0, "last_date": datetime(2024 - i % 3, 1, 1)}},
+        }
+        for i in range(40)
+    }
+
+
+def test_incremental_matches_sweep():
+    db = _fleet()
+    incremental = FleetStats(RULES)
+    for vid, rec in db.items():
+        incremental.update(vid, rec, now=NOW)
+    incremental.update("S3", {**db["S3"], "mileage": 400_000}, now=NOW)
+    incremental.update("S4", None, now=NOW)
+
+    db["S3"] = {**db["S3"], "mileage": 400_000}
+    del db["S4"]
+    swept = FleetStats(RULES)
+    swept.sweep(db, now=NOW)
+
+    a, b = incremental.snapshot(), swept.snapshot()
+    a.pop("swept_at"), b.pop("swept_at")
+    assert a == b
+    assert a["vehicle_count"] == 39
+    assert sum(h["vehicles"] for h in a["mileage"]["histogram"]) == 39
+    assert a["mileage"]["histogram"][-1]["vehicles"] == 11  # S30..S39 and S3 at 400k
+
+
+def test_fleet_stats_endpoint_follows_writes():
+    before = client.get("/fleet/stats").json()
+    client.post("/vehicles/upsert", json={"vehicle_id": "FS-1", "mileage": 500_000})
+    after = client.get("/fleet/stats").json()
+    assert after["vehicle_count"] == before["vehicle_count"] + 1
+    assert after["mileage"]["histogram"][-1]["vehicles"] == before["mileage"]["histogram"][-1]["vehicles"] + 1
+    assert sum(h["vehicles"] for h in after["urgency_histogram"]) == after["vehicle_count"]
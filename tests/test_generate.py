@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, inspect, select
+from sqlalchemy.exc import IntegrityError
+
+from dcars_package import models
+from dcars_package.data import fake_data, generate as generate_module
+from dcars_package.data.generate import generate, fill_memory, main, next_vehicle_number, write_sql
+from dcars_package.db import make_engine
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def test_generate_is_deterministic_and_plausible():
+    a, b = generate(500, 1500, seed=3, now=NOW), generate(500, 1500, seed=3, now=NOW)
+    assert a.vehicle_ids == b.vehicle_ids and (a.record_km == b.record_km).all()
+    assert (a.mileage > 0).all() and (a.avg_monthly_km >= 200).all()
+    assert (a.record_km <= a.mileage[a.record_vehicle]).all()
+    assert (a.record_time_us <= NOW.timestamp() * 1e6).all()
+
+
+def test_write_sql_and_fill_memory(tmp_path):
+    fleet = generate(200, 600, seed=1, now=NOW)
+    engine = make_engine(f"sqlite:///{tmp_path}/gen.db", pool_size=1)
+    counts = write_sql(engine, fleet)
+    assert counts == {"vehicles": 200, "maintenance_items": 200 * 7, "service_records": 600, "service_record_items": 600}
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(models.ServiceRecordItem)).scalar() == 600
+    assert sum(counts.values()) == fleet.rows
+
+    db = {}
+    fill_memory(db, fleet)
+    assert len(db) == 200
+    v = fleet.record_vehicle[0]
+    item = fleet.items[fleet.record_item[0]]
+    latest = db[fleet.vehicle_ids[v]]["last_services"][item]
+    same = (fleet.record_vehicle == v) & (fleet.record_item == fleet.record_item[0])
+    assert latest["last_date"].timestamp() * 1e6 == fleet.record_time_us[same].max()
+
+
+def test_repeated_loads_add_vehicles(tmp_path):
+    url = f"sqlite:///{tmp_path}/gen.db"
+    assert main(["--vehicles", "30", "--records", "10", "--database-url", url]) == 0
+    assert main(["--vehicles", "20", "--records", "10", "--database-url", url]) == 0
+    engine = make_engine(url, pool_size=1)
+    with engine.connect() as conn:
+        ids = conn.execute(select(models.Vehicle.id).order_by(models.Vehicle.id)).scalars().all()
+    assert ids == [f"SYN{i:08d}" for i in range(50)]
+    assert next_vehicle_number(engine) == 50
+
+
+def test_failed_load_keeps_the_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_module, "CHUNK_ROWS", 10)  # big enough to drop indexes
+    engine = make_engine(f"sqlite:///{tmp_path}/gen.db", pool_size=1)
+    fleet = generate(20, 20, seed=1, now=NOW)
+    write_sql(engine, fleet)
+    with pytest.raises(IntegrityError):
+        write_sql(engine, fleet)  # same vehicle ids again
+    names = {ix["name"] for ix in inspect(engine).get_indexes(models.Vehicle.__tablename__)}
+    assert names == {ix.name for ix in models.Vehicle.__table__.indexes}
+
+
+def test_fake_data_imports():
+    assert [c.id for c in fake_data.FAKE_CATALOG] == ["FAKE1", "FAKE2"]
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from dcars_package.routes import maintenance, service_records
+from dcars_package.routes.service_records import InMemoryServiceRecords
+from dcars_package.schemas import ServiceRecordCreate, ServiceRecordUpdate
+
+
+def _at(month):
+    return datetime(2024, month, 1, tzinfo=timezone.utc)
+
+
+def test_view_follows_create_update_delete():
+    repo = InMemoryServiceRecords()
+    old = repo.create(ServiceRecordCreate(vehicle_id="v1", item="engine_oil", at_mileage=1000, at_time=_at(1)))
+    new = repo.create(ServiceRecordCreate(vehicle_id="v1", item="engine_oil", at_mileage=9000, at_time=_at(6)))
+    repo.create(ServiceRecordCreate(vehicle_id="v2", item="engine_oil", at_mileage=5, at_time=_at(9)))
+    assert repo.latest.get("v1", "engine_oil").id == new.id
+
+    repo.update(old.id, ServiceRecordUpdate(at_time=_at(8)))
+    assert repo.latest.get("v1", "engine_oil").id == old.id
+
+    repo.update(old.id, ServiceRecordUpdate(item="coolant"))
+    assert set(repo.latest.latest("v1")) == {"engine_oil", "coolant"}
+    assert repo.latest.get("v1", "engine_oil").id == new.id
+
+    repo.delete(new.id)
+    assert repo.latest.get("v1", "engine_oil") is None
+    assert set(repo.latest.latest("v1")) == {"coolant"}
+
+
+def test_router_uses_real_records(monkeypatch):
+    monkeypatch.setattr(service_records, "repo", InMemoryServiceRecords())
+    app = FastAPI()
+    app.include_router(service_records.router, prefix="/records")
+    app.include_router(maintenance.router, prefix="/m")
+    client = TestClient(app)
+
+    now = datetime.now(timezone.utc).isoformat()
+    client.post("/records", json={"vehicle_id": "v1", "item": "engine_oil", "at_mileage": 40000, "at_time": now})
+    full = client.get("/m/full", params={"vehicle_id": "v1", "mileage": 41000}).json()
+    oil = next(it for it in full["items"] if it["item"] == "engine_oil")
+    assert (oil["due"], oil["last_service_at_mileage"], oil["next_due_at_km"]) == (False, 40000, 55000)
+
+    due = client.get("/m/due", params={"vehicle_id": "v1", "mileage": 41000}).json()
+    assert "engine_oil" not in {it["item"] for it in due["items"]}
+    assert len(client.get("/m/records", params={"vehicle_id": "v1"}).json()["records"]) == 1
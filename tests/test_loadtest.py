@@ -0,0 +1,24 @@
+import asyncio
+
+from benchmarks.loadtest import OPERATIONS, percentile, run_scenario
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert (percentile(values, 50), percentile(values, 99), percentile(values, 100)) == (50.0, 99.0, 100.0)
+    assert percentile([], 99) == 0.0
+
+
+def test_in_process_scenario_runs_clean():
+    scenario = {
+        "name": "smoke",
+        "fleet_size": 20,
+        "records_per_vehicle": 2,
+        "mix": {name: 1 for name in OPERATIONS},
+        "phases": [{"duration_s": 0.3, "concurrency": 4}, {"duration_s": 0.2, "concurrency": 2, "rps": 50}],
+    }
+    result = asyncio.run(run_scenario(scenario))
+    assert result["requests"] > 0
+    assert result["error_rate"] == 0.0
+    assert "GET /maintenance/due" in result["endpoints"]
+    assert all(s["p50_ms"] <= s["p99_ms"] for s in result["endpoints"].values())
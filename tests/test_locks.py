@@ -0,0 +1,45 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from dcars_package.app import app, MAINTENANCE_DB, VEHICLE_KEYS, create_service_record
+from dcars_package.services.locks import StripedLock
+
+client = TestClient(app)
+
+
+def test_striped_lock_counts_contention():
+    locks = StripedLock(stripes=4)
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with locks.hold("v1"):
+            held.set()
+            release.wait()
+
+    t = threading.Thread(target=holder)
+    t.start()
+    held.wait()
+    threading.Timer(0.05, release.set).start()
+    with locks.hold("v1"):
+        pass
+    t.join()
+
+    stats = locks.stats()
+    assert stats["acquisitions"] == 2 and stats["contended"] == 1
+    assert stats["hottest"][0]["stripe"] == locks.stripe("v1")
+    assert stats["wait_seconds"] > 0
+
+
+def test_concurrent_record_creates_keep_max_mileage():
+    vids = [f"LOCK{i}" for i in range(4)]
+    payloads = [{"vehicle_id": vids[n % 4], "item": "coolant", "at_mileage": n} for n in range(2000)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(create_service_record, payloads))
+
+    for i, vid in enumerate(vids):
+        assert MAINTENANCE_DB[vid]["mileage"] == max(n for n in range(2000) if n % 4 == i)
+    keys = VEHICLE_KEYS.after(None, len(VEHICLE_KEYS))
+    assert len(keys) == len(set(keys))
+    assert client.get("/maintenance/locks/stats").json()["acquisitions"] >= 2000
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from dcars_package.app import app
+from dcars_package.middleware.metrics import Metrics
+
+client = TestClient(app)
+
+
+def test_metrics_keyed_by_route_template():
+    client.put("/service-records/123456", json={})
+    client.put("/service-records/654321", json={})
+    client.get("/static/index.html")
+    client.get("/no/such/path")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text
+    assert 'dcars_http_requests_total{method="PUT",route="/service-records/{rid}",status="404"} 2' in body
+    assert 'route="/static/{path}",status="200"' in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert "123456" not in body
+
+
+def test_histogram_buckets_are_cumulative():
+    m = Metrics(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 3.0):
+        m.observe("GET", "/maintenance/due", 200, seconds)
+    text = m.render()
+    assert 'dcars_http_request_duration_seconds_bucket{method="GET",route="/maintenance/due",le="0.01"} 1' in text
+    assert 'dcars_http_request_duration_seconds_bucket{method="GET",route="/maintenance/due",le="0.1"} 3' in text
+    assert 'dcars_http_request_duration_seconds_bucket{method="GET",route="/maintenance/due",le="+Inf"} 4' in text
+    assert 'dcars_http_request_duration_seconds_count{method="GET",route="/maintenance/due"} 4' in text
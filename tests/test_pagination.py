@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from dcars_package.app import app
+from dcars_package.routes import service_records
+from dcars_package.routes.service_records import InMemoryServiceRecords
+
+client = TestClient(app)
+
+
+def _walk(path, params):
+    seen, cursor = [], None
+    while True:
+        r = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        body = r.json()
+        seen.append(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return seen
+
+
+def test_vehicle_pages_follow_id_order():
+    for vid in ("PG-C", "PG-A", "PG-B", "PG-D"):
+        client.post("/vehicles/upsert", json={"vehicle_id": vid, "mileage": 1})
+    pages = _walk("/vehicles", {"limit": 3})
+    ids = [v["vehicle_id"] for page in pages for v in page]
+    assert ids == sorted(ids)
+    assert [i for i in ids if i.startswith("PG-")] == ["PG-A", "PG-B", "PG-C", "PG-D"]
+    assert all(len(p) <= 3 for p in pages)
+
+
+def test_record_pages_survive_concurrent_delete():
+    ids = [client.post("/service-records", json={"vehicle_id": "PG-R", "item": "coolant", "at_mileage": n}).json()["id"]
+           for n in range(5)]
+    first = client.get("/service-records", params={"vehicle_id": "PG-R", "limit": 2}).json()
+    assert [r["id"] for r in first["items"]] == ids[:2]
+
+    client.delete(f"/service-records/{ids[2]}")  # next record goes away between pages
+    second = client.get("/service-records", params={"vehicle_id": "PG-R", "limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [r["id"] for r in second["items"]] == ids[3:5]
+    assert second["next_cursor"] is None
+
+    assert client.get("/service-records", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_router_in_memory_pages(monkeypatch):
+    monkeypatch.setattr(service_records, "repo", InMemoryServiceRecords())
+    router_app = FastAPI()
+    router_app.include_router(service_records.router, prefix="/records")
+    rc = TestClient(router_app)
+    for n in range(5):
+        rc.post("/records", json={"vehicle_id": "v1", "item": "coolant", "at_mileage": n})
+
+    got, cursor = [], None
+    while True:
+        body = rc.get("/records", params={"limit": 2, **({"cursor": cursor} if cursor else {})}).json()
+        got += [r["id"] for r in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert got == sorted(got) and len(got) == 5
@@ -0,0 +1,151 @@
+import threading
+
+from dcars_package.services.persistence import StatePersistence, WriteAheadLog, read_segment
+from dcars_package.services.record_store import ServiceRecordStore
+
+
+def _rec(rid, vid, km):
+    return {"id": rid, "vehicle_id": vid, "item": "coolant", "at_mileage": km, "notes": None, "created_at": "x"}
+
+
+def _open(tmp_path):
+    db, store = {}, ServiceRecordStore()
+    p = StatePersistence(str(tmp_path))
+    p.recover(db, store)
+    return p, db, store
+
+
+def test_recover_snapshot_plus_log_tail(tmp_path):
+    p, db, store = _open(tmp_path)
+    db["v1"] = {"last_services": {}, "avg_monthly_km": None, "mileage": 100}
+    p.log_vehicle("v1", db["v1"])
+    recs = [_rec(store.next_id(), "v1", km) for km in (10, 20, 30)]
+    store.add_many(recs)
+    p.log_records(recs)
+    p.snapshot(db, store)
+
+    # after the snapshot: only in the log
+    db["v2"] = {"last_services": {}, "avg_monthly_km": 50.0, "mileage": 7}
+    p.log_vehicle("v2", db["v2"])
+    store.delete(recs[0]["id"])
+    p.log_record_delete(recs[0]["id"])
+    last = _rec(store.next_id(), "v2", 7)
+    store.add(last)
+    p.log_records([last])
+    store.delete(last["id"])
+    p.log_record_delete(last["id"])
+    p.close()
+
+    p2, db2, store2 = _open(tmp_path)
+    assert db2 == db
+    assert [r["id"] for r in store2.list()] == [r["id"] for r in store.list()]
+    assert p2.recovery["snapshot_seq"] == 2 and p2.recovery["replayed_ops"] == 4
+    # ids of deleted records are never handed out again
+    assert store2.next_id() > last["id"]
+    p2.close()
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    p, db, store = _open(tmp_path)
+    p.log_vehicle("v1", {"last_services": {}, "avg_monthly_km": None, "mileage": 1})
+    p.log_vehicle("v2", {"last_services": {}, "avg_monthly_km": None, "mileage": 2})
+    p.close()
+    (segment,) = tmp_path.glob("wal-*.log")
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    p2, db2, _ = _open(tmp_path)
+    assert list(db2) == ["v1"]
+    # new writes go to a fresh segment past the torn one
+    p2.log_vehicle("v3", None)
+    p2.close()
+    p3, db3, _ = _open(tmp_path)
+    assert list(db3) == ["v1"]
+    p3.close()
+
+
+def test_batch_is_one_frame_replayed_whole(tmp_path):
+    p, db, store = _open(tmp_path)
+    appends, fsyncs = p.wal.appends, p.wal.fsyncs
+    with p.batch():
+        recs = [_rec(store.next_id(), "v1", km) for km in (10, 20)]
+        store.add_many(recs)
+        p.log_records(recs)
+        db["v1"] = {"last_services": {}, "avg_monthly_km": None, "mileage": 20}
+        p.log_vehicle("v1", db["v1"])
+        with p.batch():
+            db["v2"] = {"last_services": {}, "avg_monthly_km": None, "mileage": 5}
+            p.log_vehicle("v2", db["v2"])
+        # the entry was taken at log time, not when the batch is written
+        db["v1"] = dict(db["v1"], mileage=20)
+    assert p.wal.appends == appends + 1 and p.wal.fsyncs == fsyncs + 1
+    p.close()
+
+    p2, db2, store2 = _open(tmp_path)
+    assert db2 == db
+    assert [r["id"] for r in store2.list()] == [r["id"] for r in recs]
+    assert p2.recovery["replayed_ops"] == 1
+    p2.close()
+
+
+def test_torn_batch_is_dropped_whole(tmp_path):
+    p, db, store = _open(tmp_path)
+    with p.batch():
+        p.log_vehicle("v1", {"last_services": {}, "avg_monthly_km": None, "mileage": 1})
+        p.log_vehicle("v2", {"last_services": {}, "avg_monthly_km": None, "mileage": 2})
+    p.close()
+    (segment,) = tmp_path.glob("wal-*.log")
+    segment.write_bytes(segment.read_bytes()[:-3])
+
+    p2, db2, _ = _open(tmp_path)
+    assert db2 == {}
+    p2.close()
+
+
+def test_rotate_waits_for_the_group_being_flushed(tmp_path):
+    wal = WriteAheadLog(tmp_path, 1)
+    in_write, release = threading.Event(), threading.Event()
+    real_write = wal._write
+
+    def slow_write(frames):
+        in_write.set()
+        release.wait(5)
+        real_write(frames)
+
+    wal._write = slow_write
+    appender = threading.Thread(target=wal.append, args=(("delete", 1),))
+    appender.start()
+    assert in_write.wait(5)
+    rotated = []
+    rotator = threading.Thread(target=lambda: rotated.append(wal.rotate()))
+    rotator.start()
+    rotator.join(0.2)
+    # the flusher owns the file: rotate can neither close it nor ack seq 1 yet
+    assert rotator.is_alive() and wal._synced_seq == 0
+    release.set()
+    appender.join(5)
+    rotator.join(5)
+    wal._write = real_write
+    wal.append(("delete", 2))
+    wal.close()
+
+    assert rotated == [1]
+    segments = sorted(tmp_path.glob("wal-*.log"))
+    assert [[seq for seq, _ in read_segment(s)] for s in segments] == [[1], [2]]
+
+
+def test_writes_after_a_torn_first_frame_survive_two_restarts(tmp_path):
+    p, db, store = _open(tmp_path)
+    p.log_vehicle("A", {"last_services": {}, "avg_monthly_km": None, "mileage": 1})
+    p.wal.rotate()
+    p.log_vehicle("X", {"last_services": {}, "avg_monthly_km": None, "mileage": 2})
+    p.close()
+    newest = sorted(tmp_path.glob("wal-*.log"))[-1]
+    newest.write_bytes(newest.read_bytes()[:-3])  # tears the segment's first frame
+
+    p2, db2, _ = _open(tmp_path)
+    assert list(db2) == ["A"]
+    p2.log_vehicle("B", {"last_services": {}, "avg_monthly_km": None, "mileage": 3})
+    p2.close()
+    p3, db3, _ = _open(tmp_path)
+    assert list(db3) == ["A", "B"]
+    p3.close()
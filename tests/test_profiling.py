@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+from dcars_package import config
+from dcars_package.app import app
+from dcars_package.profiling import RequestProfile, span
+
+client = TestClient(app)
+
+
+def _vehicle():
+    client.post("/vehicles/upsert", json={
+        "vehicle_id": "PROF1",
+        "mileage": 50_000,
+        "last_services": {"engine_oil": {"last_km": 1_000, "last_date": "2024-01-01"}},
+    })
+
+
+def test_header_ignored_unless_enabled(monkeypatch):
+    monkeypatch.setattr(config, "PROFILING", False)
+    _vehicle()
+    r = client.get("/maintenance/full", params={"vehicle_id": "PROF1"}, headers={"X-Profile": "pstats"})
+    assert r.json()["vehicle_id"] == "PROF1"
+    assert "server-timing" not in r.headers
+
+
+def test_pstats_report_replaces_body(monkeypatch):
+    monkeypatch.setattr(config, "PROFILING", True)
+    monkeypatch.setattr(config, "PROFILE_DIR", None)
+    _vehicle()
+    r = client.get("/maintenance/full", params={"vehicle_id": "PROF1", "mileage": 61_234},
+                   headers={"X-Profile": "pstats"})
+    assert r.status_code == 200 and r.headers["x-profile-status"] == "200"
+    assert r.headers["content-type"].startswith("text/plain")
+    assert "compute_due;dur=" in r.headers["server-timing"]
+    assert "maintenance_logic.py" in r.text and "compute_item_due" in r.text
+
+
+def test_profile_stored_and_response_kept(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "PROFILING", True)
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    _vehicle()
+    r = client.get("/vehicles", headers={"X-Profile": "collapsed"})
+    assert "PROF1" in {v["vehicle_id"] for v in r.json()}
+    assert "vehicle_store.list;dur=" in r.headers["server-timing"]
+    assert (tmp_path / r.headers["x-profile-file"]).exists()
+
+
+def test_spans_sum_per_name():
+    profile = RequestProfile("collapsed")
+    with span("outside"):
+        pass
+    token = profile.activate()
+    try:
+        for _ in range(3):
+            with span("record_store.add"):
+                pass
+    finally:
+        profile.deactivate(token)
+    assert list(profile.spans) == ["record_store.add"]
+    assert profile.spans["record_store.add"][0] == 3
+    assert 'record_store.add;dur=' in profile.server_timing(0.01)
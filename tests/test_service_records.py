@@ -22,4 +22,16 @@ def test_crud_flow():
     assert r.json()["at_mileage"] == 72000
 
     r = client.delete(f"/service-records/{rid}")
-    assert r.status_code == 204
\ No newline at end of file
+    assert r.status_code == 204
+
+def test_ids_not_reused_after_delete():
+    a = client.post("/service-records", json={"vehicle_id": "v9", "item": "coolant", "at_mileage": 1000}).json()
+    b = client.post("/service-records", json={"vehicle_id": "v9", "item": "coolant", "at_mileage": 2000}).json()
+    assert client.delete(f"/service-records/{a['id']}").status_code == 204
+    assert client.delete(f"/service-records/{a['id']}").status_code == 404
+
+    c = client.post("/service-records", json={"vehicle_id": "v9", "item": "coolant", "at_mileage": 3000}).json()
+    assert c["id"] not in (a["id"], b["id"])
+
+    r = client.get("/service-records", params={"vehicle_id": "v9"})
+    assert [x["id"] for x in r.json()] == [b["id"], c["id"]]
@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+
+from dcars_package import app as app_module, config
+from dcars_package.services.shared_state import SharedState
+
+
+class Worker:
+    """A second process's view: plain dicts behind the hooks."""
+
+    def __init__(self, path):
+        self.vehicles, self.records, self.max_id = {}, {}, 0
+        self.state = SharedState(
+            path,
+            on_vehicle=lambda vid, rec: self.vehicles.__setitem__(vid, rec) if rec else self.vehicles.pop(vid, None),
+            on_record=lambda rid, rec: self.records.__setitem__(rid, rec) if rec else self.records.pop(rid, None),
+            on_reload=self._reload,
+            reserve_ids=lambda max_id: setattr(self, "max_id", max_id),
+        )
+        self.state.load()
+
+    def _reload(self, vehicles, records):
+        self.vehicles = dict(vehicles)
+        self.records = {r["id"]: r for r in records}
+
+
+def test_workers_see_each_others_writes(tmp_path):
+    path = str(tmp_path / "state.db")
+    a, b = Worker(path), Worker(path)
+    with a.state.transaction():
+        a.state.write_vehicle("v1", {"mileage": 10})
+        a.state.write_records([{"id": 7, "vehicle_id": "v1", "item": "coolant"}])
+    b.state.maybe_sync()
+    assert b.vehicles == {"v1": {"mileage": 10}}
+    assert list(b.records) == [7] and b.max_id == 7
+
+    with b.state.transaction():
+        b.state.delete_record(7)
+    a.state.maybe_sync()
+    assert a.records == {}
+    # a worker's own commits don't come back to it
+    assert a.state.applied_changes == 1 and b.state.applied_changes == 2
+
+
+def test_rolled_back_write_forces_reload(tmp_path):
+    a = Worker(str(tmp_path / "state.db"))
+    try:
+        with a.state.transaction():
+            a.state.write_vehicle("v1", {"mileage": 1})
+            raise RuntimeError("handler failed")
+    except RuntimeError:
+        pass
+    a.vehicles["v1"] = {"mileage": 1}  # what the handler had already put in memory
+    a.state.maybe_sync()
+    assert a.vehicles == {} and a.state.reloads == 2
+
+
+def test_app_in_shared_mode(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.db")
+    monkeypatch.setattr(config, "STATE_DB", path)
+    other = Worker(path)
+    with TestClient(app_module.app) as client:
+        r = client.post("/service-records", json={"vehicle_id": "SH1", "item": "coolant", "at_mileage": 500})
+        rid = r.json()["id"]
+        other.state.maybe_sync()
+        assert other.vehicles["SH1"]["mileage"] == 500 and rid in other.records
+
+        with other.state.transaction():
+            other.state.write_vehicle("SH1", {"last_services": {}, "avg_monthly_km": None, "mileage": 900})
+            other.state.write_records([{**other.records[rid], "notes": "from b"}])
+        assert client.get("/vehicles", params={"vehicle_id": "SH1"}).json()[0]["mileage"] == 900
+        assert client.get("/service-records", params={"vehicle_id": "SH1"}).json()[0]["notes"] == "from b"
+
+        # ids keep counting past whatever any worker handed out
+        with other.state.transaction():
+            other.state.write_records([{"id": rid + 50, "vehicle_id": "SH2", "item": "coolant", "at_mileage": 1,
+                                        "notes": None, "created_at": "x"}])
+        r = client.post("/service-records", json={"vehicle_id": "SH2", "item": "coolant", "at_mileage": 2})
+        assert r.json()["id"] == rid + 51
+    assert app_module.SHARED is None
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+
+from dcars_package.db import make_engine
+from dcars_package.routes import service_records
+from dcars_package.routes.service_records import SqlServiceRecords
+from dcars_package.schemas import ServiceRecordCreate, ServiceRecordUpdate
+
+
+def _repo(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/records.db", pool_size=2)
+    return SqlServiceRecords(sessionmaker(bind=engine)), engine
+
+
+def test_sql_repo_crud_and_wal(tmp_path):
+    repo, engine = _repo(tmp_path)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+    assert "ix_service_records_vehicle_id" in {ix["name"] for ix in inspect(engine).get_indexes("service_records")}
+
+    at = datetime(2024, 5, 1, 8, 30, tzinfo=timezone.utc)
+    a = repo.create(ServiceRecordCreate(vehicle_id="v1", item="engine_oil", at_mileage=1000, at_time=at))
+    repo.create_many([
+        ServiceRecordCreate(vehicle_id="v2", item="coolant", at_mileage=n) for n in range(5)
+    ])
+    assert a.at_time == at
+    assert [r.at_mileage for r in repo.list("v2")] == [0, 1, 2, 3, 4]
+    assert len(repo.list()) == 6
+
+    out = repo.update(a.id, ServiceRecordUpdate(item="oil_filter", at_mileage=1500))
+    assert (out.item, out.at_mileage, out.at_time) == ("oil_filter", 1500, at)
+    assert repo.update("999", ServiceRecordUpdate(at_mileage=1)) is None
+
+    assert repo.delete(a.id) is True
+    assert repo.delete(a.id) is False
+    assert repo.get(a.id) is None
+
+
+def test_sql_repo_survives_restart(tmp_path, monkeypatch):
+    repo, _ = _repo(tmp_path)
+    monkeypatch.setattr(service_records, "repo", repo)
+    app = FastAPI()
+    app.include_router(service_records.router, prefix="/records")
+    client = TestClient(app)
+
+    r = client.post("/records", json={"vehicle_id": "v1", "item": "coolant", "at_mileage": 42000})
+    assert r.status_code == 201
+    rid = r.json()["id"]
+
+    reopened, _ = _repo(tmp_path)
+    assert reopened.get(rid).at_mileage == 42000
+
+
+def test_sql_repo_keyset_page(tmp_path):
+    repo, _ = _repo(tmp_path)
+    made = repo.create_many([ServiceRecordCreate(vehicle_id="v1", item="coolant", at_mileage=n) for n in range(5)])
+    first = repo.page(None, 2, "v1")
+    assert [r.id for r in first] == [made[0].id, made[1].id]
+    assert [r.id for r in repo.page(first[-1].id, 10)] == [m.id for m in made[2:]]
+
+
+def test_sql_repo_upgrades_a_table_without_at_time(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/records.db", pool_size=2)
+    with engine.begin() as conn:
+        # service_records as created before at_time existed
+        conn.exec_driver_sql(
+            "CREATE TABLE service_records (id INTEGER PRIMARY KEY, vehicle_id VARCHAR, date DATE, "
+            "mileage INTEGER, total_cost FLOAT)"
+        )
+        conn.exec_driver_sql("INSERT INTO service_records VALUES (1, 'old', '2023-02-03', 500, 0.0), (2, 'old', NULL, 600, 0.0)")
+    repo = SqlServiceRecords(sessionmaker(bind=engine))
+    assert "at_time" in {c["name"] for c in inspect(engine).get_columns("service_records")}
+
+    dated, undated = repo.list("old")
+    assert dated.at_time == datetime(2023, 2, 3, tzinfo=timezone.utc)
+    assert undated.at_time is None
+    new = repo.create(ServiceRecordCreate(vehicle_id="old", item="engine_oil", at_mileage=700))
+    assert repo.get(new.id).at_time == new.at_time
+
+
+def test_latest_view_is_lazy_and_holds_only_the_newest_rows(tmp_path):
+    repo, _ = _repo(tmp_path)
+    day = lambda d: datetime(2024, 1, d, tzinfo=timezone.utc)  # noqa: E731
+    made = repo.create_many([
+        ServiceRecordCreate(vehicle_id="v1", item="coolant", at_mileage=d * 100, at_time=day(d)) for d in (1, 2, 3)
+    ] + [ServiceRecordCreate(vehicle_id="v1", item="engine_oil", at_mileage=50, at_time=day(1))])
+
+    reopened, _ = _repo(tmp_path)
+    assert reopened._latest is None  # nothing read at construction
+    view = reopened.latest
+    assert len(view) == 2
+    assert view.get("v1", "coolant").id == made[2].id
+    assert sum(len(b) for b in view._buckets.values()) == 2  # not every record
+
+    # the next latest is not in memory: it comes back from the database
+    reopened.delete(made[2].id)
+    assert view.get("v1", "coolant").id == made[1].id
+    reopened.update(made[1].id, ServiceRecordUpdate(item="engine_oil"))
+    assert view.get("v1", "coolant").id == made[0].id
+    assert view.get("v1", "engine_oil").id == made[1].id
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from dcars_package import app as app_module
+from dcars_package.app import app, DUE_CACHE, MAINTENANCE_DB, prewarm_due
+from dcars_package.services.maintenance_logic import DEFAULT_RULES
+from dcars_package.services.startup import Startup
+
+client = TestClient(app)
+
+
+def _wait_ready(c, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        r = c.get("/ready")
+        if r.status_code == 200:
+            return r
+        time.sleep(0.02)
+    raise AssertionError(f"not ready: {r.json()}")
+
+
+def test_ready_after_warm_up_with_phase_timings():
+    client.post("/vehicles/upsert", json={"vehicle_id": "WARM1", "mileage": 30_000})
+    with TestClient(app) as c:
+        assert c.get("/health").json() == {"status": "ok"}
+        body = _wait_ready(c).json()
+        assert body["status"] == "ready"
+        assert [p["phase"] for p in body["phases"]] == ["load_state", "compile_rules", "prewarm_due"]
+        assert all(p["error"] is None for p in body["phases"])
+        assert body["time_to_ready"] >= 0
+        assert body["progress"]["done"] == body["progress"]["total"] >= 1
+        assert 'dcars_startup_phase_seconds{phase="prewarm_due"}' in c.get("/metrics").text
+
+
+def test_prewarm_matches_cold_result():
+    # half the dates naive (as "2025-01-01" parses), half aware
+    services = {
+        item: {"last_km": 70_000, "last_date": "2025-01-01" if i % 2 else "2025-01-01T00:00:00+00:00"}
+        for i, item in enumerate(DEFAULT_RULES)
+    }
+    client.post(
+        "/vehicles/upsert",
+        json={"vehicle_id": "WARM2", "mileage": 80_000, "avg_monthly_km": 1500, "last_services": services},
+    )
+    cold = client.get("/maintenance/full", params={"vehicle_id": "WARM2"}).json()
+    DUE_CACHE.clear()
+    assert prewarm_due(len(MAINTENANCE_DB), threading.Event()) >= 1
+    hits = DUE_CACHE.hits
+    warm = client.get("/maintenance/full", params={"vehicle_id": "WARM2"}).json()
+    assert DUE_CACHE.hits == hits + 1
+    assert {k: v for k, v in warm.items() if k != "generated_at"} == {
+        k: v for k, v in cold.items() if k != "generated_at"
+    }
+
+
+def test_prewarm_drops_vehicles_written_meanwhile(monkeypatch):
+    client.post("/vehicles/upsert", json={"vehicle_id": "WARM3", "mileage": 10_000})
+    DUE_CACHE.clear()
+    real = app_module.compute_fleet_due
+
+    def write_during_compute(*args, **kwargs):
+        fleet = real(*args, **kwargs)
+        client.post("/vehicles/upsert", json={"vehicle_id": "WARM3", "mileage": 99_000})
+        return fleet
+
+    monkeypatch.setattr(app_module, "compute_fleet_due", write_during_compute)
+    prewarm_due(len(MAINTENANCE_DB), threading.Event())
+    monkeypatch.undo()
+    assert client.get("/maintenance/full", params={"vehicle_id": "WARM3"}).json()["current_km"] == 99_000
+
+
+def test_phase_records_errors():
+    s = Startup()
+    try:
+        with s.phase("load_state"):
+            raise ValueError("bad snapshot")
+    except ValueError:
+        pass
+    snap = s.snapshot()
+    assert snap["status"] == "starting"
+    assert snap["phases"][0]["error"] == "ValueError: bad snapshot"
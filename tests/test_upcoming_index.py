@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from dcars_package.app import app, MAINTENANCE_DB
+from dcars_package.services.upcoming_index import UpcomingIndex
+
+client = TestClient(app)
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _vehicle(mileage, last_km=None, last_date=None, avg=None, item="engine_oil"):
+    return {"mileage": mileage, "avg_monthly_km": avg,
+            "last_services": {item: {"last_km": last_km, "last_date": last_date}}}
+
+
+def test_projection_order_and_limit():
+    idx = UpcomingIndex()
+    # 1000 km left at 1000 km/month -> due in ~30 days
+    idx.update("KM", _vehicle(14000, last_km=0, avg=1000.0), now=NOW)
+    # time window (360 days) ends in 10 days
+    idx.update("TIME", _vehicle(0, last_date=NOW - timedelta(days=350)), now=NOW)
+    # already past the km interval
+    idx.update("OVERDUE", _vehicle(20000, last_km=0), now=NOW)
+    # no avg_monthly_km and no date: never projected
+    idx.update("UNKNOWN", _vehicle(100, last_km=0), now=NOW)
+
+    got = [(v, reason) for _, _, v, _, reason in idx.upcoming(within_days=31, limit=10, now=NOW)]
+    assert got == [("OVERDUE", "km"), ("TIME", "time"), ("KM", "km")]
+    assert [e[2] for e in idx.upcoming(within_days=31, limit=2, now=NOW)] == ["OVERDUE", "TIME"]
+    assert [e[2] for e in idx.upcoming(within_days=20, limit=10, now=NOW)] == ["OVERDUE", "TIME"]
+
+
+def test_update_replaces_stale_entries():
+    idx = UpcomingIndex()
+    for i in range(200):
+        idx.update("V", _vehicle(20000 + i, last_km=0), now=NOW)
+    assert len(idx) == 1
+    assert len(idx._heap) < 200
+    idx.update("V", _vehicle(100, last_km=0), now=NOW)
+    assert idx.upcoming(within_days=30, limit=10, now=NOW) == []
+
+
+def test_upcoming_endpoint():
+    client.post("/vehicles/upsert", json={
+        "vehicle_id": "UPC1", "mileage": 50000, "avg_monthly_km": 1500,
+        "last_services": {"coolant": {"last_km": 0, "last_date": "2020-01-01T00:00:00+00:00"}},
+    })
+    r = client.get("/maintenance/upcoming", params={"within_days": 30, "limit": 1000})
+    assert r.status_code == 200
+    rows = [x for x in r.json()["items"] if x["vehicle_id"] == "UPC1"]
+    assert rows and rows[0]["item"] == "coolant" and rows[0]["reason"] == "time"
+
+
+def test_upsert_rejects_bad_last_km_before_writing():
+    for last_km in ("abc", -5, 1.5):
+        r = client.post(
+            "/vehicles/upsert",
+            json={"vehicle_id": "BADKM", "mileage": 1000, "last_services": {"engine_oil": {"last_km": last_km}}},
+        )
+        assert r.status_code == 400
+        assert r.json()["detail"] == "last_services.engine_oil.last_km must be an int >= 0"
+    assert "BADKM" not in MAINTENANCE_DB